@@ -0,0 +1,154 @@
+"""Protected-route throughput with and without per-connection auth sessions.
+
+Examples:
+    python -m benchmarks.bench_auth
+    python -m benchmarks.bench_auth --connections 8 --requests 5000 --depth 16
+
+Each configuration starts its own uvicorn and sends GET /items/1 with the
+same bearer token over a fixed set of connections: once with keep-alive (one
+request in flight per connection, through httpx) and once pipelined (``depth``
+requests written back to back before their responses are read). Tokens are
+the static development token and an RS256 JWT.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
+import httpx
+
+from benchmarks.common import percentiles
+from benchmarks.load import _free_port
+from tests.jwt_helpers import jwks, make_token
+
+
+@asynccontextmanager
+async def server(env: dict) -> AsyncIterator[int]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as probe:
+            for _ in range(200):
+                with suppress(httpx.TransportError):
+                    await probe.get("/")
+                    break
+                await asyncio.sleep(0.05)
+            else:
+                raise RuntimeError("uvicorn did not start")
+        yield port
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def keep_alive(port: int, token: str, connections: int, requests: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=connections)
+    samples: list[float] = []
+    counter = iter(range(requests))
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", limits=limits
+    ) as client:
+        (await client.post("/items", json={"name": "bench", "price": 1.0},
+                           headers=headers)).raise_for_status()
+
+        async def worker() -> None:
+            for _ in counter:
+                start = time.perf_counter()
+                response = await client.get("/items/1", headers=headers)
+                samples.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+    return {"throughput_rps": round(requests / elapsed, 1), **percentiles(samples)}
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            await reader.readexactly(int(line.split(b":", 1)[1]))
+    return status
+
+
+async def pipelined(
+    port: int, token: str, connections: int, requests: int, depth: int
+) -> dict:
+    request = (
+        f"GET /items/1 HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n\r\n"
+    ).encode()
+    per_connection = requests // connections
+
+    async def connection() -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            for sent in range(0, per_connection, depth):
+                burst = min(depth, per_connection - sent)
+                writer.write(request * burst)
+                await writer.drain()
+                for _ in range(burst):
+                    if await read_response(reader) != 200:
+                        raise RuntimeError("unexpected status")
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return {"throughput_rps": round(per_connection * connections / elapsed, 1)}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        keys_file = os.path.join(directory, "jwks.json")
+        with open(keys_file, "w", encoding="utf-8") as f:
+            json.dump(jwks(), f)
+        jwt = make_token({"sub": "bench", "exp": time.time() + 3600}, "RS256")
+        modes = {
+            "static": ({"AUTH_MODE": "static"}, "mocked-jwt-token"),
+            "jwt_rs256": ({"AUTH_MODE": "jwt", "JWT_KEYS_FILE": keys_file}, jwt),
+        }
+        for mode, (mode_env, token) in modes.items():
+            for sessions in ("false", "true"):
+                env = dict(os.environ, **mode_env, AUTH_SESSIONS=sessions)
+                async with server(env) as port:
+                    name = f"{mode}_sessions_{'on' if sessions == 'true' else 'off'}"
+                    results[name] = {
+                        "keep_alive": await keep_alive(
+                            port, token, args.connections, args.requests
+                        ),
+                        "pipelined": await pipelined(
+                            port, token, args.connections, args.requests, args.depth
+                        ),
+                    }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--depth", type=int, default=8, help="pipelined requests per burst")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Items/sec of single-item POST /items versus POST /items/bulk (NDJSON).
+
+Usage: python -m benchmarks.bench_bulk --items 100000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from main import app
+from src import store
+
+HEADERS = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+async def single(client: httpx.AsyncClient, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        response = await client.post("/items", json={"name": f"item{i}", "price": 1.5})
+        response.raise_for_status()
+    return count / (time.perf_counter() - start)
+
+
+async def bulk(client: httpx.AsyncClient, count: int) -> float:
+    body = "".join(
+        json.dumps({"name": f"item{i}", "price": 1.5}) + "\n" for i in range(count)
+    ).encode()
+    headers = {"Content-Type": "application/x-ndjson"}
+    start = time.perf_counter()
+    response = await client.post("/items/bulk", content=body, headers=headers)
+    response.raise_for_status()
+    assert response.json()["created"] == count
+    return count / (time.perf_counter() - start)
+
+
+async def run(items: int, single_items: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=HEADERS
+    ) as client:
+        store._repository = store.InMemoryItemRepository()
+        single_rate = await single(client, single_items)
+        store._repository = store.InMemoryItemRepository()
+        bulk_rate = await bulk(client, items)
+    return {
+        "single_items_per_sec": round(single_rate),
+        "bulk_items_per_sec": round(bulk_rate),
+        "speedup": round(bulk_rate / single_rate, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--single-items", type=int, default=5_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.items, args.single_items))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""CPU cost versus bytes saved for each response encoding.
+
+For a single-item body and a full GET /items page, reports per encoding the
+compressed size, ratio and compression time. It also reports in-process
+requests/sec for that page with compression off and on, and for a cached
+item served from its stored compressed copy. Encodings whose library
+(brotli, zstandard) is not installed are skipped.
+
+Usage: python -m benchmarks.bench_compression
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import percentiles, time_sync
+from main import app
+from src import compression, response_cache, store
+from src.compression import COMPRESSORS, compress
+from src.config import Settings, get_settings
+from src.store import StoredItem
+
+HEADERS = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+def seeded_repository(items: int) -> store.InMemoryItemRepository:
+    repository = store.InMemoryItemRepository()
+    for i in range(1, items + 1):
+        repository._index(StoredItem(i, f"item{i}", float(i % 1000) + 0.5))
+    repository._last_id = items
+    return repository
+
+
+def per_encoding(body: bytes, iterations: int) -> dict:
+    result = {}
+    for encoding in COMPRESSORS:
+        compressed = compress(encoding, body)
+        samples = time_sync(lambda: compress(encoding, body), iterations)
+        result[encoding] = {
+            "bytes": len(compressed),
+            "ratio": round(len(body) / len(compressed), 2),
+            **percentiles(samples),
+        }
+    return {"identity_bytes": len(body), "encodings": result}
+
+
+async def requests_per_second(
+    path: str, requests: int, accept_encoding: str
+) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={**HEADERS, "Accept-Encoding": accept_encoding},
+    ) as client:
+        await client.get(path)
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path)
+        return round(requests / (time.perf_counter() - start))
+
+
+async def run(iterations: int, requests: int) -> dict:
+    store._repository = seeded_repository(1000)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=HEADERS
+    ) as client:
+        page = (await client.get("/items", params={"limit": 1000})).content
+        item = (await client.get("/items/1")).content
+    result = {
+        "single_item": per_encoding(item, iterations),
+        "page_of_1000": per_encoding(page, max(iterations // 100, 100)),
+        "requests_per_sec": {},
+    }
+
+    rates = result["requests_per_sec"]
+    for encoding in ("identity", *COMPRESSORS):
+        rates[f"page_{encoding}"] = await requests_per_second(
+            "/items?limit=1000", requests // 10, encoding
+        )
+    # Cached items are stored compressed once their body reaches the threshold.
+    settings = Settings(compression_min_bytes=1)
+    compression.get_settings = response_cache.get_settings = lambda: settings
+    response_cache._response_cache = None
+    for encoding in ("identity", *COMPRESSORS):
+        rates[f"cached_item_{encoding}"] = await requests_per_second(
+            "/items/1", requests, encoding
+        )
+    compression.get_settings = response_cache.get_settings = get_settings
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations, args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Peak RSS and throughput of GET /items/export as the catalog grows.
+
+Examples:
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --sizes 10000 10000000 --format csv
+
+Each catalog size runs in a fresh process against a repository that generates
+items on demand, so the figures show the export's own memory and not the
+catalog's. The response is driven straight through the ASGI app and its body
+is counted and discarded, as a client streaming it to disk would.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.common import GeneratedRepository
+from main import app
+from src import store
+
+
+async def export(size: int, format: str, accept_encoding: str) -> int:
+    store._repository = GeneratedRepository(size)
+    headers = [(b"authorization", b"Bearer mocked-jwt-token")]
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/items/export",
+        "raw_path": b"/items/export", "root_path": "",
+        "query_string": f"format={format}".encode(), "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    requested = False
+    done = asyncio.Event()
+    received = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return received
+
+
+def child(size: int, format: str, accept_encoding: str) -> None:
+    baseline_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    received = asyncio.run(export(size, format, accept_encoding))
+    elapsed = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "rows": size,
+        "bytes_sent": received,
+        "rows_per_sec": round(size / elapsed),
+        "peak_rss_mib": round(peak_kib / 1024, 1),
+        "rss_growth_mib": round((peak_kib - baseline_kib) / 1024, 1),
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv", "arrow"])
+    parser.add_argument("--accept-encoding", default="", help="e.g. gzip")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.child, args.format, args.accept_encoding)
+        return
+    for size in args.sizes:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_export", "--child", str(size),
+             "--format", args.format, "--accept-encoding", args.accept_encoding],
+            capture_output=True, text=True, check=True,
+        )
+        print(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Retry storms against POST /items, with and without Idempotency-Key.
+
+Examples:
+    python -m benchmarks.bench_idempotency
+    python -m benchmarks.bench_idempotency --creates 500 --retries 8 --uvicorn
+
+Each logical create is sent ``retries`` times at once (clients retrying on a
+timeout while the first attempt is still running) and ``retries`` times more
+after those have completed (late retries). Store writes are counted from
+GET /items/stats before and after. With a key per logical create, writes
+should equal ``creates`` however many retries are sent; without keys every
+attempt is a write.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from benchmarks.common import percentiles
+from benchmarks.load import AUTH, make_client
+
+
+async def item_count(client: httpx.AsyncClient) -> int:
+    response = await client.get("/items/stats", headers=AUTH)
+    response.raise_for_status()
+    return response.json()["count"]
+
+
+async def storm(client: httpx.AsyncClient, args: argparse.Namespace, keyed: bool) -> dict:
+    samples: list[float] = []
+    item_ids: list[set[int]] = []
+    statuses: dict[int, int] = {}
+    replayed = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def attempt(n: int, headers: dict) -> int:
+        nonlocal replayed
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/items", json={"name": f"storm{n}", "price": 1.0}, headers=headers
+            )
+            samples.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        replayed += response.headers.get("idempotent-replayed") == "true"
+        return response.json()["item_id"]
+
+    async def create(n: int) -> None:
+        headers = dict(AUTH)
+        if keyed:
+            headers["Idempotency-Key"] = str(uuid.uuid4())
+        burst = await asyncio.gather(*(attempt(n, headers) for _ in range(args.retries)))
+        late = await asyncio.gather(*(attempt(n, headers) for _ in range(args.retries)))
+        item_ids.append(set(burst) | set(late))
+
+    before = await item_count(client)
+    start = time.perf_counter()
+    await asyncio.gather(*(create(n) for n in range(args.creates)))
+    elapsed = time.perf_counter() - start
+    writes = await item_count(client) - before
+    requests = args.creates * args.retries * 2
+    return {
+        "requests": requests,
+        "store_writes": writes,
+        "replayed": replayed,
+        "distinct_ids_per_create": max(len(ids) for ids in item_ids),
+        "statuses": statuses,
+        "throughput_rps": round(requests / elapsed, 1),
+        **percentiles(samples),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    async with make_client(args) as client:
+        results = {
+            "without_key": await storm(client, args, keyed=False),
+            "with_key": await storm(client, args, keyed=True),
+        }
+    return {"creates": args.creates, "retries": args.retries, **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--creates", type=int, default=200)
+    parser.add_argument("--retries", type=int, default=5, help="attempts per wave")
+    parser.add_argument("--concurrency", type=int, default=32)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="benchmark an already running server")
+    target.add_argument("--uvicorn", action="store_true", help="start a local uvicorn")
+    args = parser.parse_args()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if result["with_key"]["store_writes"] > args.creates:
+        raise SystemExit("retried creates were written more than once")
+
+
+if __name__ == "__main__":
+    main()
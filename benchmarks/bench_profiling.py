@@ -0,0 +1,73 @@
+"""Request latency cost of the slow request log and the sampling profiler.
+
+Examples:
+    python -m benchmarks.bench_profiling
+    python -m benchmarks.bench_profiling --requests 5000
+
+Sends GET /items/1 in-process (httpx.ASGITransport, full middleware stack)
+with everything off, with the slow request log enabled but no request over
+its threshold, with every request recorded, and with the profiler sampling
+every 5 ms and every 1 ms.
+"""
+
+import argparse
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.common import percentiles, time_async
+from main import app
+from src import metrics, store
+from src.config import Settings
+from src.models import Item
+from src.profiling import SamplingProfiler
+
+HEADERS = {"Authorization": "Bearer mocked-jwt-token"}
+
+CONFIGURATIONS = {
+    "off": (0.0, None),
+    "slow_log_idle": (1.0, None),
+    "slow_log_every_request": (1e-9, None),
+    "profiler_5ms": (0.0, 0.005),
+    "profiler_1ms": (0.0, 0.001),
+}
+
+
+async def run(requests: int) -> dict:
+    store._repository = store.InMemoryItemRepository()
+    await store._repository.add(Item(name="bench", price=1.0))
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=HEADERS
+    ) as client:
+        for name, (threshold, interval) in CONFIGURATIONS.items():
+            settings = Settings(slow_request_seconds=threshold)
+            metrics.get_settings = lambda settings=settings: settings
+            metrics._slow_requests = None
+            profiler = SamplingProfiler()
+            if interval is not None:
+                profiler.start(interval, max_seconds=600)
+            try:
+                await time_async(lambda: client.get("/items/1"), 200)
+                samples = await time_async(lambda: client.get("/items/1"), requests)
+            finally:
+                profiler.stop()
+            results[name] = percentiles(samples)
+            if interval is not None:
+                results[name]["samples"] = profiler.samples
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
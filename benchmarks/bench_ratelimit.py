@@ -0,0 +1,94 @@
+"""Per-request cost of rate limiting.
+
+Reports the cost of RateLimiter.acquire for an allowed request with the
+in-process table and the shared file-backed table, across many clients, the
+cost of the whole rate_limit dependency (key lookup included), and in-process
+requests/sec for GET /items/{item_id} with limiting off and on.
+
+Usage: python -m benchmarks.bench_ratelimit
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+from starlette.requests import Request
+
+from benchmarks.common import percentiles, time_async, time_sync
+from main import app
+from src import ratelimit, store
+from src.config import Settings, get_settings
+from src.ratelimit import RateLimiter
+
+HEADERS = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+def per_call(limiter: RateLimiter, clients: int, iterations: int) -> dict:
+    keys = [f"token:client{i}" for i in range(clients)]
+    counter = iter(range(iterations))
+    return percentiles(
+        time_sync(lambda: limiter.acquire(keys[next(counter) % clients]), iterations)
+    )
+
+
+async def dependency(iterations: int) -> dict:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/items/1",
+        "headers": [(b"authorization", HEADERS["Authorization"].encode())],
+        "client": ("127.0.0.1", 50000),
+    }
+    request = Request(scope)
+    return percentiles(await time_async(lambda: ratelimit.rate_limit(request), iterations))
+
+
+async def requests_per_second(requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=HEADERS
+    ) as client:
+        await client.post("/items", json={"name": "item", "price": 1.5})
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/items/1")
+        return round(requests / (time.perf_counter() - start))
+
+
+async def run(iterations: int, requests: int, clients: int) -> dict:
+    # A rate high enough that every benchmarked request is allowed.
+    rate = 1e9
+    result = {"acquire": {"local": per_call(RateLimiter(rate, rate), clients, iterations)}}
+    with tempfile.TemporaryDirectory() as directory:
+        shared = RateLimiter(rate, rate, path=os.path.join(directory, "buckets"))
+        result["acquire"]["shared"] = per_call(shared, clients, iterations)
+        shared.close()
+
+    for mode in (False, True):
+        settings = Settings(rate_limit_per_second=rate if mode else 0, rate_limit_burst=rate)
+        ratelimit.get_settings = lambda settings=settings: settings
+        ratelimit._limiter = None
+        store._repository = store.InMemoryItemRepository()
+        key = "rate_limited" if mode else "default"
+        result[key] = {"get_item_per_sec": await requests_per_second(requests)}
+    result["rate_limited"]["dependency"] = await dependency(iterations)
+    ratelimit.get_settings = get_settings
+    ratelimit._limiter = None
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations, args.requests, args.clients))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Routing overhead of Starlette's linear scan versus CompiledDispatcher.
+
+Examples:
+    python -m benchmarks.bench_routing
+    python -m benchmarks.bench_routing --routes 10 100 1000 --iterations 5000
+
+For each route count, an app registers that many ``/r<i>/items/{item_id}``
+routes and the request goes straight to ``app.router`` (no middleware) with an
+endpoint that returns a prebuilt response, so the figures are mostly routing.
+Requests hit the first registered route, the last one, and no route (404).
+"""
+
+import argparse
+import asyncio
+import json
+
+from fastapi import FastAPI, Response
+
+from benchmarks.common import percentiles, time_async
+from src.dispatch import CompiledDispatcher
+
+RESPONSE = Response(b"ok")
+
+
+def build_app(routes: int, compiled: bool) -> FastAPI:
+    app = FastAPI()
+
+    async def endpoint(item_id: int) -> Response:
+        return RESPONSE
+
+    for i in range(routes):
+        app.add_api_route(f"/r{i}/items/{{item_id}}", endpoint, methods=["GET"])
+    if compiled:
+        app.router.middleware_stack = CompiledDispatcher(app.router)
+    return app
+
+
+async def request(app: FastAPI, path: str) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app.router(scope, receive, send)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    results = {}
+    for routes in args.routes:
+        targets = {
+            "first": "/r0/items/1",
+            "last": f"/r{routes - 1}/items/1",
+            "not_found": "/missing/items/1",
+        }
+        for compiled in (False, True):
+            app = build_app(routes, compiled)
+            name = f"{routes}_routes_{'compiled' if compiled else 'starlette'}"
+            results[name] = {}
+            for target, path in targets.items():
+                await time_async(lambda: request(app, path), 200)
+                samples = await time_async(lambda: request(app, path), args.iterations)
+                results[name][target] = percentiles(samples)["p50_us"]
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--routes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=3000)
+    args = parser.parse_args()
+    print(json.dumps({"p50_us": asyncio.run(run(args))}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Build time, snapshot size and query latency of the item name search index.
+
+Examples:
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --items 1000000 --queries 500
+
+Names are three words drawn from a Zipf-distributed vocabulary plus a model
+code, so a few words appear in a large share of names, as real catalogs do.
+Queries are timed against the in-memory index built by ``refresh`` and again
+after a save/load round trip, where every lookup reads the mapped snapshot.
+The last figure is the longest the event loop is held by ``search_async``
+while it answers the common-word queries.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from itertools import accumulate
+
+from benchmarks.common import GeneratedRepository, percentiles, time_sync
+from src.search import SearchIndex
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "vo", "shi", "an", "del", "po", "qua", "zor"]
+
+
+def vocabulary(size: int, rng: random.Random) -> list[str]:
+    words: set[str] = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def query_sets(words: list[str], rng: random.Random, count: int) -> dict[str, list[tuple]]:
+    # Words are ranked by frequency, so the head is common and the tail rare.
+    head, tail = words[:50], words[len(words) // 2 :]
+
+    def typo(word: str) -> str:
+        i = rng.randrange(len(word))
+        return word[:i] + word[i + 1 :]
+
+    return {
+        "exact_common": [(rng.choice(head), False, False) for _ in range(count)],
+        "exact_rare": [(rng.choice(tail), False, False) for _ in range(count)],
+        "two_words": [
+            (f"{rng.choice(head)} {rng.choice(tail)}", False, False) for _ in range(count)
+        ],
+        "prefix": [(rng.choice(tail)[:4], True, False) for _ in range(count)],
+        "fuzzy": [(typo(rng.choice(tail)), False, True) for _ in range(count)],
+    }
+
+
+def time_queries(index: SearchIndex, queries: dict[str, list[tuple]]) -> dict:
+    results = {}
+    for name, cases in queries.items():
+        it = iter(cases)
+        samples = time_sync(
+            lambda: index.search(*(lambda q, p, f: (q, 10, p, f))(*next(it))), len(cases)
+        )
+        results[name] = percentiles(samples)
+    return results
+
+
+async def loop_stall_ms(index: SearchIndex, cases: list[tuple]) -> float:
+    """Longest the event loop goes without running while search_async runs."""
+    longest = 0.0
+    running = True
+
+    async def ticker() -> None:
+        nonlocal longest
+        previous = time.perf_counter()
+        while running:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            longest = max(longest, now - previous)
+            previous = now
+
+    task = asyncio.create_task(ticker())
+    for query, prefix, fuzzy in cases:
+        await index.search_async(query, 10, prefix, fuzzy)
+    running = False
+    await task
+    return round(longest * 1e3, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    words = vocabulary(args.words, rng)
+    rng.shuffle(words)
+    cumulative = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+    names = [
+        " ".join(rng.choices(words, cum_weights=cumulative, k=3)) + f" m{rng.randrange(100_000)}"
+        for _ in range(args.items)
+    ]
+    repository = GeneratedRepository(
+        len(names), name=lambda i: names[i - 1], price=lambda i: 1.0
+    )
+    queries = query_sets(words, rng, args.queries)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    index = SearchIndex()
+    start = time.perf_counter()
+    asyncio.run(index.refresh(repository, 0.0))
+    build_s = time.perf_counter() - start
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "search.idx")
+        start = time.perf_counter()
+        index.save(path)
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = SearchIndex.load(path)
+        load_ms = (time.perf_counter() - start) * 1e3
+        print(json.dumps({
+            "items": args.items,
+            "build_s": round(build_s, 2),
+            "build_rss_growth_mib": round(rss_growth / 1024, 1),
+            "snapshot_save_s": round(save_s, 2),
+            "snapshot_mib": round(os.path.getsize(path) / 2**20, 1),
+            "snapshot_load_ms": round(load_ms, 3),
+            "query_in_memory": time_queries(index, queries),
+            "query_mapped_snapshot": time_queries(loaded, queries),
+            "exact_common_search_async_max_loop_stall_ms": asyncio.run(
+                loop_stall_ms(loaded, queries["exact_common"])
+            ),
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
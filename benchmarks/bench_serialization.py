@@ -0,0 +1,88 @@
+"""Serialization cost of ItemResponse with and without FAST_SERIALIZATION.
+
+Reports the per-object cost of FastAPI's response_model path (validate,
+convert to dict, json.dumps) versus a precompiled TypeAdapter.dump_json, and
+in-process requests/sec for POST /items and GET /items/{item_id}.
+
+Usage: python -m benchmarks.bench_serialization
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from pydantic import TypeAdapter
+
+from benchmarks.common import percentiles, time_async, time_sync
+from main import app
+from src import routing, store
+from src.config import Settings, get_settings
+from src.models import ItemResponse
+
+HEADERS = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+def response_field():
+    for route in app.routes:
+        if getattr(route, "path", None) == "/items" and "POST" in route.methods:
+            return route.response_field
+    raise RuntimeError("POST /items route not found")
+
+
+async def per_object(iterations: int) -> dict:
+    item = ItemResponse(item_id=1, name="benchmark item", price=12.5, q="query")
+    field = response_field()
+
+    async def default_path():
+        content = await serialize_response(field=field, response_content=item)
+        JSONResponse(content)
+
+    adapter = TypeAdapter(ItemResponse)
+    default = await time_async(default_path, iterations)
+    fast = time_sync(lambda: adapter.dump_json(item), iterations)
+    return {"response_model": percentiles(default), "type_adapter": percentiles(fast)}
+
+
+async def requests_per_second(requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=HEADERS
+    ) as client:
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.post("/items", json={"name": f"item{i}", "price": 1.5})
+        post_rate = requests / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/items/{i % 100 + 1}")
+        get_rate = requests / (time.perf_counter() - start)
+    return {"post_items_per_sec": round(post_rate), "get_item_per_sec": round(get_rate)}
+
+
+async def run(iterations: int, requests: int) -> dict:
+    result = {"per_object": await per_object(iterations)}
+    for mode in (False, True):
+        settings = Settings(fast_serialization=mode)
+        routing.get_settings = lambda settings=settings: settings
+        store._repository = store.InMemoryItemRepository()
+        key = "fast_serialization" if mode else "default"
+        result[key] = await requests_per_second(requests)
+    routing.get_settings = get_settings
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations, args.requests))))
+
+
+if __name__ == "__main__":
+    main()
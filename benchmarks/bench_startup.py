@@ -0,0 +1,142 @@
+"""Cold-start cost: import time per module, app construction and first response.
+
+Examples:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --top 20
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+Import times come from ``python -X importtime``. Time to first response is
+measured from launching uvicorn to the first successful response, for ``/``
+and for ``/openapi.json`` with and without a precomputed OPENAPI_CACHE_FILE.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load import _free_port
+
+PHASES = """
+import json, time
+start = time.perf_counter()
+import fastapi, pydantic
+frameworks = time.perf_counter()
+import main
+app_built = time.perf_counter()
+main.app.openapi()
+openapi = time.perf_counter()
+print(json.dumps({
+    "import_fastapi_ms": (frameworks - start) * 1e3,
+    "import_and_build_app_ms": (app_built - frameworks) * 1e3,
+    "openapi_ms": (openapi - app_built) * 1e3,
+}))
+"""
+
+
+def import_times(top: int) -> dict:
+    """Slowest imports made by main (with everything under them) and src.* own time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True,
+    )
+    direct, own = [], {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cumulative, name = line.split("|")
+        self_us, cumulative_us = int(head.rsplit(":", 1)[1]), int(cumulative)
+        module = name.strip()
+        # Imports are indented two spaces per level; main's own are at level 1.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            direct.append((cumulative_us, module))
+        if module == "main" or module.startswith("src."):
+            own[module] = round(self_us / 1e3, 2)
+    direct.sort(reverse=True)
+    return {
+        "slowest_imports_by_main_ms": {m: round(us / 1e3, 2) for us, m in direct[:top]},
+        "own_modules_self_ms": dict(sorted(own.items(), key=lambda kv: -kv[1])),
+    }
+
+
+def phases(runs: int) -> dict:
+    samples = [
+        json.loads(subprocess.run(
+            [sys.executable, "-c", PHASES], capture_output=True, text=True, check=True
+        ).stdout)
+        for _ in range(runs)
+    ]
+    return {
+        key: round(statistics.median(s[key] for s in samples), 2) for key in samples[0]
+    }
+
+
+def first_response_ms(path: str, env: dict) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                try:
+                    client.get(path).raise_for_status()
+                    return (time.perf_counter() - start) * 1e3
+                except httpx.TransportError:
+                    if time.perf_counter() - start > 30:
+                        raise RuntimeError("uvicorn did not start")
+                    time.sleep(0.002)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def time_to_first_response(runs: int) -> dict:
+    env = dict(os.environ)
+    env.pop("OPENAPI_CACHE_FILE", None)
+    with tempfile.TemporaryDirectory() as directory:
+        cached_env = dict(env, OPENAPI_CACHE_FILE=os.path.join(directory, "openapi.json"))
+        subprocess.run(
+            [sys.executable, "-m", "src.openapi", "--output",
+             cached_env["OPENAPI_CACHE_FILE"]],
+            env=env, check=True, capture_output=True,
+        )
+        variants = (
+            ("root", "/", env),
+            ("openapi", "/openapi.json", env),
+            ("openapi_cached_file", "/openapi.json", cached_env),
+        )
+        samples: dict[str, list[float]] = {name: [] for name, _, _ in variants}
+        # Interleaved so that disk cache warm-up does not favour any variant.
+        for _ in range(runs):
+            for name, path, run_env in variants:
+                samples[name].append(first_response_ms(path, run_env))
+    return {name + "_ms": round(statistics.median(s), 1) for name, s in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per figure")
+    parser.add_argument("--top", type=int, default=10, help="top-level imports to list")
+    args = parser.parse_args()
+    print(json.dumps({
+        "imports": import_times(args.top),
+        "phases": phases(args.runs),
+        "time_to_first_response": time_to_first_response(args.runs),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
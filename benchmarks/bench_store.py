@@ -0,0 +1,75 @@
+"""Read/write/list latency of the item repositories with a large preloaded catalog.
+
+Usage: python -m benchmarks.bench_store --items 1000000 --backend memory sqlite
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import percentiles, time_async
+from src.models import Item
+from src.store import InMemoryItemRepository, SQLiteItemRepository, StoredItem
+
+
+def preload_memory(repository: InMemoryItemRepository, count: int) -> None:
+    for item_id in range(1, count + 1):
+        repository._index(StoredItem(item_id, f"item{item_id}", 1.0))
+    repository._last_id = count
+
+
+def preload_sqlite(repository: SQLiteItemRepository, count: int) -> None:
+    rows = ((f"item{i}", 1.0) for i in range(1, count + 1))
+    with repository._connection() as conn:
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO items (name, price) VALUES (?, ?)", rows)
+        conn.execute("COMMIT")
+
+
+async def run(backend: str, items: int, iterations: int, workdir: Path) -> dict:
+    if backend == "memory":
+        repository = InMemoryItemRepository()
+        preload_memory(repository, items)
+    else:
+        repository = SQLiteItemRepository(str(workdir / "bench.db"))
+        preload_sqlite(repository, items)
+
+    ids = [random.randint(1, items) for _ in range(iterations)]
+    reads = iter(ids)
+    read_samples = await time_async(lambda: repository.get(next(reads)), iterations)
+    new_item = Item(name="bench", price=9.99)
+    page_iterations = max(iterations // 10, 1)
+    shallow = await time_async(lambda: repository.list_items(0, 100), page_iterations)
+    deep = await time_async(
+        lambda: repository.list_items(items - 200, 100), page_iterations
+    )
+    write_samples = await time_async(lambda: repository.add(new_item), iterations)
+    repository.close()
+    return {
+        "backend": backend,
+        "items": items,
+        "read": percentiles(read_samples),
+        "write": percentiles(write_samples),
+        "list_first_page": percentiles(shallow),
+        "list_last_page": percentiles(deep),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=10_000)
+    parser.add_argument("--backend", nargs="+", default=["memory", "sqlite"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backend:
+            result = asyncio.run(run(backend, args.items, args.iterations, Path(tmp)))
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
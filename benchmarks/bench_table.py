@@ -0,0 +1,106 @@
+"""Memory per item and lookup latency: columnar ItemTable vs a dict of models.
+
+Usage: python -m benchmarks.bench_table --items 10000000 --skip-models
+
+Memory is measured with tracemalloc as the growth while loading each store, so
+it includes every object the store keeps alive. The columnar figures are for
+the whole in-memory repository (table plus price and name indexes) and for the
+table alone.
+
+The dict of models takes about 640 bytes per item, so at 10M items it needs
+more than 6 GB on top of tracemalloc's own overhead. ``--skip-models`` measures
+only the columnar table for runs too large for the baseline.
+"""
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+
+from benchmarks.common import percentiles, time_sync
+from src.models import ItemResponse
+from src.store import InMemoryItemRepository, StoredItem
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def build_models(items: int) -> dict[int, ItemResponse]:
+    return {
+        i: ItemResponse(item_id=i, name=f"item{i}", price=float(i % 1000) + 0.5)
+        for i in range(1, items + 1)
+    }
+
+
+def build_table(items: int) -> InMemoryItemRepository:
+    repository = InMemoryItemRepository()
+    for i in range(1, items + 1):
+        repository._index(StoredItem(i, f"item{i}", float(i % 1000) + 0.5))
+    repository._last_id = items
+    return repository
+
+
+def measure_models(items: int, ids: list[int]) -> dict:
+    models, models_bytes = traced(lambda: build_models(items))
+    lookups = iter(ids)
+    model_get = time_sync(lambda: models.get(next(lookups)), len(ids))
+    lookups = iter(ids)
+    model_json = time_sync(lambda: models[next(lookups)].model_dump_json(), len(ids))
+    return {
+        "bytes_per_item": round(models_bytes / items, 1),
+        "lookup": percentiles(model_get),
+        "lookup_and_serialize": percentiles(model_json),
+    }
+
+
+def measure_columnar(items: int, ids: list[int]) -> dict:
+    repository, repository_bytes = traced(lambda: build_table(items))
+    table = repository._table
+    lookups = iter(ids)
+    table_get = time_sync(lambda: table.row(table.find(next(lookups))), len(ids))
+
+    def table_json() -> bytes:
+        stored = table.row(table.find(next(lookups)))
+        return ItemResponse.model_construct(
+            item_id=stored.item_id, name=stored.name, price=stored.price
+        ).model_dump_json()
+
+    lookups = iter(ids)
+    table_json_samples = time_sync(table_json, len(ids))
+    return {
+        "bytes_per_item": round(repository_bytes / items, 1),
+        "table_bytes_per_item": round(table.nbytes / items, 1),
+        "lookup": percentiles(table_get),
+        "lookup_and_serialize": percentiles(table_json_samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument(
+        "--skip-models", action="store_true", help="measure only the columnar table"
+    )
+    args = parser.parse_args()
+
+    ids = [random.randint(1, args.items) for _ in range(args.iterations)]
+    results: dict = {"items": args.items}
+    if not args.skip_models:
+        # Measured in its own call so the models are freed before the table loads.
+        results["dict_of_models"] = measure_models(args.items, ids)
+        gc.collect()
+    results["columnar"] = measure_columnar(args.items, ids)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Request body validation cost with and without RAW_BODY_VALIDATION.
+
+Reports the per-body cost of FastAPI's default path (json.loads to a dict,
+then validate into Item) versus Item.model_validate_json on the raw bytes, for
+valid and invalid payloads, and in-process requests/sec for POST /items.
+
+Usage: python -m benchmarks.bench_validation
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from pydantic import ValidationError
+
+from benchmarks.common import percentiles, time_sync
+from main import app
+from src import routing, store
+from src.config import Settings, get_settings
+from src.models import Item
+
+HEADERS = {"Authorization": "Bearer mocked-jwt-token"}
+
+PAYLOADS = {
+    "valid": b'{"name": "benchmark item", "price": 12.5}',
+    "invalid": b'{"name": "", "price": -1}',
+}
+
+
+def dict_path(body: bytes) -> None:
+    try:
+        Item.model_validate(json.loads(body))
+    except ValidationError:
+        pass
+
+
+def raw_path(body: bytes) -> None:
+    try:
+        Item.model_validate_json(body)
+    except ValidationError:
+        pass
+
+
+def per_body(iterations: int) -> dict:
+    return {
+        name: {
+            "dict": percentiles(time_sync(lambda: dict_path(body), iterations)),
+            "raw": percentiles(time_sync(lambda: raw_path(body), iterations)),
+        }
+        for name, body in PAYLOADS.items()
+    }
+
+
+async def requests_per_second(requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=HEADERS
+    ) as client:
+        rates = {}
+        for name, body in PAYLOADS.items():
+            start = time.perf_counter()
+            for _ in range(requests):
+                await client.post(
+                    "/items", content=body, headers={"Content-Type": "application/json"}
+                )
+            rates[f"post_{name}_per_sec"] = round(
+                requests / (time.perf_counter() - start)
+            )
+    return rates
+
+
+async def run(iterations: int, requests: int) -> dict:
+    result = {"per_body": per_body(iterations)}
+    for mode in (False, True):
+        settings = Settings(raw_body_validation=mode)
+        routing.get_settings = lambda settings=settings: settings
+        store._repository = store.InMemoryItemRepository()
+        key = "raw_body_validation" if mode else "default"
+        result[key] = await requests_per_second(requests)
+    routing.get_settings = get_settings
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations, args.requests))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Throughput of the multi-process server (src.server) from 1 to N workers.
+
+Examples:
+    python -m benchmarks.bench_workers --max-workers 8 --requests 20000
+    python -m benchmarks.bench_workers --workers 1 2 4 --scenario post_item
+
+Each worker count gets a fresh SQLite database and its own server. Load comes
+from several client processes so the load generator is not the bottleneck.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load import AUTH, SCENARIOS, SEED_ITEMS, _free_port, run_scenario
+
+
+def _client(url: str, scenario_name: str, requests: int, concurrency: int) -> dict:
+    scenario = next(s for s in SCENARIOS if s.name == scenario_name)
+
+    async def run() -> dict:
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+            await client.get("/")
+            started = time.time()
+            result = await run_scenario(client, scenario, requests, concurrency)
+            return {**result, "started": started, "finished": time.time()}
+
+    return asyncio.run(run())
+
+
+@contextlib.contextmanager
+def server(workers: int, directory: str):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        STORE_BACKEND="sqlite",
+        SQLITE_PATH=os.path.join(directory, f"items-{workers}.db"),
+        METRICS_DIR=os.path.join(directory, f"metrics-{workers}"),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.server", "--workers", str(workers),
+         "--port", str(port)],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=url) as probe:
+            for _ in range(300):
+                with contextlib.suppress(httpx.TransportError):
+                    probe.get("/")
+                    break
+                time.sleep(0.1)
+            else:
+                raise RuntimeError("server did not start")
+            # Give the remaining workers time to join the accept group.
+            time.sleep(1 + 0.2 * workers)
+            for i in range(SEED_ITEMS):
+                payload = {"name": f"seed{i}", "price": 1.0 + i}
+                probe.post("/items", json=payload, headers=AUTH).raise_for_status()
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure(
+    url: str, scenario: str, requests: int, clients: int, concurrency: int
+) -> dict:
+    context = multiprocessing.get_context("spawn")
+    share = requests // clients
+    with context.Pool(clients) as pool:
+        results = pool.starmap(
+            _client, [(url, scenario, share, concurrency)] * clients
+        )
+    # Wall-clock window from the first client starting to the last finishing,
+    # which excludes client process startup.
+    elapsed = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    return {
+        "throughput_rps": round(share * clients / elapsed, 1),
+        "errors": sum(r["errors"] for r in results),
+        "p99_us": max(r["p99_us"] for r in results),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--workers", type=int, nargs="+", help="explicit worker counts")
+    parser.add_argument("--scenario", default="get_item")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--clients", type=int, default=4, help="client processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="per client")
+    args = parser.parse_args()
+
+    counts = args.workers or sorted(
+        {1, *(2**i for i in range(1, args.max_workers.bit_length())), args.max_workers}
+    )
+    print(f"{'workers':>8} {'rps':>10} {'speedup':>8} {'p99_us':>10} {'errors':>7}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in counts:
+            with server(workers, directory) as url:
+                result = measure(
+                    url, args.scenario, args.requests, args.clients, args.concurrency
+                )
+            baseline = baseline or result["throughput_rps"]
+            print(
+                f"{workers:>8} {result['throughput_rps']:>10} "
+                f"{result['throughput_rps'] / baseline:>8.2f} "
+                f"{result['p99_us']:>10} {result['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
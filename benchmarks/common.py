@@ -0,0 +1,85 @@
+import statistics
+import time
+from typing import Awaitable, Callable, Iterable
+
+from src.store import ItemFilter, ItemRepository, StoredItem
+
+
+def percentiles(samples: Iterable[float]) -> dict[str, float]:
+    """Summarize latency samples (seconds) as p50/p95/p99 in microseconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50_us": 0.0, "p95_us": 0.0, "p99_us": 0.0}
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+    return {
+        "p50_us": round(cuts[49] * 1e6, 2),
+        "p95_us": round(cuts[94] * 1e6, 2),
+        "p99_us": round(cuts[98] * 1e6, 2),
+    }
+
+
+async def time_async(fn: Callable[[], Awaitable[object]], iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_sync(fn: Callable[[], object], iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class GeneratedRepository(ItemRepository):
+    """Read-only catalog of ``size`` items generated on demand from their IDs.
+
+    Only ``list_items`` and ``count`` are implemented, which is all that exports
+    and search index builds read, so no catalog is held in memory.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        name: Callable[[int], str] = "item{}".format,
+        price: Callable[[int], float] = lambda i: float(i % 1000) + 0.5,
+    ) -> None:
+        self.size = size
+        self.name = name
+        self.price = price
+
+    async def list_items(
+        self, after: int, limit: int, filters: ItemFilter = ItemFilter()
+    ) -> list[StoredItem]:
+        stop = min(after + limit, self.size)
+        name, price = self.name, self.price
+        return [StoredItem(i, name(i), price(i)) for i in range(after + 1, stop + 1)]
+
+    async def count(self) -> int:
+        return self.size
+
+    async def get(self, item_id):
+        raise NotImplementedError
+
+    async def get_many(self, item_ids):
+        raise NotImplementedError
+
+    async def add(self, item):
+        raise NotImplementedError
+
+    async def add_many(self, items):
+        raise NotImplementedError
+
+    async def reserve_ids(self, count):
+        raise NotImplementedError
+
+    async def insert(self, items):
+        raise NotImplementedError
+
+    async def price_stats(self, name_prefix=None, buckets=10):
+        raise NotImplementedError
@@ -0,0 +1,197 @@
+"""Load test for main:app, in-process over ASGI or against a local uvicorn.
+
+Examples:
+    python -m benchmarks.load --concurrency 32 --requests 2000 --output out.json
+    python -m benchmarks.load --uvicorn --concurrency 64
+    python -m benchmarks.load --url http://127.0.0.1:8000
+    python -m benchmarks.load --baseline baseline.json --threshold 0.1
+
+With --baseline, the run exits with status 1 when any scenario's throughput
+drops, or its p99 latency rises, by more than --threshold (a fraction).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+import httpx
+
+from benchmarks.common import percentiles
+
+TOKEN = "mocked-jwt-token"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+SEED_ITEMS = 100
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    path: str
+    expected_status: int
+    headers: dict | None = None
+    json: dict | None = None
+
+
+SCENARIOS = [
+    Scenario("root", "GET", "/", 200),
+    Scenario("get_item", "GET", "/items/{n}", 200, AUTH),
+    Scenario("get_item_q", "GET", "/items/{n}?q=search", 200, AUTH),
+    Scenario("post_item", "POST", "/items", 200, AUTH, {"name": "load", "price": 9.5}),
+    Scenario("auth_missing", "GET", "/items/1", 403),
+    Scenario("auth_invalid", "GET", "/items/1", 401, {"Authorization": "Bearer bad"}),
+]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int
+) -> dict:
+    samples: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for n in counter:
+            path = scenario.path.format(n=n % SEED_ITEMS + 1)
+            start = time.perf_counter()
+            response = await client.request(
+                scenario.method, path, headers=scenario.headers, json=scenario.json
+            )
+            samples.append(time.perf_counter() - start)
+            if response.status_code != scenario.expected_status:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        **percentiles(samples),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_server() -> AsyncIterator[str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning"],
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=url) as probe:
+            for _ in range(100):
+                with contextlib.suppress(httpx.TransportError):
+                    await probe.get("/")
+                    break
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@contextlib.asynccontextmanager
+async def make_client(args: argparse.Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+            yield client
+    elif args.uvicorn:
+        async with uvicorn_server() as url:
+            async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+                yield client
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            yield client
+
+
+async def run(args: argparse.Namespace) -> dict:
+    async with make_client(args) as client:
+        for i in range(SEED_ITEMS):
+            payload = {"name": f"seed{i}", "price": 1.0 + i}
+            response = await client.post("/items", json=payload, headers=AUTH)
+            response.raise_for_status()
+        selected = [s for s in SCENARIOS if not args.only or s.name in args.only]
+        results = {}
+        for scenario in selected:
+            results[scenario.name] = await run_scenario(
+                client, scenario, args.requests, args.concurrency
+            )
+    target = args.url or ("uvicorn" if args.uvicorn else "asgi")
+    return {"target": target, "concurrency": args.concurrency, "scenarios": results}
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a description of every regression beyond ``threshold``."""
+    regressions = []
+    for name, current in result["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']} rps "
+                f"< baseline {previous['throughput_rps']} rps"
+            )
+        if current["p99_us"] > previous["p99_us"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p99 {current['p99_us']} us > baseline {previous['p99_us']} us"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--only", nargs="+", help="scenario names to run")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="benchmark an already running server")
+    target.add_argument("--uvicorn", action="store_true", help="start a local uvicorn")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from src.compression import CompressionMiddleware
+from src.dispatch import use_compiled_dispatch
+from src.metrics import MetricsMiddleware
+from src.openapi import use_cached_schema
 from src.router import router
+from src.search import get_search_index
+from src.store import shutdown_repository
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Map the search snapshot now rather than on the first search.
+    get_search_index()
+    yield
+    await shutdown_repository()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.include_router(router)
+use_compiled_dispatch(app)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+use_cached_schema(app)
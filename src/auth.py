@@ -1,11 +1,282 @@
-from fastapi import Depends, HTTPException
+import hashlib
+import hmac
+import time
+from typing import Any
+
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Scope
+
+from .cache import LRUCache, SynchronizedLRUCache
+from .config import Settings, get_settings
+from .metrics import current_timing
+from .tokens import InvalidTokenError, KeySet, decode_jwt
 
 security = HTTPBearer()
 
 
+def _expires_at(claims: dict[str, Any], now: float, ttl: float, leeway: float) -> float:
+    """When a verification of ``claims`` stops being reusable."""
+    expires_at = now + ttl
+    if claims.get("exp") is not None:
+        expires_at = min(expires_at, claims["exp"] + leeway)
+    return expires_at
+
+
+class StaticTokenVerifier:
+    """Accepts a single fixed token; intended for local development and tests."""
+
+    leeway = 0.0
+
+    def __init__(self, token: str) -> None:
+        self.token = token
+
+    def key_version(self) -> int:
+        return 0
+
+    def verify(self, token: str) -> dict[str, Any]:
+        if token != self.token:
+            raise InvalidTokenError("Invalid token")
+        return {"sub": "static"}
+
+
+class JWTVerifier:
+    """Verifies JWTs and remembers the claims of recently verified tokens.
+
+    Cache entries are keyed by the SHA-256 of the token and expire at the
+    token's ``exp`` (or after ``cache_ttl`` seconds, whichever comes first),
+    so a cached token is never accepted past its expiry. The cache is cleared
+    whenever the key set is reloaded, and entries remember the key set version
+    they were verified with, so a verification that finishes after a reload
+    is not reused either.
+    """
+
+    def __init__(
+        self,
+        keys: KeySet,
+        audience: str | None = None,
+        leeway: float = 0.0,
+        cache_size: int = 10000,
+        cache_ttl: float = 300.0,
+    ) -> None:
+        self.keys = keys
+        self.audience = audience
+        self.leeway = leeway
+        self.cache_ttl = cache_ttl
+        # Verification runs in threadpool threads, so the cache is locked.
+        self.cache: SynchronizedLRUCache[bytes, tuple[dict[str, Any], int]] = (
+            SynchronizedLRUCache(cache_size, clock=time.time)
+        )
+        self._keys_version = keys.version
+
+    def key_version(self) -> int:
+        """Version of the key set, reloading it first if the file changed."""
+        self.keys.refresh()
+        if self.keys.version != self._keys_version:
+            self.cache.clear()
+            self._keys_version = self.keys.version
+        return self._keys_version
+
+    def verify(self, token: str) -> dict[str, Any]:
+        version = self.key_version()
+
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self.cache.get(key)
+        if cached is not None and cached[1] == version:
+            return cached[0]
+
+        now = time.time()
+        claims = decode_jwt(token, self.keys, self.audience, self.leeway, now)
+        self.cache.set(
+            key,
+            (claims, version),
+            _expires_at(claims, now, self.cache_ttl, self.leeway),
+        )
+        return claims
+
+
+def create_verifier(settings: Settings) -> StaticTokenVerifier | JWTVerifier:
+    if settings.auth_mode == "static":
+        return StaticTokenVerifier(settings.auth_static_token)
+    if settings.auth_mode == "jwt":
+        return JWTVerifier(
+            KeySet(settings.jwt_keys_file),
+            audience=settings.jwt_audience or None,
+            leeway=settings.jwt_leeway_seconds,
+            cache_size=settings.token_cache_size,
+            cache_ttl=settings.token_cache_ttl_seconds,
+        )
+    raise ValueError(f"Unknown auth mode: {settings.auth_mode}")
+
+
+_verifier: StaticTokenVerifier | JWTVerifier | None = None
+
+
+def get_verifier() -> StaticTokenVerifier | JWTVerifier:
+    global _verifier
+    if _verifier is None:
+        _verifier = create_verifier(get_settings())
+    return _verifier
+
+
+class AuthSessions:
+    """Principals verified on a connection, reused by its later requests.
+
+    HTTP scopes carry no per-connection state, so a connection is identified
+    by its client and server addresses, which no other open connection shares
+    (HTTP/2 streams of one connection share them). A session only matches the
+    token it was verified for, so a later connection that reuses the
+    addresses gains nothing it would not get by presenting the token anyway.
+
+    Sessions end when the token expires (``exp`` plus leeway), after ``ttl``
+    seconds, or when the verifier's key set is reloaded.
+    """
+
+    def __init__(self, size: int, ttl: float, clock=time.time) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self.cache: LRUCache[tuple, tuple[bytes, dict[str, Any], int]] = LRUCache(
+            size, clock=clock
+        )
+
+    @staticmethod
+    def connection(scope: Scope) -> tuple | None:
+        client, server = scope.get("client"), scope.get("server")
+        if client is None or server is None:
+            return None
+        return tuple(client), tuple(server)
+
+    def get(self, scope: Scope, token: str, key_version: int) -> dict[str, Any] | None:
+        connection = self.connection(scope)
+        if connection is None:
+            return None
+        session = self.cache.get(connection)
+        if session is None:
+            return None
+        session_token, claims, session_version = session
+        if session_version != key_version or not hmac.compare_digest(
+            session_token, token.encode()
+        ):
+            return None
+        return claims
+
+    def put(
+        self,
+        scope: Scope,
+        token: str,
+        claims: dict[str, Any],
+        key_version: int,
+        leeway: float = 0.0,
+    ) -> None:
+        connection = self.connection(scope)
+        if connection is None:
+            return
+        expires_at = _expires_at(claims, self._clock(), self.ttl, leeway)
+        self.cache.set(connection, (token.encode(), claims, key_version), expires_at)
+
+
+_sessions: AuthSessions | None = None
+
+
+def get_auth_sessions() -> AuthSessions | None:
+    """The process-wide session table, or None unless AUTH_SESSIONS is on."""
+    global _sessions
+    if _sessions is None:
+        settings = get_settings()
+        if not settings.auth_sessions:
+            return None
+        _sessions = AuthSessions(
+            settings.auth_session_size, settings.token_cache_ttl_seconds
+        )
+    return _sessions
+
+
+def _verify(token: str) -> dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        return get_verifier().verify(token)
+    except InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    finally:
+        timing = current_timing.get()
+        if timing is not None:
+            timing.auth += time.perf_counter() - start
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    if token != "mocked-jwt-token":
-        raise HTTPException(status_code=401, detail="Invalid token")
+    _verify(token)
     return token
+
+
+# Scope key under which verified_claims keeps its result for the request.
+_CLAIMS_SCOPE_KEY = "auth.claims"
+
+
+async def verified_claims(request: Request, token: str) -> dict[str, Any]:
+    """Claims of ``token``, from the connection's session or verified in the threadpool.
+
+    The outcome is kept on the request, so the rate limit check and the route's
+    own authentication verify a token once per request. Raises 401 for an
+    invalid token.
+    """
+    scope = request.scope
+    previous = scope.get(_CLAIMS_SCOPE_KEY)
+    if previous is not None and previous[0] == token:
+        if previous[1] is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return previous[1]
+    try:
+        claims = await _session_or_verify(request, token)
+    except HTTPException:
+        scope[_CLAIMS_SCOPE_KEY] = (token, None)
+        raise
+    scope[_CLAIMS_SCOPE_KEY] = (token, claims)
+    return claims
+
+
+async def _session_or_verify(request: Request, token: str) -> dict[str, Any]:
+    sessions = get_auth_sessions()
+    if sessions is None:
+        return await run_in_threadpool(_verify, token)
+    verifier = get_verifier()
+    start = time.perf_counter()
+    key_version = verifier.key_version()
+    claims = sessions.get(request.scope, token, key_version)
+    if claims is not None:
+        timing = current_timing.get()
+        if timing is not None:
+            timing.auth += time.perf_counter() - start
+        return claims
+    claims = await run_in_threadpool(_verify, token)
+    sessions.put(request.scope, token, claims, key_version, verifier.leeway)
+    return claims
+
+
+async def authenticate(
+    request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> str:
+    """``verify_token`` for routes, reusing the connection's session if enabled.
+
+    A session hit answers on the event loop. Otherwise the token is verified
+    in the threadpool, where FastAPI runs the synchronous ``verify_token``, and
+    with AUTH_SESSIONS on the result is kept for the connection's next request.
+    """
+    token = credentials.credentials
+    await verified_claims(request, token)
+    return token
+
+
+async def require_admin(
+    request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict[str, Any]:
+    """``authenticate`` for admin routes: the token must carry the admin claim.
+
+    The claim named by AUTH_ADMIN_CLAIM must be ``true``. The static
+    development token carries no claims, so admin routes need JWT auth.
+    """
+    claims = await verified_claims(request, credentials.credentials)
+    if claims.get(get_settings().auth_admin_claim) is not True:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return claims
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded LRU cache with optional per-entry expiry.
+
+    Capacity is measured by ``weigh`` (one unit per entry by default), so the
+    same class can bound either the number of entries or their total size.
+    Expired entries are dropped lazily when they are looked up or evicted.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        weigh: Callable[[V], int] = lambda value: 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self._weigh = weigh
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[V, float | None, int]] = OrderedDict()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: K, default=None, count: bool = True):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at, _ = entry
+            if expires_at is None or expires_at > self._clock():
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            self.pop(key)
+        if count:
+            self.misses += 1
+        return default
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        weight = self._weigh(value)
+        self.pop(key)
+        if weight > self.maxsize:
+            return
+        self._entries[key] = (value, expires_at, weight)
+        self.weight += weight
+        while self.weight > self.maxsize:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.weight -= evicted
+            self.evictions += 1
+
+    def pop(self, key: K, default=None):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self.weight -= entry[2]
+        return entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.weight = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "weight": self.weight,
+        }
+
+
+class SynchronizedLRUCache(LRUCache[K, V]):
+    """``LRUCache`` that may be shared between threads.
+
+    ``LRUCache`` reorders its ``OrderedDict`` and adjusts ``weight`` on every
+    call without locking, which is only safe on one thread. Here every call
+    holds a lock, for caches used from threadpool threads as well as the
+    event loop.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Reentrant because get() drops expired entries through pop().
+        self._lock = threading.RLock()
+
+    def get(self, key: K, default=None, count: bool = True):
+        with self._lock:
+            return super().get(key, default, count)
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        with self._lock:
+            super().set(key, value, expires_at)
+
+    def pop(self, key: K, default=None):
+        with self._lock:
+            return super().pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return super().stats()
@@ -0,0 +1,222 @@
+import importlib.util
+import zlib
+from functools import lru_cache
+from typing import Callable, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import get_settings
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/ndjson",
+)
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        self._z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        import brotli
+
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self) -> None:
+        import zstandard
+
+        self._c = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+# Optional codecs are offered when installed but only imported on first use,
+# keeping their import cost out of startup.
+COMPRESSORS: dict[str, Callable[[], Compressor]] = {"gzip": _Gzip}
+if importlib.util.find_spec("brotli") is not None:
+    COMPRESSORS["br"] = _Brotli
+if importlib.util.find_spec("zstandard") is not None:
+    COMPRESSORS["zstd"] = _Zstd
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+@lru_cache
+def available_encodings(preference: str) -> tuple[str, ...]:
+    """Encodings from a comma-separated preference list that are installed."""
+    names = (name.strip().lower() for name in preference.split(","))
+    return tuple(name for name in names if name in COMPRESSORS)
+
+
+def choose_encoding(accept_encoding: str | None, encodings: tuple[str, ...]) -> str | None:
+    """Pick the encoding the client accepts with the highest q-value.
+
+    Ties go to the earlier entry of ``encodings``. Returns None when the
+    client accepts none of them, so the response is sent uncompressed.
+    """
+    if not accept_encoding or not encodings:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        name = name.strip().lower()
+        weights["gzip" if name == "x-gzip" else name] = q
+    best, best_q = None, 0.0
+    wildcard = weights.get("*", 0.0)
+    for encoding in encodings:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """The configured encoding to use for a client's ``Accept-Encoding``, or None."""
+    encodings = available_encodings(get_settings().compression_encodings)
+    return choose_encoding(accept_encoding, encodings)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Distinct entity tag for the ``encoding`` representation of ``etag``."""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text and JSON responses.
+
+    The encoding is negotiated from ``Accept-Encoding`` among
+    ``COMPRESSION_ENCODINGS``. Complete bodies under ``COMPRESSION_MIN_BYTES``
+    are sent as they are; streamed bodies are compressed as they go, each
+    chunk flushed so clients see it without waiting for the end. Responses
+    that already carry a ``Content-Encoding``, such as precompressed cached
+    responses, pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        min_bytes = get_settings().compression_min_bytes
+        start: Message | None = None
+        compressor: Compressor | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if compressor is not None:
+                body = compressor.compress(message.get("body", b""))
+                if message.get("more_body", False):
+                    body += compressor.flush()
+                else:
+                    body += compressor.finish()
+                await send({**message, "body": body})
+                return
+            if start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(scope=response_start)
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if "content-encoding" in headers or not _compressible(
+                headers.get("content-type", "")
+            ):
+                await send(response_start)
+                await send(message)
+                return
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            encoding = None
+            if more_body or len(body) >= min_bytes:
+                encoding = negotiate(accept_encoding)
+            if encoding is None:
+                await send(response_start)
+                await send(message)
+                return
+            headers["Content-Encoding"] = encoding
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            if more_body:
+                del headers["Content-Length"]
+                compressor = COMPRESSORS[encoding]()
+                body = compressor.compress(body) + compressor.flush()
+            else:
+                body = compress(encoding, body)
+                headers["Content-Length"] = str(len(body))
+            await send(response_start)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,69 @@
+import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime settings, overridable through upper-cased environment variables."""
+
+    store_backend: str = "memory"
+    sqlite_path: str = "items.db"
+    sqlite_pool_size: int = 4
+    price_stats_refresh_seconds: float = 5.0
+    bulk_batch_size: int = 1000
+    bulk_max_line_bytes: int = 65536
+    batch_get_limit: int = 1000
+    export_batch_size: int = 1000
+    search_snapshot: str = ""
+    search_sync_seconds: float = 1.0
+    auth_mode: str = "static"
+    auth_static_token: str = "mocked-jwt-token"
+    jwt_keys_file: str = "jwks.json"
+    jwt_audience: str = ""
+    jwt_leeway_seconds: float = 0.0
+    token_cache_size: int = 10000
+    token_cache_ttl_seconds: float = 300.0
+    auth_sessions: bool = False
+    auth_session_size: int = 10000
+    response_cache_bytes: int = 16 * 1024 * 1024
+    idempotency_cache_bytes: int = 8 * 1024 * 1024
+    idempotency_ttl_seconds: float = 86400.0
+    compression_encodings: str = "zstd,br,gzip"
+    compression_min_bytes: int = 1024
+    openapi_cache_file: str = ""
+    compiled_routing: bool = False
+    fast_serialization: bool = False
+    raw_body_validation: bool = False
+    metrics_dir: str = ""
+    slow_request_seconds: float = 0.0
+    slow_request_log_size: int = 100
+    auth_admin_claim: str = "admin"
+    write_behind: bool = False
+    write_behind_durability: str = "commit"
+    write_behind_queue_size: int = 10000
+    write_behind_batch_size: int = 500
+    write_behind_flush_seconds: float = 0.05
+    single_flight_timeout_seconds: float = 5.0
+    rate_limit_per_second: float = 0.0
+    rate_limit_burst: float = 20.0
+    rate_limit_slots: int = 65536
+    rate_limit_file: str = ""
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        values = {}
+        for field in fields(cls):
+            raw = os.environ.get(field.name.upper())
+            if raw is None:
+                continue
+            if field.type is bool:
+                values[field.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                values[field.name] = field.type(raw)
+        return cls(**values)
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings.from_env()
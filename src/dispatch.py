@@ -0,0 +1,171 @@
+"""Route lookup through a tree of path segments instead of a linear regex scan.
+
+Starlette's router tries every route's regex in registration order, so the
+cost of finding a route grows with the number of routes. ``CompiledDispatcher``
+files each route under its literal path segments, with ``{param}`` segments as
+wildcards, and only tries the routes whose segments fit the request path.
+
+Those candidates are tried with their own ``matches`` in registration order, so
+path parameter conversion, the first match winning and 405 for a path that
+matches with another method all behave as before. A request no candidate
+matches gets the router's trailing slash redirect or its 404, with the
+redirect target looked up in the tree as well.
+"""
+
+from fastapi import FastAPI
+from fastapi.routing import APIRouter
+from starlette.datastructures import URL
+from starlette.responses import RedirectResponse
+from starlette.routing import PARAM_REGEX, BaseRoute, Match, Route, WebSocketRoute
+from starlette.types import Receive, Scope, Send
+
+from .config import get_settings
+
+
+def _route_path(scope: Scope) -> str:
+    """The request path below ``root_path``, as Starlette's routes match it.
+
+    Mirrors Starlette's private ``get_route_path`` so the dispatcher does not
+    depend on where that helper lives.
+    """
+    path: str = scope["path"]
+    root_path = scope.get("root_path", "")
+    if not root_path or not path.startswith(root_path):
+        return path
+    if path == root_path:
+        return ""
+    if path[len(root_path)] == "/":
+        return path[len(root_path) :]
+    return path
+
+
+class _Node:
+    __slots__ = ("literals", "param", "routes", "catch_all")
+
+    def __init__(self) -> None:
+        self.literals: dict[str, _Node] = {}
+        self.param: _Node | None = None
+        # Routes whose path ends at this node, and routes with a ``{name:path}``
+        # parameter starting here, which may match any remainder.
+        self.routes: list[int] = []
+        self.catch_all: list[int] = []
+
+
+def _segments(path: str) -> list[str]:
+    return path.split("/")[1:]
+
+
+class CompiledDispatcher:
+    """ASGI app dispatching HTTP requests for ``router`` through a segment tree.
+
+    The tree is built from ``router.routes`` when created and rebuilt if routes
+    are added later. Lifespan and WebSocket scopes go straight to the router.
+    """
+
+    def __init__(self, router: APIRouter) -> None:
+        self.router = router
+        self._build()
+
+    def _build(self) -> None:
+        self._routes: list[BaseRoute] = list(self.router.routes)
+        self._root = _Node()
+        # Mounts, hosts and other route types are tried for every request.
+        self._always: list[int] = []
+        for index, route in enumerate(self._routes):
+            if isinstance(route, WebSocketRoute):
+                continue
+            if not isinstance(route, Route) or not route.path.startswith("/"):
+                self._always.append(index)
+                continue
+            self._insert(index, route.path)
+
+    def _insert(self, index: int, path: str) -> None:
+        node = self._root
+        for segment in _segments(path):
+            if "{" not in segment:
+                node = node.literals.setdefault(segment, _Node())
+                continue
+            if any(kind == ":path" for _, kind in PARAM_REGEX.findall(segment)):
+                node.catch_all.append(index)
+                return
+            if node.param is None:
+                node.param = _Node()
+            node = node.param
+        node.routes.append(index)
+
+    def candidates(self, path: str) -> list[BaseRoute]:
+        """Routes that may match ``path``, in registration order."""
+        if not path.startswith("/"):
+            return self._routes
+        found = list(self._always)
+        segments = _segments(path)
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            found += node.catch_all
+            if depth == len(segments):
+                found += node.routes
+                continue
+            child = node.literals.get(segments[depth])
+            if child is not None:
+                stack.append((child, depth + 1))
+            if node.param is not None and segments[depth]:
+                stack.append((node.param, depth + 1))
+        found.sort()
+        return [self._routes[index] for index in found]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.router.app(scope, receive, send)
+            return
+        if len(self.router.routes) != len(self._routes):
+            self._build()
+        if "router" not in scope:
+            scope["router"] = self.router
+
+        route_path = _route_path(scope)
+        partial = None
+        for route in self.candidates(route_path):
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                scope.update(child_scope)
+                await route.handle(scope, receive, send)
+                return
+            if match == Match.PARTIAL and partial is None:
+                partial, partial_scope = route, child_scope
+        if partial is not None:
+            scope.update(partial_scope)
+            await partial.handle(scope, receive, send)
+            return
+
+        # The same fallbacks as Router.app: redirect to the path with the
+        # trailing slash added or removed if that matches, else 404.
+        if self.router.redirect_slashes and route_path != "/":
+            redirect_scope = dict(scope)
+            if route_path.endswith("/"):
+                redirect_scope["path"] = redirect_scope["path"].rstrip("/")
+            else:
+                redirect_scope["path"] = redirect_scope["path"] + "/"
+            for route in self.candidates(_route_path(redirect_scope)):
+                match, _ = route.matches(redirect_scope)
+                if match != Match.NONE:
+                    response = RedirectResponse(url=str(URL(scope=redirect_scope)))
+                    await response(scope, receive, send)
+                    return
+        await self.router.default(scope, receive, send)
+
+
+def use_compiled_dispatch(app: FastAPI) -> CompiledDispatcher | None:
+    """Dispatch ``app``'s routes with a ``CompiledDispatcher`` if COMPILED_ROUTING is on.
+
+    Call after all routers are included. Middleware added to the app wraps the
+    router, so it is unaffected; middleware on the router itself is not
+    supported.
+    """
+    if not get_settings().compiled_routing:
+        return None
+    if app.router.middleware_stack != app.router.app:
+        raise ValueError("Compiled dispatch does not support router-level middleware")
+    dispatcher = CompiledDispatcher(app.router)
+    app.router.middleware_stack = dispatcher
+    return dispatcher
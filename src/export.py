@@ -0,0 +1,119 @@
+import csv
+import importlib.util
+import io
+import json
+from typing import AsyncIterator, Callable, Generator, Sequence
+
+from .store import ItemRepository, StoredItem
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+_dump_name = json.JSONEncoder(ensure_ascii=False).encode
+
+
+async def iter_batches(
+    repository: ItemRepository, after: int, batch_size: int
+) -> AsyncIterator[list[StoredItem]]:
+    """Every item with ``item_id > after`` in ID order, ``batch_size`` at a time.
+
+    Each batch is a fresh keyset query, so only one batch is held at a time and
+    items added during the export are included if their IDs are still ahead.
+    """
+    while True:
+        batch = await repository.list_items(after, batch_size)
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        after = batch[-1].item_id
+
+
+# Encoders are generators: the first next() returns the header, each batch
+# sent in returns its encoding, and sending None returns the trailer.
+Encoder = Generator[bytes, Sequence[StoredItem] | None, None]
+
+
+def _ndjson_encoder() -> Encoder:
+    batch = yield b""
+    while batch is not None:
+        # Same JSON as ItemResponse without q, built directly since the items
+        # are already valid.
+        batch = yield "".join([
+            f'{{"item_id":{item_id},"name":{_dump_name(name)},"price":{price!r}}}\n'
+            for item_id, name, price in batch
+        ]).encode()
+    yield b""
+
+
+def _csv_encoder() -> Encoder:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(("item_id", "name", "price"))
+    batch = yield buffer.getvalue().encode()
+    while batch is not None:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        batch = yield buffer.getvalue().encode()
+    yield b""
+
+
+def _arrow_encoder() -> Encoder:
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ("item_id", pa.int64()), ("name", pa.string()), ("price", pa.float64()),
+    ])
+    buffer = io.BytesIO()
+    writer = pa.ipc.new_stream(buffer, schema)
+
+    def drain() -> bytes:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    batch = yield drain()
+    while batch is not None:
+        ids, names, prices = zip(*batch)
+        columns = [
+            pa.array(ids, pa.int64()),
+            pa.array(names, pa.string()),
+            pa.array(prices, pa.float64()),
+        ]
+        writer.write_batch(pa.record_batch(columns, schema=schema))
+        batch = yield drain()
+    writer.close()
+    yield drain()
+
+
+ENCODERS: dict[str, Callable[[], Encoder]] = {
+    "ndjson": _ndjson_encoder,
+    "csv": _csv_encoder,
+    "arrow": _arrow_encoder,
+}
+
+
+async def export_items(
+    repository: ItemRepository, format: str, after: int, batch_size: int
+) -> AsyncIterator[bytes]:
+    """Encode the catalog after ``after`` as a stream of ``format`` chunks.
+
+    Each chunk is one batch, so memory use depends on ``batch_size`` and not on
+    the size of the catalog.
+    """
+    encoder = ENCODERS[format]()
+    header = next(encoder)
+    if header:
+        yield header
+    async for batch in iter_batches(repository, after, batch_size):
+        yield encoder.send(batch)
+    trailer = encoder.send(None)
+    if trailer:
+        yield trailer
@@ -0,0 +1,162 @@
+"""Replays of stored responses for requests carrying an ``Idempotency-Key``.
+
+A client that retries a request after a timeout cannot tell whether the first
+attempt was applied. If it sends the same ``Idempotency-Key`` header with
+every attempt, routes marked ``@idempotent`` store the first response and
+answer repeats of the same request (same bearer token, key and body) with the
+stored bytes: the body is not validated again and the endpoint does not run.
+Repeats arriving while the first attempt is still running wait for it and
+get its response. Requests without the header are unaffected.
+
+Replays are rate limited like the requests that run: the handler applies
+``rate_limit`` itself before looking for a stored response.
+
+Replayed responses carry ``Idempotent-Replayed: true``. Responses with a 5xx
+status, and errors raised as exceptions (validation errors, a full write
+queue), are not stored, so a retry after them runs the request again.
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, TypeVar
+
+from fastapi import HTTPException, Request, Response
+
+from .auth import verified_claims
+from .cache import LRUCache
+from .config import get_settings
+from .ratelimit import rate_limit
+from .singleflight import SingleFlight
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+
+F = TypeVar("F", bound=Callable[..., Any])
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+def idempotent(endpoint: F) -> F:
+    """Mark a route's endpoint to honour ``Idempotency-Key`` (see ``AppRoute``).
+
+    Apply below the route decorator. The endpoint must not return a streaming
+    response, since the whole body is stored.
+    """
+    endpoint.idempotent = True
+    return endpoint
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def response(self, replayed: bool) -> Response:
+        response = Response(self.body, status_code=self.status_code)
+        response.raw_headers = list(self.headers)
+        if replayed:
+            response.raw_headers.append(REPLAYED_HEADER)
+        return response
+
+
+class IdempotencyCache:
+    """Stored responses keyed by route path, token, idempotency key and body.
+
+    Tokens and bodies are kept only as hashes. Capacity is bounded by the
+    total size of the stored responses and entries expire after ``ttl``
+    seconds. Concurrent first attempts share one ``SingleFlight`` call with
+    no timeout, so a slow write is never cancelled on behalf of its waiters.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, clock=time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self.responses: LRUCache[tuple, StoredResponse] = LRUCache(
+            max_bytes, weigh=lambda stored: stored.size, clock=clock
+        )
+        self.flights = SingleFlight()
+        self.replays = 0
+
+    def get(self, key: tuple) -> StoredResponse | None:
+        return self.responses.get(key)
+
+    def put(self, key: tuple, stored: StoredResponse) -> None:
+        self.responses.set(key, stored, self._clock() + self.ttl)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "replays": self.replays,
+            "coalesced": self.flights.coalesced,
+            "entries": len(self.responses),
+            "bytes": self.responses.weight,
+            "evictions": self.responses.evictions,
+        }
+
+
+_idempotency_cache: IdempotencyCache | None = None
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    global _idempotency_cache
+    if _idempotency_cache is None:
+        settings = get_settings()
+        _idempotency_cache = IdempotencyCache(
+            settings.idempotency_cache_bytes, settings.idempotency_ttl_seconds
+        )
+    return _idempotency_cache
+
+
+def idempotent_handler(handler: Handler) -> Handler:
+    """Wrap a route handler to store and replay responses by ``Idempotency-Key``."""
+
+    async def app(request: Request) -> Response:
+        key = request.headers.get("idempotency-key")
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if key is None or scheme.lower() != "bearer" or not token:
+            return await handler(request)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters",
+            )
+        # Replays skip the route's dependencies, rate_limit among them. The
+        # dependency does nothing once the request has been counted here.
+        await rate_limit(request)
+        cache = get_idempotency_cache()
+        body = await request.body()
+        cache_key = (request.url.path, _digest(token.encode()), key, _digest(body))
+        stored = cache.get(cache_key)
+        if stored is not None:
+            # Only replay to a token that is still valid.
+            await verified_claims(request, token)
+            cache.replays += 1
+            return stored.response(replayed=True)
+
+        first = False
+
+        async def run() -> StoredResponse:
+            nonlocal first
+            first = True
+            response = await handler(request)
+            stored = StoredResponse(
+                response.status_code, list(response.raw_headers), bytes(response.body)
+            )
+            if response.status_code < 500:
+                cache.put(cache_key, stored)
+            return stored
+
+        stored = await cache.flights.do(cache_key, run)
+        if not first:
+            cache.replays += 1
+        return stored.response(replayed=not first)
+
+    return app
@@ -0,0 +1,174 @@
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+
+from .models import Item
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+JSON_MEDIA_TYPE = "application/json"
+
+ParsedEntry = tuple[int, Item | list[dict[str, Any]]]
+
+_WHITESPACE = " \t\r\n"
+
+
+def _error(type_: str, msg: str) -> list[dict[str, Any]]:
+    return [{"type": type_, "loc": [], "msg": msg}]
+
+
+def _validate_json(raw: bytes | str) -> Item | list[dict[str, Any]]:
+    try:
+        return Item.model_validate_json(raw)
+    except ValidationError as exc:
+        errors = exc.errors(include_url=False)
+        for error in errors:
+            # Unparsable lines are reported with the raw bytes as input, which
+            # the response could not serialize if they are not valid UTF-8.
+            if isinstance(error.get("input"), bytes):
+                error["input"] = error["input"].decode("utf-8", "replace")
+        return errors
+
+
+def _validate_object(obj: Any) -> Item | list[dict[str, Any]]:
+    try:
+        return Item.model_validate(obj)
+    except ValidationError as exc:
+        return exc.errors(include_url=False)
+
+
+async def iter_ndjson(
+    stream: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[ParsedEntry]:
+    """Yield ``(line_number, Item or errors)`` for each non-blank NDJSON line.
+
+    Only the current partial line is buffered; a line longer than
+    ``max_line_bytes`` is reported as an error and skipped.
+    """
+    buffer = bytearray()
+    line_no = 0
+    skipping = False
+    async for chunk in stream:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            line_no += 1
+            if skipping:
+                skipping = False
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield line_no, _error("line_too_long", "Line too long")
+                elif buffer.strip():
+                    yield line_no, _validate_json(bytes(buffer))
+            buffer.clear()
+            start = end + 1
+        if not skipping:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                yield line_no + 1, _error("line_too_long", "Line too long")
+                buffer.clear()
+                skipping = True
+    if not skipping and buffer.strip():
+        yield line_no + 1, _validate_json(bytes(buffer))
+
+
+async def iter_json_array(
+    stream: AsyncIterator[bytes], max_item_bytes: int
+) -> AsyncIterator[ParsedEntry]:
+    """Yield ``(index, Item or errors)`` for each element of a top-level JSON array.
+
+    Elements are decoded one at a time as soon as they are complete. Malformed
+    JSON or invalid UTF-8 cannot be resynchronized, so it ends the stream with
+    a final error entry.
+    """
+    index = 0
+    try:
+        async for index, parsed in _iter_json_array(stream, max_item_bytes):
+            yield index, parsed
+            index += 1
+    except UnicodeDecodeError as exc:
+        yield index, _error("json_invalid", f"Invalid UTF-8: {exc.reason}")
+
+
+async def _iter_json_array(
+    stream: AsyncIterator[bytes], max_item_bytes: int
+) -> AsyncIterator[ParsedEntry]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    index = 0
+    state = "start"  # start -> value -> separator -> ... -> done
+
+    async def fill() -> bool:
+        nonlocal buffer, pos
+        async for chunk in stream:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+            pos = 0
+            return True
+        buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        pos = 0
+        return False
+
+    more = True
+    while state != "done":
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer):
+            if not more:
+                yield index, _error("json_invalid", "Unexpected end of JSON input")
+                return
+            more = await fill()
+            continue
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                yield index, _error("json_invalid", "Expected a JSON array")
+                return
+            pos += 1
+            state = "first"
+        elif state in ("first", "separator") and char == "]":
+            pos += 1
+            state = "done"
+        elif state == "separator":
+            if char != ",":
+                yield index, _error("json_invalid", "Expected ',' or ']'")
+                return
+            pos += 1
+            state = "value"
+        else:
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                if more and len(buffer) - pos <= max_item_bytes:
+                    more = await fill()
+                    continue
+                msg = "Item too large" if more else f"Invalid JSON: {exc.msg}"
+                yield index, _error("json_invalid", msg)
+                return
+            if end == len(buffer) and more:
+                # A number at the end of the buffer may continue in the next chunk.
+                more = await fill()
+                continue
+            if buffer.find("\\u", pos, end) != -1:
+                # json accepts lone surrogate escapes, which cannot be encoded as
+                # UTF-8; pydantic's parser rejects them, as for NDJSON lines.
+                parsed = _validate_json(buffer[pos:end])
+            else:
+                parsed = _validate_object(obj)
+            pos = end
+            yield index, parsed
+            index += 1
+            state = "separator"
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buffer):
+            yield index, _error("json_invalid", "Unexpected data after JSON array")
+            return
+        if not more:
+            return
+        more = await fill()
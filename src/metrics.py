@@ -0,0 +1,316 @@
+import asyncio
+import glob
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import get_settings
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+
+class Histogram:
+    """Cumulative-on-render histogram with fixed upper bounds (seconds)."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+@dataclass
+class RequestTiming:
+    """Per-request phase timestamps, shared through ``current_timing``.
+
+    ``auth`` accumulates time spent verifying the bearer token. The endpoint
+    start/end marks are set by ``AppRoute``; everything between the request
+    start and the endpoint start that is not auth is dependency resolution and
+    request validation, and everything between the endpoint end and the first
+    response message is serialization.
+    """
+
+    start: float
+    auth: float = 0.0
+    endpoint_start: float | None = None
+    endpoint_end: float | None = None
+    response_start: float | None = None
+    extra: dict[str, float] = field(default_factory=dict)
+
+    def phases(self) -> dict[str, float]:
+        result = {"auth": self.auth} if self.auth else {}
+        if self.endpoint_start is not None:
+            result["validation"] = max(self.endpoint_start - self.start - self.auth, 0.0)
+            if self.endpoint_end is not None:
+                result["handler"] = self.endpoint_end - self.endpoint_start
+                if self.response_start is not None:
+                    result["serialization"] = self.response_start - self.endpoint_end
+        result.update(self.extra)
+        return result
+
+
+current_timing: ContextVar[RequestTiming | None] = ContextVar(
+    "current_timing", default=None
+)
+
+
+class MetricsRegistry:
+    """Process-local request metrics.
+
+    Each worker process aggregates into its own plain dicts; updates happen on
+    the event loop thread (or under the GIL for the auth phase), so no locks
+    are taken on the request path.
+
+    With a ``directory``, the registry also writes a snapshot of itself there
+    ``flush_interval`` seconds after the first unflushed request, and
+    ``render`` sums the snapshots of all workers sharing the directory.
+    """
+
+    def __init__(self, directory: str = "", flush_interval: float = 1.0) -> None:
+        self.requests: dict[tuple[str, str, str], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.phases: dict[tuple[str, str], Histogram] = {}
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._flush_pending = False
+
+    def record(
+        self, method: str, route: str, status: int, duration: float, timing: RequestTiming
+    ) -> None:
+        key = (method, route, f"{status // 100}xx")
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = Histogram()
+        histogram.observe(duration)
+        for phase, seconds in timing.phases().items():
+            histogram = self.phases.get((route, phase))
+            if histogram is None:
+                histogram = self.phases[(route, phase)] = Histogram()
+            histogram.observe(seconds)
+        if self.directory and not self._flush_pending:
+            self._flush_pending = True
+            asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": [[*key, count] for key, count in self.requests.items()],
+            "latency": [[*key, h.counts, h.sum, h.count] for key, h in self.latency.items()],
+            "phases": [[*key, h.counts, h.sum, h.count] for key, h in self.phases.items()],
+        }
+
+    def merge(self, snapshot: dict) -> None:
+        for method, route, status, count in snapshot["requests"]:
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + count
+        for name in ("latency", "phases"):
+            histograms = getattr(self, name)
+            for first, second, counts, total, count in snapshot[name]:
+                histogram = histograms.get((first, second))
+                if histogram is None:
+                    histogram = histograms[(first, second)] = Histogram()
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def flush(self) -> None:
+        """Write this process's snapshot to ``directory`` (atomically)."""
+        self._flush_pending = False
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def combined(self) -> "MetricsRegistry":
+        """Return the sum of all workers' snapshots, including this one's."""
+        if not self.directory:
+            return self
+        self.flush()
+        total = MetricsRegistry()
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    total.merge(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return total
+
+    def render(self, gauges: Iterable[tuple[str, dict[str, str], float]] = ()) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        if self.directory:
+            return self.combined().render(gauges)
+        lines = [
+            "# HELP http_requests_total Requests by route and status class.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            labels = _labels(method=method, route=route, status=status)
+            lines.append(f"http_requests_total{labels} {count}")
+        lines += [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            lines += _histogram_lines(
+                "http_request_duration_seconds", histogram, method=method, route=route
+            )
+        lines += [
+            "# HELP http_request_phase_seconds Time per request phase by route.",
+            "# TYPE http_request_phase_seconds histogram",
+        ]
+        for (route, phase), histogram in sorted(self.phases.items()):
+            lines += _histogram_lines(
+                "http_request_phase_seconds", histogram, route=route, phase=phase
+            )
+        for name, labels, value in gauges:
+            lines.append(f"{name}{_labels(**labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels: str) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=repr(bound))} {cumulative}")
+    cumulative += histogram.counts[-1]
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+_registry: MetricsRegistry | None = None
+
+
+def get_registry() -> MetricsRegistry:
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry(get_settings().metrics_dir)
+    return _registry
+
+
+class SlowRequestLog:
+    """The last ``size`` requests that took at least ``threshold`` seconds.
+
+    Each entry keeps the request line, status, total duration and the
+    per-phase breakdown from ``RequestTiming.phases``, in milliseconds. The
+    query string is left out so tokens or personal data in it are not kept.
+    """
+
+    def __init__(self, threshold: float, size: int = 100) -> None:
+        self.threshold = threshold
+        self.entries: deque[dict] = deque(maxlen=size)
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        route: str,
+        status: int,
+        duration: float,
+        timing: RequestTiming,
+    ) -> None:
+        if duration < self.threshold:
+            return
+        self.entries.append({
+            "at": time.time(),
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "phases_ms": {
+                phase: round(seconds * 1000, 3)
+                for phase, seconds in timing.phases().items()
+            },
+        })
+
+    def recent(self) -> list[dict]:
+        """Recorded requests, newest first."""
+        return list(reversed(self.entries))
+
+
+_slow_requests: SlowRequestLog | None = None
+
+
+def get_slow_request_log() -> SlowRequestLog | None:
+    """The process-wide slow request log, or None unless SLOW_REQUEST_SECONDS is set."""
+    global _slow_requests
+    if _slow_requests is None:
+        settings = get_settings()
+        if settings.slow_request_seconds <= 0:
+            return None
+        _slow_requests = SlowRequestLog(
+            settings.slow_request_seconds, settings.slow_request_log_size
+        )
+    return _slow_requests
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route counts, latency and phase timings.
+
+    Routes are labelled with their path template (``/items/{item_id}``) taken
+    from the matched route, so label cardinality stays bounded. Requests over
+    SLOW_REQUEST_SECONDS are also kept in the slow request log.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(start=time.perf_counter())
+        token = current_timing.set(timing)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing.response_start = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_timing.reset(token)
+            duration = time.perf_counter() - timing.start
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            get_registry().record(scope["method"], path, status, duration, timing)
+            slow_requests = get_slow_request_log()
+            if slow_requests is not None:
+                slow_requests.record(
+                    scope["method"], scope["path"], path, status, duration, timing
+                )
@@ -1,3 +1,5 @@
+from typing import Annotated, Any
+
 from pydantic import BaseModel, Field
 
 
@@ -11,3 +13,55 @@ class ItemResponse(BaseModel):
     name: str
     price: float
     q: str | None = None
+
+
+class BulkItemError(BaseModel):
+    line: int
+    errors: list[dict[str, Any]]
+
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    item_ids: list[int]
+    errors: list[BulkItemError]
+
+
+class BatchGetRequest(BaseModel):
+    ids: list[Annotated[int, Field(gt=0)]] = Field(..., min_length=1)
+
+
+class BatchGetResponse(BaseModel):
+    items: list[ItemResponse]
+    missing: list[int]
+
+
+class SearchHit(BaseModel):
+    item_id: int
+    name: str
+    price: float
+    score: float
+
+
+class SearchResponse(BaseModel):
+    items: list[SearchHit]
+
+
+class ItemPage(BaseModel):
+    items: list[ItemResponse]
+    next_cursor: int | None
+
+
+class PriceBucket(BaseModel):
+    low: float
+    high: float
+    count: int
+
+
+class PriceStatsResponse(BaseModel):
+    count: int
+    sum: float
+    mean: float | None
+    min: float | None
+    max: float | None
+    percentiles: dict[str, float]
+    histogram: list[PriceBucket]
@@ -0,0 +1,113 @@
+"""OpenAPI schema caching for faster cold starts.
+
+FastAPI builds the schema on the first request for ``/openapi.json`` or
+``/docs``, which takes longer than the rest of app construction combined.
+With OPENAPI_CACHE_FILE set the schema is loaded from that file instead, or
+built and saved there if the file is missing or stale. To ship the file with
+a deployment, build it ahead of time:
+
+    python -m src.openapi --output openapi.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Any
+
+import fastapi
+import pydantic
+from fastapi import FastAPI
+
+from .config import get_settings
+
+
+def schema_fingerprint(app: FastAPI) -> str:
+    """Hash of everything the generated schema depends on.
+
+    Covers the FastAPI and pydantic versions, the app's metadata and the
+    source of every loaded module in the packages defining its endpoints,
+    which is where the route and model definitions live.
+    """
+    digest = hashlib.sha256()
+    for part in (fastapi.__version__, pydantic.VERSION, app.title, app.version):
+        digest.update(part.encode() + b"\0")
+    packages = {
+        route.endpoint.__module__.partition(".")[0]
+        for route in app.routes
+        if hasattr(route, "endpoint")
+    }
+    for name in sorted(sys.modules):
+        if name.partition(".")[0] not in packages:
+            continue
+        path = getattr(sys.modules[name], "__file__", None)
+        if path and path.endswith(".py"):
+            with open(path, "rb") as f:
+                digest.update(name.encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+def load_schema(path: str, fingerprint: str) -> dict[str, Any] | None:
+    try:
+        with open(path, "rb") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("fingerprint") != fingerprint:
+        return None
+    return cached.get("schema")
+
+
+def save_schema(path: str, fingerprint: str, schema: dict[str, Any]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".openapi-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"fingerprint": fingerprint, "schema": schema}, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def use_cached_schema(app: FastAPI) -> None:
+    """Make ``app.openapi()`` read and write the schema in OPENAPI_CACHE_FILE."""
+    generate = app.openapi
+
+    def openapi() -> dict[str, Any]:
+        if app.openapi_schema is not None:
+            return app.openapi_schema
+        path = get_settings().openapi_cache_file
+        if not path:
+            return generate()
+        fingerprint = schema_fingerprint(app)
+        schema = load_schema(path, fingerprint)
+        if schema is None:
+            schema = generate()
+            try:
+                save_schema(path, fingerprint, schema)
+            except OSError:
+                # A read-only deployment still serves the generated schema.
+                pass
+        app.openapi_schema = schema
+        return schema
+
+    app.openapi = openapi
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the cached OpenAPI schema.")
+    parser.add_argument("--output", default="openapi.json")
+    args = parser.parse_args()
+
+    from main import app
+
+    schema = app.openapi()
+    save_schema(args.output, schema_fingerprint(app), schema)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""In-process sampling profiler, started and stopped at runtime.
+
+A background thread wakes every ``interval`` seconds, takes the current stack
+of every other thread from ``sys._current_frames`` and counts each distinct
+stack. Nothing is instrumented, so requests pay nothing while the profiler is
+stopped and, while it runs, only for the GIL the sampler briefly holds.
+
+Stacks are reported in the collapsed format (``root;caller;callee count`` per
+line) read by flamegraph.pl, speedscope and inferno. Each stack starts with
+the thread's name, so the event loop and the threadpool workers show up as
+separate towers; idle threads appear in their wait frames.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+
+MAX_DEPTH = 128
+
+
+def _frame_label(code: CodeType) -> str:
+    filename = os.sep.join(code.co_filename.rsplit(os.sep, 2)[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Counts the stacks of all threads, sampled every ``interval`` seconds.
+
+    ``start`` runs the sampler for at most ``max_seconds`` so a forgotten
+    profile cannot keep sampling forever. Samples from the previous run stay
+    available through ``collapsed`` until the next ``start``.
+    """
+
+    def __init__(self) -> None:
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.interval = 0.0
+        self.started_at: float | None = None
+        self.stopped_at: float | None = None
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005, max_seconds: float = 30.0) -> None:
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.stacks = Counter()
+        self.samples = 0
+        self.interval = interval
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval, max_seconds, self._stop),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+
+    def _run(self, interval: float, max_seconds: float, stop: threading.Event) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + max_seconds
+        try:
+            while not stop.wait(interval):
+                self.sample(sys._current_frames(), skip=own)
+                if time.monotonic() >= deadline:
+                    break
+        finally:
+            self.stopped_at = time.time()
+
+    def sample(self, frames: dict[int, FrameType], skip: int | None = None) -> None:
+        """Count one stack per thread in ``frames`` (thread id → innermost frame)."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        labels = self._labels
+        for ident, frame in frames.items():
+            if ident == skip:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Counted stacks in the collapsed format, most frequent first."""
+        # dict() copies in one step, so a running sampler cannot resize it mid-sort.
+        stacks = sorted(dict(self.stacks).items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+
+_profiler: SamplingProfiler | None = None
+
+
+def get_profiler() -> SamplingProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
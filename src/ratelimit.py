@@ -0,0 +1,199 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Callable
+
+from fastapi import HTTPException, Request
+from fastapi.security.utils import get_authorization_scheme_param
+
+from .auth import verified_claims
+from .config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Key hash (0 marks an empty slot), tokens left, time of the last update.
+_SLOT = struct.Struct("<Qdd")
+
+
+def _stable_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def _local_hash(key: str) -> int:
+    return hash(key) & 0xFFFFFFFFFFFFFFFF
+
+
+class RateLimiter:
+    """Token bucket per client key, kept in a fixed-size hash table.
+
+    Each client gets a bucket of ``burst`` tokens refilled at ``rate`` tokens
+    per second; a request takes one token. Buckets live in an open-addressing
+    table of ``slots`` 24-byte slots, so memory stays fixed however many
+    clients there are. A client's slot is reused by another client once the
+    bucket has refilled completely, since a full bucket is the same as no
+    bucket. If none of the slots a new key probes is idle, the stalest one is
+    taken over and its client starts again from a full bucket.
+
+    With ``path`` the table is a memory-mapped file guarded by ``flock``, so
+    worker processes mapping the same file share their limits. Otherwise it
+    is a ``bytearray`` private to the process.
+    """
+
+    PROBES = 8
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        slots: int = 65536,
+        path: str = "",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.slots = 1 << max(slots - 1, self.PROBES).bit_length()
+        self._mask = self.slots - 1
+        self._clock = clock
+        self._fd: int | None = None
+        size = self.slots * _SLOT.size
+        if path:
+            if fcntl is None:
+                raise ValueError("A shared rate limit table requires fcntl")
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._table = mmap.mmap(self._fd, size)
+            self._hash = _stable_hash
+        else:
+            self._table = bytearray(size)
+            self._hash = _local_hash
+        self.allowed = 0
+        self.rejected = 0
+
+    def acquire(self, key: str) -> float:
+        """Take a token for ``key``; return 0.0 if allowed, else seconds to wait."""
+        h = self._hash(key) or 1
+        if self._fd is None:
+            return self._acquire(h)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            return self._acquire(h)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _acquire(self, h: int) -> float:
+        table, rate, burst = self._table, self.rate, self.burst
+        now = self._clock()
+        base = h & self._mask
+        found = free = stalest = -1
+        stalest_stamp = math.inf
+        tokens = burst
+        for i in range(self.PROBES):
+            slot = (base + i) & self._mask
+            key, left, stamp = _SLOT.unpack_from(table, slot * _SLOT.size)
+            if key == h:
+                found = slot
+                tokens = min(burst, left + (now - stamp) * rate)
+                break
+            if key == 0:
+                # Slots are reused in place, never emptied, so the key is not
+                # further along the probe sequence.
+                if free < 0:
+                    free = slot
+                break
+            if left + (now - stamp) * rate >= burst:
+                if free < 0:
+                    free = slot
+            elif stamp < stalest_stamp:
+                stalest, stalest_stamp = slot, stamp
+        slot = found if found >= 0 else free if free >= 0 else stalest
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / rate
+            self.rejected += 1
+        _SLOT.pack_into(table, slot * _SLOT.size, h, tokens, now)
+        return wait
+
+    def stats(self) -> dict[str, int]:
+        return {"allowed": self.allowed, "rejected": self.rejected}
+
+    def close(self) -> None:
+        if self._fd is not None:
+            self._table.close()
+            os.close(self._fd)
+            self._fd = None
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    """The process-wide limiter, or None while RATE_LIMIT_PER_SECOND is 0."""
+    global _limiter
+    if _limiter is None:
+        settings = get_settings()
+        if settings.rate_limit_per_second <= 0:
+            return None
+        _limiter = RateLimiter(
+            settings.rate_limit_per_second,
+            settings.rate_limit_burst,
+            settings.rate_limit_slots,
+            settings.rate_limit_file,
+        )
+    return _limiter
+
+
+async def client_key(request: Request) -> str:
+    """Rate limit key: the bearer token if it verifies, else the client address.
+
+    Unverified tokens fall back to the address so that a client cannot dodge
+    its limit by sending a fresh made-up token with every request. The token
+    is verified like ``authenticate`` does (in the threadpool unless the
+    connection's session has it), and the result is kept on the request.
+    """
+    scheme, token = get_authorization_scheme_param(request.headers.get("authorization"))
+    if token and scheme.lower() == "bearer":
+        try:
+            await verified_claims(request, token)
+        except HTTPException:
+            pass
+        else:
+            return "token:" + token
+    client = request.client
+    return "ip:" + (client.host if client else "")
+
+
+# Scope key marking a request that rate_limit has already counted.
+_CHECKED_SCOPE_KEY = "ratelimit.checked"
+
+
+async def rate_limit(request: Request) -> None:
+    """Dependency rejecting requests over the client's limit with 429.
+
+    Runs before ``authenticate``, which then reuses the verification done
+    for ``client_key`` instead of verifying the token again. A request is
+    counted once even if this is called again, so ``idempotent_handler`` can
+    apply it ahead of replays, which skip the route's dependencies.
+    """
+    limiter = get_rate_limiter()
+    if limiter is None or request.scope.get(_CHECKED_SCOPE_KEY):
+        return
+    request.scope[_CHECKED_SCOPE_KEY] = True
+    wait = limiter.acquire(await client_key(request))
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
@@ -0,0 +1,146 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Iterable
+
+from fastapi import Request, Response
+
+from .cache import LRUCache
+from .compression import available_encodings, compress, encoded_etag, negotiate
+from .config import get_settings
+
+CacheListener = Callable[[str, int], None]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    # Precompressed copies of body by content coding.
+    encoded: dict[str, bytes] = field(default_factory=dict, compare=False)
+
+    @classmethod
+    def from_body(cls, body: bytes, encodings: Iterable[str] = ()) -> "CachedResponse":
+        return cls(
+            body,
+            '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+            {encoding: compress(encoding, body) for encoding in encodings},
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+def _variants_size(variants: dict[Hashable, CachedResponse]) -> int:
+    return sum(v.size for v in variants.values())
+
+
+class ResponseCache:
+    """Pre-encoded JSON responses keyed by item ID and request variant.
+
+    All variants of an item live in one LRU entry so a write invalidates them
+    with a single pop. Bodies of at least ``COMPRESSION_MIN_BYTES`` are also
+    stored compressed in every available encoding, so hits never compress.
+    Capacity is bounded by the total size of cached bodies, compressed copies
+    included.
+
+    Listeners registered with ``add_listener`` are called with an event name
+    (``"hit"``, ``"miss"`` or ``"not_modified"``) and the number of bytes
+    involved, e.g. to export hit ratio and bytes saved as metrics.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._entries: LRUCache[int, dict[Hashable, CachedResponse]] = LRUCache(
+            max_bytes, weigh=_variants_size
+        )
+        self._listeners: list[CacheListener] = []
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def add_listener(self, listener: CacheListener) -> None:
+        self._listeners.append(listener)
+
+    def _emit(self, event: str, size: int) -> None:
+        for listener in self._listeners:
+            listener(event, size)
+
+    def get(self, item_id: int, variant: Hashable) -> CachedResponse | None:
+        variants = self._entries.get(item_id)
+        cached = variants.get(variant) if variants is not None else None
+        if cached is None:
+            self.misses += 1
+            self._emit("miss", 0)
+            return None
+        self.hits += 1
+        self.bytes_saved += len(cached.body)
+        self._emit("hit", len(cached.body))
+        return cached
+
+    def put(self, item_id: int, variant: Hashable, body: bytes) -> CachedResponse:
+        settings = get_settings()
+        encodings = ()
+        if len(body) >= settings.compression_min_bytes:
+            encodings = available_encodings(settings.compression_encodings)
+        cached = CachedResponse.from_body(body, encodings)
+        variants = dict(self._entries.get(item_id, {}, count=False))
+        variants[variant] = cached
+        self._entries.set(item_id, variants)
+        return cached
+
+    def invalidate(self, item_id: int) -> None:
+        self._entries.pop(item_id)
+
+    def not_modified(self, size: int) -> None:
+        self.bytes_saved += size
+        self._emit("not_modified", size)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_cached": self._entries.weight,
+        }
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110, 13.1.2).
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cached_json_response(
+    request: Request, cached: CachedResponse, cache: ResponseCache | None = None
+) -> Response:
+    body, headers = cached.body, {"ETag": cached.etag}
+    if cached.encoded:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        if encoding in cached.encoded:
+            body = cached.encoded[encoding]
+            headers["ETag"] = encoded_etag(cached.etag, encoding)
+            headers["Content-Encoding"] = encoding
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        if cache is not None:
+            cache.not_modified(len(cached.body))
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(get_settings().response_cache_bytes)
+    return _response_cache
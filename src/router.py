@@ -1,8 +1,54 @@
-from fastapi import APIRouter, Depends, Path, Query
-from .auth import verify_token
-from .models import Item, ItemResponse
+from typing import Literal
 
-router = APIRouter()
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from .auth import authenticate, get_auth_sessions, get_verifier, require_admin
+from .config import Settings, get_settings
+from .export import ARROW_AVAILABLE, EXPORT_MEDIA_TYPES, export_items
+from .idempotency import get_idempotency_cache, idempotent
+from .ingest import NDJSON_MEDIA_TYPES, JSON_MEDIA_TYPE, iter_json_array, iter_ndjson
+from .models import (
+    BatchGetRequest,
+    BatchGetResponse,
+    BulkCreateResponse,
+    BulkItemError,
+    Item,
+    ItemPage,
+    ItemResponse,
+    PriceBucket,
+    PriceStatsResponse,
+    SearchHit,
+    SearchResponse,
+)
+from .metrics import get_registry, get_slow_request_log
+from .profiling import get_profiler
+from .ratelimit import get_rate_limiter, rate_limit
+from .response_cache import (
+    CachedResponse,
+    ResponseCache,
+    cached_json_response,
+    get_response_cache,
+)
+from .routing import AppRoute
+from .search import SearchIndex, get_search_index
+from .singleflight import SingleFlight, get_groups, single_flight
+from .store import ItemFilter, ItemRepository, StoredItem, get_repository
+from .write_behind import WriteQueueFull
+
+router = APIRouter(route_class=AppRoute, dependencies=[Depends(rate_limit)])
+
+
+def _trusted_item(stored: StoredItem, q: str | None = None) -> ItemResponse:
+    return ItemResponse.model_construct(
+        item_id=stored.item_id, name=stored.name, price=stored.price, q=q
+    )
+
+
+def _json_response(model) -> Response:
+    # Models built from stored items are already valid, so encode them once here
+    # instead of letting response_model validate and serialize them again.
+    return Response(content=model.model_dump_json(), media_type="application/json")
 
 
 @router.get("/")
@@ -10,16 +56,275 @@ async def read_root():
     return {"message": "Welcome to the FastAPI application!"}
 
 
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics(cache: ResponseCache = Depends(get_response_cache)):
+    gauges = [
+        ("response_cache_" + name, {}, value) for name, value in cache.stats().items()
+    ]
+    token_cache = getattr(get_verifier(), "cache", None)
+    if token_cache is not None:
+        gauges += [
+            ("token_cache_" + name, {}, value)
+            for name, value in token_cache.stats().items()
+        ]
+    for group_name, group in get_groups().items():
+        gauges += [
+            ("singleflight_" + name, {"group": group_name}, value)
+            for name, value in group.stats().items()
+        ]
+    sessions = get_auth_sessions()
+    if sessions is not None:
+        gauges += [
+            ("auth_session_" + name, {}, value)
+            for name, value in sessions.cache.stats().items()
+        ]
+    gauges += [
+        ("idempotency_" + name, {}, value)
+        for name, value in get_idempotency_cache().stats().items()
+    ]
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        gauges += [
+            ("rate_limit_" + name, {}, value) for name, value in limiter.stats().items()
+        ]
+    return PlainTextResponse(
+        get_registry().render(gauges), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.post("/admin/profiler/start", include_in_schema=False)
+async def start_profiler(
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0),
+    max_seconds: float = Query(30.0, gt=0, le=600.0),
+    _: dict = Depends(require_admin),
+):
+    profiler = get_profiler()
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    profiler.start(interval_ms / 1000, max_seconds)
+    return profiler.status()
+
+
+@router.post("/admin/profiler/stop", include_in_schema=False)
+async def stop_profiler(_: dict = Depends(require_admin)):
+    profiler = get_profiler()
+    # stop() joins the sampler thread, which can take up to one interval.
+    await run_in_threadpool(profiler.stop)
+    return profiler.status()
+
+
+@router.get("/admin/profiler", include_in_schema=False)
+async def read_profile(_: dict = Depends(require_admin)):
+    """Samples of the running or last profile as collapsed stacks."""
+    return PlainTextResponse(
+        get_profiler().collapsed(),
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'},
+    )
+
+
+@router.get("/admin/slow-requests", include_in_schema=False)
+async def read_slow_requests(_: dict = Depends(require_admin)):
+    slow_requests = get_slow_request_log()
+    if slow_requests is None:
+        raise HTTPException(status_code=404, detail="Slow request log is disabled")
+    return {
+        "threshold_seconds": slow_requests.threshold,
+        "requests": slow_requests.recent(),
+    }
+
+
+@router.get("/items", response_model=ItemPage)
+async def list_items(
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    q: str | None = Query(None, max_length=50),
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+):
+    filters = ItemFilter(min_price=min_price, max_price=max_price, name_prefix=q)
+    stored = await repository.list_items(cursor, limit, filters)
+    next_cursor = stored[-1].item_id if len(stored) == limit else None
+    page = ItemPage.model_construct(
+        items=[_trusted_item(s) for s in stored], next_cursor=next_cursor
+    )
+    return _json_response(page)
+
+
+@router.get("/items/export")
+async def export_catalog(
+    format: Literal["ndjson", "csv", "arrow"] = Query("ndjson"),
+    cursor: int = Query(0, ge=0),
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+    settings: Settings = Depends(get_settings),
+):
+    # Streamed in ID order; an interrupted export resumes with cursor set to
+    # the last item_id received.
+    if format == "arrow" and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Arrow export requires pyarrow")
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        export_items(repository, format, cursor, settings.export_batch_size),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="items.{extension}"'},
+    )
+
+
+@router.get("/items/search", response_model=SearchResponse)
+async def search_items(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=100),
+    prefix: bool = Query(True),
+    fuzzy: bool = Query(True),
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+    index: SearchIndex = Depends(get_search_index),
+    settings: Settings = Depends(get_settings),
+):
+    await index.refresh(repository, settings.search_sync_seconds)
+    hits = await index.search_async(q, limit, prefix=prefix, fuzzy=fuzzy)
+    found = await repository.get_many([item_id for item_id, _ in hits])
+    result = SearchResponse.model_construct(items=[
+        SearchHit.model_construct(
+            item_id=item_id,
+            name=found[item_id].name,
+            price=found[item_id].price,
+            score=round(score, 6),
+        )
+        for item_id, score in hits
+        if item_id in found
+    ])
+    return _json_response(result)
+
+
+@router.get("/items/stats", response_model=PriceStatsResponse)
+async def item_price_stats(
+    q: str | None = Query(None, max_length=50),
+    buckets: int = Query(10, ge=1, le=100),
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+):
+    stats = await repository.price_stats(q, buckets)
+    return PriceStatsResponse(
+        count=stats.count,
+        sum=stats.total,
+        mean=stats.total / stats.count if stats.count else None,
+        min=stats.minimum,
+        max=stats.maximum,
+        percentiles={f"p{p}": value for p, value in stats.percentiles.items()},
+        histogram=[
+            PriceBucket(low=low, high=high, count=count)
+            for low, high, count in stats.histogram
+        ],
+    )
+
+
 @router.get("/items/{item_id}", response_model=ItemResponse)
 async def read_item(
+    request: Request,
     item_id: int = Path(..., gt=0),
     q: str | None = Query(None, max_length=50),
-    _: str = Depends(verify_token),
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+    cache: ResponseCache = Depends(get_response_cache),
+    flights: SingleFlight = Depends(single_flight("read_item")),
 ):
-    item = {"name": f"item{item_id}", "price": 100.0}
-    return ItemResponse(item_id=item_id, name=item["name"], price=item["price"], q=q)
+    cached = cache.get(item_id, q)
+    if cached is None:
+        # Concurrent misses for the same item share one lookup and encoding.
+        async def load() -> CachedResponse:
+            stored = await repository.get(item_id)
+            if stored is None:
+                raise HTTPException(status_code=404, detail="Item not found")
+            body = _trusted_item(stored, q).model_dump_json().encode()
+            return cache.put(item_id, q, body)
+
+        try:
+            cached = await flights.do((item_id, q), load)
+        except TimeoutError:
+            # The shared load ran past SINGLE_FLIGHT_TIMEOUT_SECONDS.
+            raise HTTPException(status_code=504, detail="Timed out loading the item")
+    return cached_json_response(request, cached, cache)
 
 
 @router.post("/items", response_model=ItemResponse)
-async def create_item(item: Item, _: str = Depends(verify_token)):
-    return ItemResponse(item_id=1, name=item.name, price=item.price)
+@idempotent
+async def create_item(
+    item: Item,
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+    cache: ResponseCache = Depends(get_response_cache),
+    index: SearchIndex = Depends(get_search_index),
+):
+    try:
+        stored = await repository.add(item)
+    except WriteQueueFull:
+        raise HTTPException(
+            status_code=503, detail="Write queue is full", headers={"Retry-After": "1"}
+        )
+    cache.invalidate(stored.item_id)
+    index.add(stored)
+    return ItemResponse(item_id=stored.item_id, name=stored.name, price=stored.price)
+
+
+@router.post("/items/bulk", response_model=BulkCreateResponse)
+async def create_items_bulk(
+    request: Request,
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+    cache: ResponseCache = Depends(get_response_cache),
+    settings: Settings = Depends(get_settings),
+    index: SearchIndex = Depends(get_search_index),
+):
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type in NDJSON_MEDIA_TYPES:
+        entries = iter_ndjson(request.stream(), settings.bulk_max_line_bytes)
+    elif media_type == JSON_MEDIA_TYPE:
+        entries = iter_json_array(request.stream(), settings.bulk_max_line_bytes)
+    else:
+        raise HTTPException(status_code=415, detail="Unsupported media type")
+
+    item_ids: list[int] = []
+    errors: list[BulkItemError] = []
+    batch: list[Item] = []
+
+    async def flush() -> None:
+        for stored in await repository.add_many(batch):
+            cache.invalidate(stored.item_id)
+            index.add(stored)
+            item_ids.append(stored.item_id)
+        batch.clear()
+
+    async for line, parsed in entries:
+        if isinstance(parsed, Item):
+            batch.append(parsed)
+            if len(batch) >= settings.bulk_batch_size:
+                await flush()
+        else:
+            errors.append(BulkItemError(line=line, errors=parsed))
+    if batch:
+        await flush()
+    return BulkCreateResponse(created=len(item_ids), item_ids=item_ids, errors=errors)
+
+
+@router.post("/items:batchGet", response_model=BatchGetResponse)
+async def batch_get_items(
+    body: BatchGetRequest,
+    _: str = Depends(authenticate),
+    repository: ItemRepository = Depends(get_repository),
+    settings: Settings = Depends(get_settings),
+):
+    ids = list(dict.fromkeys(body.ids))
+    if len(ids) > settings.batch_get_limit:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.batch_get_limit} ids can be requested at once",
+        )
+    found = await repository.get_many(ids)
+    result = BatchGetResponse.model_construct(
+        items=[_trusted_item(found[i]) for i in ids if i in found],
+        missing=[i for i in ids if i not in found],
+    )
+    return _json_response(result)
@@ -0,0 +1,646 @@
+"""Full-text search over item names.
+
+The index is an inverted index from lower-cased name tokens to the items that
+contain them, plus a trigram index over the vocabulary for fuzzy matching.
+Results are ranked with BM25.
+
+It has two segments. The base segment is a snapshot file memory-mapped at
+startup and never modified. New items go into an in-memory segment, either
+as they are created through the API or when ``refresh`` finds items written
+some other way. Rows are numbered across both segments, base rows first.
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import time
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import islice, repeat
+from operator import add, itemgetter, mul
+from typing import Generator, Iterable, Iterator, Sequence
+
+from .config import get_settings
+from .export import iter_batches
+from .store import _MAX_CHAR, ItemRepository, SortedIndex, StoredItem
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+MAX_FUZZY_EXPANSIONS = 10
+FUZZY_THRESHOLD = 0.35
+SYNC_BATCH_SIZE = 5000
+SYNC_YIELD_ITEMS = 200
+SCORE_CHUNK = 8192
+GAP_RETRY_SECONDS = 600.0
+
+_MAGIC = b"ITEMIDX1"
+_PREAMBLE = struct.Struct("<8sQ")
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+Postings = tuple[Sequence[int], Sequence[int]]
+
+
+class _MemorySegment:
+    """Mutable segment: one row and term frequency array per term."""
+
+    def __init__(self) -> None:
+        self.term_ids: dict[str, int] = {}
+        self.terms: list[str] = []
+        self.rows: list[array] = []
+        self.tfs: list[array] = []
+        self.vocabulary = SortedIndex(key=self.terms.__getitem__, typecode="I")
+        self.grams: dict[str, array] = {}
+        self.doc_ids = array("q")
+        self.doc_lens = array("H")
+        self.total_len = 0
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, item_id: int, tokens: list[str]) -> None:
+        row = len(self.doc_ids)
+        self.doc_ids.append(item_id)
+        self.doc_lens.append(min(len(tokens), 0xFFFF))
+        self.total_len += len(tokens)
+        for term, tf in Counter(tokens).items():
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                term_id = self._new_term(term)
+            self.rows[term_id].append(row)
+            self.tfs[term_id].append(min(tf, 0xFF))
+
+    def _new_term(self, term: str) -> int:
+        term_id = len(self.terms)
+        self.terms.append(term)
+        self.term_ids[term] = term_id
+        self.rows.append(array("I"))
+        self.tfs.append(array("B"))
+        self.vocabulary.add(term_id)
+        for gram in trigrams(term):
+            self.grams.setdefault(gram, array("I")).append(term_id)
+        return term_id
+
+    def postings(self, term: str) -> Postings | None:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return None
+        return self.rows[term_id], self.tfs[term_id]
+
+    def iter_terms(self) -> Iterable[str]:
+        return self.terms
+
+    def prefix_terms(self, prefix: str, limit: int) -> list[str]:
+        matches = self.vocabulary.iter_range(prefix, prefix + _MAX_CHAR)
+        return [self.terms[term_id] for term_id in islice(matches, limit)]
+
+    def shared_grams(self, grams: Iterable[str], minimum: int) -> dict[str, int]:
+        counts: Counter[int] = Counter()
+        for gram in grams:
+            counts.update(self.grams.get(gram, ()))
+        return {
+            self.terms[term_id]: shared
+            for term_id, shared in counts.items()
+            if shared >= minimum
+        }
+
+
+class _StringTable:
+    """Sorted UTF-8 keys back to back in one blob, found by binary search."""
+
+    def __init__(self, blob: memoryview, ends: Sequence[int]) -> None:
+        self.blob = blob
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.ends) - 1
+
+    def key(self, i: int) -> bytes:
+        return bytes(self.blob[self.ends[i] : self.ends[i + 1]])
+
+    def lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key: bytes) -> int | None:
+        i = self.lower_bound(key)
+        return i if i < len(self) and self.key(i) == key else None
+
+
+class _FrozenSegment:
+    """Read-only segment whose arrays are views into a snapshot file."""
+
+    def __init__(self, sections: dict[str, memoryview], total_len: int) -> None:
+        self.vocabulary = _StringTable(sections["term_blob"], sections["term_ends"])
+        self.posting_ends = sections["posting_ends"]
+        self.rows = sections["rows"]
+        self.tfs = sections["tfs"]
+        self.grams = _StringTable(sections["gram_blob"], sections["gram_ends"])
+        self.gram_term_ends = sections["gram_term_ends"]
+        self.gram_terms = sections["gram_terms"]
+        self.doc_ids = sections["doc_ids"]
+        self.doc_lens = sections["doc_lens"]
+        self.total_len = total_len
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.doc_ids)
+
+    def postings(self, term: str) -> Postings | None:
+        i = self.vocabulary.find(term.encode())
+        if i is None:
+            return None
+        start, end = self.posting_ends[i], self.posting_ends[i + 1]
+        return self.rows[start:end], self.tfs[start:end]
+
+    def iter_terms(self) -> Iterator[str]:
+        for i in range(len(self.vocabulary)):
+            yield self.vocabulary.key(i).decode()
+
+    def prefix_terms(self, prefix: str, limit: int) -> list[str]:
+        key = prefix.encode()
+        matches = []
+        for i in range(self.vocabulary.lower_bound(key), len(self.vocabulary)):
+            term = self.vocabulary.key(i)
+            if not term.startswith(key) or len(matches) == limit:
+                break
+            matches.append(term.decode())
+        return matches
+
+    def shared_grams(self, grams: Iterable[str], minimum: int) -> dict[str, int]:
+        counts: Counter[int] = Counter()
+        for gram in grams:
+            i = self.grams.find(gram.encode())
+            if i is not None:
+                start, end = self.gram_term_ends[i], self.gram_term_ends[i + 1]
+                counts.update(self.gram_terms[start:end])
+        return {
+            self.vocabulary.key(term_id).decode(): shared
+            for term_id, shared in counts.items()
+            if shared >= minimum
+        }
+
+
+def _score_postings(
+    idf: float,
+    average_len: float,
+    offset: int,
+    doc_lens: Sequence[int],
+    postings: Postings,
+) -> dict[int, float]:
+    """BM25 score of every row in one posting list, keyed by global row.
+
+    The score depends only on the term frequency and the document length, and
+    a posting list has few distinct pairs of the two. Each pair is scored once
+    and the per-posting work is done by ``map`` and ``dict`` in C.
+    """
+    rows, tfs = postings
+    pairs = list(map(add, map(mul, tfs, repeat(0x10000)), map(doc_lens.__getitem__, rows)))
+    table = {}
+    for pair in set(pairs):
+        tf, length = divmod(pair, 0x10000)
+        norm = K1 * (1 - B + B * length / average_len)
+        table[pair] = idf * tf * (K1 + 1) / (tf + norm)
+    if offset:
+        rows = map(offset.__add__, rows)
+    return dict(zip(rows, map(table.__getitem__, pairs)))
+
+
+class SearchIndex:
+    """BM25-ranked name search over a snapshot and items added since."""
+
+    def __init__(self, base: _FrozenSegment | None = None, scanned_upto: int = 0) -> None:
+        self._base = base
+        self._memory = _MemorySegment()
+        # Items with IDs up to scanned_upto are indexed, except in the gaps:
+        # [low, high) ranges of IDs a refresh skipped over, with the time it
+        # found them. Workers hand out IDs from reserved blocks, so a lower ID
+        # can commit after a higher one, and refreshes look for items in the
+        # gaps for GAP_RETRY_SECONDS. Items created through the API past
+        # scanned_upto or in a gap are indexed straight away and remembered so
+        # that a later refresh does not add them twice.
+        self.scanned_upto = scanned_upto
+        self._gaps: list[tuple[int, int, float]] = []
+        self._ahead: set[int] = set()
+        self._tracking = False
+        self._last_sync: float | None = None
+        self._lock = asyncio.Lock()
+
+    def _segments(self) -> list[tuple[int, _FrozenSegment | _MemorySegment]]:
+        if self._base is None:
+            return [(0, self._memory)]
+        return [(0, self._base), (self._base.doc_count, self._memory)]
+
+    @property
+    def doc_count(self) -> int:
+        return sum(segment.doc_count for _, segment in self._segments())
+
+    def add(self, stored: StoredItem) -> None:
+        """Index an item just created through the API.
+
+        Before the first refresh nothing is tracked: that refresh scans the
+        whole repository anyway.
+        """
+        if not self._tracking:
+            return
+        if stored.item_id <= self.scanned_upto and not self._in_gap(stored.item_id):
+            return
+        self._ahead.add(stored.item_id)
+        self._memory.add(stored.item_id, tokenize(stored.name))
+
+    def _in_gap(self, item_id: int) -> bool:
+        i = bisect_right(self._gaps, item_id, key=itemgetter(0)) - 1
+        return i >= 0 and item_id < self._gaps[i][1]
+
+    def _index_scanned(self, item_id: int, name: str) -> None:
+        if item_id in self._ahead:
+            self._ahead.discard(item_id)
+        else:
+            self._memory.add(item_id, tokenize(name))
+
+    async def refresh(self, repository: ItemRepository, interval: float) -> None:
+        """Index items past ``scanned_upto`` or in the gaps below it.
+
+        Runs at most once every ``interval`` seconds.
+        """
+        now = time.monotonic()
+        if self._last_sync is not None and now - self._last_sync < interval:
+            return
+        async with self._lock:
+            if self._last_sync is not None and now - self._last_sync < interval:
+                return
+            self._tracking = True
+            gaps = [gap for gap in self._gaps if now - gap[2] < GAP_RETRY_SECONDS]
+            # While the gaps are rescanned, add() leaves items in them to the rescan.
+            self._gaps = []
+            self._gaps = await self._fill_gaps(repository, gaps)
+            previous = self.scanned_upto
+            async for batch in iter_batches(repository, self.scanned_upto, SYNC_BATCH_SIZE):
+                for i, (item_id, name, _) in enumerate(batch, 1):
+                    if item_id > previous + 1:
+                        self._gaps.append((previous + 1, item_id, now))
+                    previous = item_id
+                    self._index_scanned(item_id, name)
+                    if i % SYNC_YIELD_ITEMS == 0:
+                        # The in-memory store never awaits, so the first refresh
+                        # of a large catalog would otherwise hold the loop.
+                        # scanned_upto first, so add() skips what was just indexed.
+                        self.scanned_upto = item_id
+                        await asyncio.sleep(0)
+                self.scanned_upto = batch[-1].item_id
+                await asyncio.sleep(0)
+            self._ahead = {
+                i for i in self._ahead if i > self.scanned_upto or self._in_gap(i)
+            }
+            self._last_sync = time.monotonic()
+
+    async def _fill_gaps(
+        self, repository: ItemRepository, gaps: list[tuple[int, int, float]]
+    ) -> list[tuple[int, int, float]]:
+        """Index the items that have appeared in ``gaps``; return what is still missing.
+
+        One keyset query covers every gap among the next ``SYNC_BATCH_SIZE``
+        items, so nearby gaps cost a single query.
+        """
+        remaining = []
+        i = 0
+        while i < len(gaps):
+            batch = await repository.list_items(gaps[i][0] - 1, SYNC_BATCH_SIZE)
+            # The batch holds every item from the gap's start up to covered.
+            covered = batch[-1].item_id if len(batch) == SYNC_BATCH_SIZE else self.scanned_upto
+            j = 0
+            while i < len(gaps) and gaps[i][0] <= covered:
+                low, high, found_at = gaps[i]
+                while j < len(batch) and batch[j].item_id < high:
+                    item_id, name, _ = batch[j]
+                    j += 1
+                    if item_id < low:
+                        continue
+                    if item_id > low:
+                        remaining.append((low, item_id, found_at))
+                    self._index_scanned(item_id, name)
+                    low = item_id + 1
+                if high - 1 > covered:
+                    # The rest of this gap is past the batch; query again from it.
+                    gaps[i] = (low, high, found_at)
+                    break
+                if low < high:
+                    remaining.append((low, high, found_at))
+                i += 1
+            await asyncio.sleep(0)
+        return remaining
+
+    def _has_term(self, term: str) -> bool:
+        return any(s.postings(term) is not None for _, s in self._segments())
+
+    def _prefix_terms(self, prefix: str) -> list[str]:
+        terms: set[str] = set()
+        for _, segment in self._segments():
+            terms.update(segment.prefix_terms(prefix, MAX_PREFIX_EXPANSIONS))
+        return sorted(terms)[:MAX_PREFIX_EXPANSIONS]
+
+    def _similar_terms(self, token: str) -> dict[str, float]:
+        grams = trigrams(token)
+        # Jaccard similarity can only reach the threshold with this many shared.
+        minimum = max(1, math.ceil(FUZZY_THRESHOLD * len(grams)))
+        shared: dict[str, int] = {}
+        for _, segment in self._segments():
+            for term, count in segment.shared_grams(grams, minimum).items():
+                shared[term] = max(shared.get(term, 0), count)
+        similar = {}
+        for term, count in shared.items():
+            similarity = count / (len(grams) + len(trigrams(term)) - count)
+            if similarity >= FUZZY_THRESHOLD:
+                similar[term] = similarity
+        return dict(heapq.nlargest(MAX_FUZZY_EXPANSIONS, similar.items(), key=lambda kv: kv[1]))
+
+    def _expand(self, token: str, prefix: bool, fuzzy: bool) -> dict[str, float]:
+        """Terms matching ``token``, weighted by how closely they match it."""
+        expansions = {}
+        if self._has_term(token):
+            expansions[token] = 1.0
+        if prefix:
+            for term in self._prefix_terms(token):
+                expansions.setdefault(term, len(token) / len(term))
+        if fuzzy and not expansions:
+            expansions = self._similar_terms(token)
+        return expansions
+
+    def search(
+        self, query: str, limit: int = 10, prefix: bool = True, fuzzy: bool = True
+    ) -> list[tuple[int, float]]:
+        """The best ``limit`` matches for ``query`` as ``(item_id, score)``.
+
+        Any token may match. The last one also matches as a prefix, for
+        search-as-you-type, and tokens with no exact or prefix match fall back
+        to terms sharing enough trigrams with them.
+        """
+        steps = self._search(query, limit, prefix, fuzzy)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    async def search_async(
+        self, query: str, limit: int = 10, prefix: bool = True, fuzzy: bool = True
+    ) -> list[tuple[int, float]]:
+        """``search``, yielding to the event loop between chunks of postings.
+
+        A word found in a large share of the catalog takes tens of milliseconds
+        to score; this keeps other requests moving meanwhile.
+        """
+        steps = self._search(query, limit, prefix, fuzzy)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+            await asyncio.sleep(0)
+
+    def _search(
+        self, query: str, limit: int, prefix: bool, fuzzy: bool
+    ) -> Generator[None, None, list[tuple[int, float]]]:
+        # Yields after each chunk of postings scored; returns the hits.
+        tokens = tokenize(query)
+        segments = self._segments()
+        docs = sum(segment.doc_count for _, segment in segments)
+        if not tokens or not docs:
+            return []
+        average_len = sum(segment.total_len for _, segment in segments) / docs or 1.0
+        scores: dict[int, float] = {}
+        last = len(tokens) - 1
+        for position, token in enumerate(tokens):
+            if token in tokens[:position]:
+                continue
+            expansions = self._expand(token, prefix and position == last, fuzzy)
+            matches = [
+                (weight, offset, segment, postings)
+                for term, weight in expansions.items()
+                for offset, segment in segments
+                if (postings := segment.postings(term)) is not None
+            ]
+            # One IDF for the token across all its expansions, so that a rare
+            # completion does not outrank the exact term it was expanded from.
+            df = min(docs, sum(len(postings[0]) for *_, postings in matches))
+            idf = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+            token_scores: dict[int, float] = {}
+            for i, (weight, offset, segment, (rows, tfs)) in enumerate(matches):
+                for start in range(0, len(rows), SCORE_CHUNK):
+                    chunk = (rows[start : start + SCORE_CHUNK], tfs[start : start + SCORE_CHUNK])
+                    term_scores = _score_postings(
+                        weight * idf, average_len, offset, segment.doc_lens, chunk
+                    )
+                    if i == 0:
+                        token_scores.update(term_scores)
+                    else:
+                        # A token scores by its best matching term only.
+                        for row, score in term_scores.items():
+                            if score > token_scores.get(row, 0.0):
+                                token_scores[row] = score
+                    if len(rows) > SCORE_CHUNK:
+                        yield
+            if len(token_scores) > len(scores):
+                scores, token_scores = token_scores, scores
+            for row, score in token_scores.items():
+                scores[row] = scores.get(row, 0.0) + score
+        best: list[tuple[int, float]] = []
+        items = iter(scores.items())
+        while chunk := list(islice(items, SCORE_CHUNK)):
+            best = heapq.nlargest(limit, best + chunk, key=itemgetter(1))
+            if len(scores) > SCORE_CHUNK:
+                yield
+        return [(self._doc_id(row), score) for row, score in best]
+
+    def _doc_id(self, row: int) -> int:
+        for offset, segment in reversed(self._segments()):
+            if row >= offset:
+                return segment.doc_ids[row - offset]
+        raise IndexError(row)
+
+    def save(self, path: str) -> None:
+        """Write both segments as one snapshot, atomically replacing ``path``."""
+        segments = self._segments()
+        vocabulary: set[str] = set()
+        for _, segment in segments:
+            vocabulary.update(segment.iter_terms())
+        terms = sorted(vocabulary)
+
+        term_blob = bytearray()
+        term_ends = array("Q", [0])
+        posting_ends = array("Q", [0])
+        rows = array("I")
+        tfs = array("B")
+        grams: dict[str, array] = {}
+        for term_id, term in enumerate(terms):
+            term_blob += term.encode()
+            term_ends.append(len(term_blob))
+            for offset, segment in segments:
+                postings = segment.postings(term)
+                if postings is not None:
+                    rows.extend(row + offset for row in postings[0])
+                    tfs.extend(postings[1])
+            posting_ends.append(len(rows))
+            for gram in trigrams(term):
+                grams.setdefault(gram, array("I")).append(term_id)
+
+        gram_blob = bytearray()
+        gram_ends = array("Q", [0])
+        gram_term_ends = array("Q", [0])
+        gram_terms = array("I")
+        # Code point order, which is also the UTF-8 byte order lookups use.
+        for gram in sorted(grams):
+            gram_blob += gram.encode()
+            gram_ends.append(len(gram_blob))
+            gram_terms.extend(grams[gram])
+            gram_term_ends.append(len(gram_terms))
+
+        doc_ids = array("q")
+        doc_lens = array("H")
+        for _, segment in segments:
+            doc_ids.extend(segment.doc_ids)
+            doc_lens.extend(segment.doc_lens)
+
+        sections = {
+            "term_blob": (bytes(term_blob), "B"),
+            "term_ends": (term_ends, "Q"),
+            "posting_ends": (posting_ends, "Q"),
+            "rows": (rows, "I"),
+            "tfs": (tfs, "B"),
+            "gram_blob": (bytes(gram_blob), "B"),
+            "gram_ends": (gram_ends, "Q"),
+            "gram_term_ends": (gram_term_ends, "Q"),
+            "gram_terms": (gram_terms, "I"),
+            "doc_ids": (doc_ids, "q"),
+            "doc_lens": (doc_lens, "H"),
+        }
+        _write_snapshot(
+            path,
+            sections,
+            total_len=sum(segment.total_len for _, segment in segments),
+            scanned_upto=self.scanned_upto,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        """Memory-map a snapshot written by ``save``.
+
+        Nothing is copied: lookups read the mapped pages, which the OS loads on
+        first use and may share between worker processes.
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _PREAMBLE.unpack_from(mapped)
+        if magic != _MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a search index snapshot")
+        start = _PREAMBLE.size
+        header = json.loads(mapped[start : start + header_len])
+        data_start = _align(start + header_len)
+        view = memoryview(mapped)[data_start:]
+        sections = {
+            name: view[offset : offset + length].cast(typecode)
+            for name, (offset, length, typecode) in header["sections"].items()
+        }
+        base = _FrozenSegment(sections, header["total_len"])
+        return cls(base, header["scanned_upto"])
+
+
+def _align(length: int) -> int:
+    return -(-length // 8) * 8
+
+
+def _write_snapshot(
+    path: str, sections: dict[str, tuple], total_len: int, scanned_upto: int
+) -> None:
+    # Layout: magic, header length, JSON header, then each section's raw
+    # native-endian bytes at an 8-byte aligned offset so it can be cast in
+    # place. Section offsets are relative to the aligned end of the header.
+    placed = {}
+    offset = 0
+    for name, (data, typecode) in sections.items():
+        length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        placed[name] = (offset, length, typecode)
+        offset += _align(length)
+    header = {"sections": placed, "total_len": total_len, "scanned_upto": scanned_upto}
+    encoded = json.dumps(header).encode()
+    data_start = _align(_PREAMBLE.size + len(encoded))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(_MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, (data, _) in sections.items():
+            f.seek(data_start + placed[name][0])
+            f.write(data)
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+
+
+_index: SearchIndex | None = None
+
+
+def get_search_index() -> SearchIndex:
+    """The process-wide index, loaded from SEARCH_SNAPSHOT when there is one."""
+    global _index
+    if _index is None:
+        path = get_settings().search_snapshot
+        if path and os.path.exists(path):
+            try:
+                _index = SearchIndex.load(path)
+            except (OSError, ValueError, KeyError):
+                logger.warning("Ignoring unreadable search snapshot %s", path, exc_info=True)
+        if _index is None:
+            _index = SearchIndex()
+    return _index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build a search index snapshot.")
+    parser.add_argument("--output", default="search.idx")
+    args = parser.parse_args()
+
+    from .store import get_repository, shutdown_repository
+
+    async def build() -> SearchIndex:
+        index = SearchIndex()
+        try:
+            await index.refresh(get_repository(), 0.0)
+        finally:
+            await shutdown_repository()
+        return index
+
+    index = asyncio.run(build())
+    index.save(args.output)
+    print(f"Wrote {args.output} ({index.doc_count} items)")
+
+
+if __name__ == "__main__":
+    main()
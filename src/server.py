@@ -0,0 +1,171 @@
+"""Multi-process launcher for main:app.
+
+Examples:
+    python -m src.server --workers 4 --port 8000
+    STORE_BACKEND=sqlite SQLITE_PATH=/var/lib/items.db python -m src.server
+
+Every worker is a separate process running its own uvicorn server. Where the
+platform supports SO_REUSEPORT each worker binds its own listening socket and
+the kernel spreads connections across them; otherwise the socket is bound once
+here and inherited by the workers.
+
+Workers share item state through the SQLite backend, whose AUTOINCREMENT
+column keeps item IDs globally unique, and share request metrics through
+snapshot files in METRICS_DIR. With rate limiting enabled, token buckets are
+shared through the memory-mapped table in RATE_LIMIT_FILE. Response and token
+caches stay per worker; items are never modified in place, so cached responses
+cannot go stale.
+"""
+
+import argparse
+import contextlib
+import glob
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import tempfile
+from multiprocessing.connection import wait
+
+import uvicorn
+
+from .config import Settings, get_settings
+from .metrics import get_registry
+from .store import create_repository
+
+logger = logging.getLogger(__name__)
+
+REUSE_PORT = hasattr(socket, "SO_REUSEPORT")
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = REUSE_PORT) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def prepare_environment(workers: int) -> Settings:
+    """Point every worker at shared state before any of them starts.
+
+    Raises ``ValueError`` when several workers would each keep their own
+    in-memory store, since item IDs would then collide across workers.
+    """
+    if workers > 1:
+        os.environ.setdefault("STORE_BACKEND", "sqlite")
+        os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="items-metrics-"))
+    get_settings.cache_clear()
+    settings = get_settings()
+    if workers > 1 and settings.store_backend == "memory":
+        raise ValueError(
+            "The memory store is per process; use STORE_BACKEND=sqlite with workers > 1"
+        )
+    if workers > 1 and settings.rate_limit_per_second > 0 and not settings.rate_limit_file:
+        directory = tempfile.mkdtemp(prefix="items-ratelimit-")
+        os.environ["RATE_LIMIT_FILE"] = os.path.join(directory, "buckets")
+        get_settings.cache_clear()
+        settings = get_settings()
+    if settings.rate_limit_file:
+        # Start every client from a full bucket, whatever the table layout was.
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(settings.rate_limit_file)
+    if settings.metrics_dir:
+        # Counters from a previous run would otherwise be summed into this one.
+        # Only snapshot files are removed: the directory may be shared.
+        os.makedirs(settings.metrics_dir, exist_ok=True)
+        for pattern in ("metrics-*.json", "metrics-*.json.tmp"):
+            for path in glob.glob(os.path.join(settings.metrics_dir, pattern)):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+    # Create the schema once so workers do not race on it at startup.
+    create_repository(settings).close()
+    return settings
+
+
+def run_worker(
+    host: str, port: int, sock: socket.socket | None, log_level: str
+) -> None:
+    if sock is None:
+        sock = bind_socket(host, port, reuse_port=True)
+    config = uvicorn.Config("main:app", log_level=log_level)
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        if get_settings().metrics_dir:
+            get_registry().flush()
+
+
+def serve(
+    workers: int,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    log_level: str = "warning",
+    reuse_port: bool = REUSE_PORT,
+) -> None:
+    """Run ``workers`` server processes until SIGINT/SIGTERM; restart any that die."""
+    prepare_environment(workers)
+    context = multiprocessing.get_context("spawn")
+    shared = None
+    if not reuse_port:
+        shared = bind_socket(host, port, reuse_port=False)
+        shared.listen(2048)
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    def start() -> multiprocessing.Process:
+        process = context.Process(
+            target=run_worker, args=(host, port, shared, log_level), daemon=True
+        )
+        process.start()
+        return process
+
+    processes = [start() for _ in range(workers)]
+    logger.warning("Serving on %s:%d with %d workers", host, port, workers)
+    try:
+        while not stopping:
+            wait([p.sentinel for p in processes], timeout=0.5)
+            for i, process in enumerate(processes):
+                if not process.is_alive() and not stopping:
+                    logger.warning("Worker %d exited with %s", process.pid, process.exitcode)
+                    processes[i] = start()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        if shared is not None:
+            shared.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 0)) or os.cpu_count()
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument(
+        "--no-reuse-port", dest="reuse_port", action="store_false", default=REUSE_PORT,
+        help="bind once in the launcher and share the socket instead of SO_REUSEPORT",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    serve(args.workers, args.host, args.port, args.log_level, args.reuse_port)
+
+
+if __name__ == "__main__":
+    main()
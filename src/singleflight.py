@@ -0,0 +1,97 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from .config import get_settings
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapses concurrent loads of the same key into one shared call.
+
+    The first caller for a key starts the load as a task; callers arriving
+    while it runs await the same task instead of starting their own. The load
+    is bounded by ``timeout`` seconds, after which every waiter gets
+    ``TimeoutError`` and the next caller starts afresh. A waiter that is
+    cancelled does not cancel the load for the others.
+    """
+
+    def __init__(self, timeout: float | None = None) -> None:
+        self.timeout = timeout
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    async def _load(self, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await asyncio.wait_for(fn(), self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(self._load(fn))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight(),
+        }
+
+
+_groups: dict[str, SingleFlight] = {}
+
+
+def get_group(name: str) -> SingleFlight:
+    group = _groups.get(name)
+    if group is None:
+        timeout = get_settings().single_flight_timeout_seconds
+        group = _groups[name] = SingleFlight(timeout if timeout > 0 else None)
+    return group
+
+
+def get_groups() -> dict[str, SingleFlight]:
+    return _groups
+
+
+def single_flight(name: str) -> Callable[[], SingleFlight]:
+    """Dependency providing the named group, e.g. ``Depends(single_flight("items"))``."""
+
+    def dependency() -> SingleFlight:
+        return get_group(name)
+
+    return dependency
+
+
+def coalesce(name: str, key: Callable[..., Hashable]):
+    """Decorator sharing one in-flight call among concurrent calls with equal ``key(*args, **kwargs)``."""
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await get_group(name).do(
+                key(*args, **kwargs), lambda: fn(*args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
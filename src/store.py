@@ -0,0 +1,757 @@
+import heapq
+import json
+import math
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Iterator, MutableSequence, NamedTuple, Sequence
+
+from anyio import to_thread
+
+from .config import Settings, get_settings
+from .models import Item
+
+
+class StoredItem(NamedTuple):
+    item_id: int
+    name: str
+    price: float
+
+
+class ItemFilter(NamedTuple):
+    min_price: float | None = None
+    max_price: float | None = None
+    name_prefix: str | None = None
+
+    @property
+    def active(self) -> bool:
+        return self != _NO_FILTER
+
+    def matches(self, item: StoredItem) -> bool:
+        if self.min_price is not None and item.price < self.min_price:
+            return False
+        if self.max_price is not None and item.price > self.max_price:
+            return False
+        if self.name_prefix is not None and not item.name.startswith(self.name_prefix):
+            return False
+        return True
+
+
+_NO_FILTER = ItemFilter()
+# C-level equivalent of StoredItem._make, for materializing many rows.
+_make_item = partial(tuple.__new__, StoredItem)
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class SortedIndex:
+    """Sorted multiset stored as a list of bounded sorted chunks.
+
+    Inserting only shifts elements within one chunk, so it stays cheap even
+    with millions of entries, while lookups remain binary searches.
+
+    With ``key``, values are ordered by ``key(value)`` and range bounds are key
+    values. ``typecode`` stores the chunks as ``array`` objects, which keeps an
+    index of row numbers at one machine word per entry.
+    """
+
+    def __init__(
+        self,
+        load: int = 1000,
+        key: Callable[[Any], Any] | None = None,
+        typecode: str | None = None,
+    ) -> None:
+        self._load = load
+        self._key = key
+        self._new_chunk = list if typecode is None else partial(array, typecode)
+        self._chunks: list[MutableSequence] = []
+        self._maxes: list = []
+
+    def _key_of(self, value):
+        return value if self._key is None else self._key(value)
+
+    def add(self, value) -> None:
+        key = self._key_of(value)
+        if not self._chunks:
+            self._chunks.append(self._new_chunk([value]))
+            self._maxes.append(key)
+            return
+        # Equal keys go after existing ones, so ties keep insertion order.
+        pos = bisect_right(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._chunks[pos].append(value)
+            self._maxes[pos] = key
+        else:
+            insort(self._chunks[pos], value, key=self._key)
+        chunk = self._chunks[pos]
+        if len(chunk) > 2 * self._load:
+            self._chunks[pos : pos + 1] = [chunk[: self._load], chunk[self._load :]]
+            self._maxes[pos : pos + 1] = [
+                self._key_of(chunk[self._load - 1]),
+                self._key_of(chunk[-1]),
+            ]
+
+    def _locate(self, key) -> tuple[int, int]:
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return pos, 0
+        return pos, bisect_left(self._chunks[pos], key, key=self._key)
+
+    def count_range(self, low, high) -> int:
+        """Number of values ``v`` with ``low <= key(v) < high``."""
+        lo_pos, lo_idx = self._locate(low)
+        hi_pos, hi_idx = self._locate(high)
+        if (hi_pos, hi_idx) <= (lo_pos, lo_idx):
+            return 0
+        if lo_pos == hi_pos:
+            return hi_idx - lo_idx
+        between = sum(len(c) for c in self._chunks[lo_pos + 1 : hi_pos])
+        return len(self._chunks[lo_pos]) - lo_idx + between + hi_idx
+
+    def nth(self, k: int):
+        """The ``k``-th smallest value (0-based)."""
+        for chunk in self._chunks:
+            if k < len(chunk):
+                return chunk[k]
+            k -= len(chunk)
+        raise IndexError(k)
+
+    def iter_range(self, low, high) -> Iterator:
+        pos, idx = self._locate(low)
+        for chunk in islice(self._chunks, pos, None):
+            for value in islice(chunk, idx, None):
+                if self._key_of(value) >= high:
+                    return
+                yield value
+            idx = 0
+
+
+class ItemTable:
+    """Columnar item storage.
+
+    Items are rows across parallel ``array`` columns (``item_id``, ``price`` and
+    the end offset of each name) plus a single buffer holding every name as
+    UTF-8, back to back. That is 24 bytes per item plus the encoded name, where
+    a dict of ``StoredItem`` tuples costs a few hundred. Rows are appended in ID
+    order and ``StoredItem`` tuples are only built when a row is read.
+    """
+
+    __slots__ = ("ids", "prices", "name_ends", "names")
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.prices = array("d")
+        self.name_ends = array("Q", [0])
+        self.names = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, item_id: int, name: str, price: float) -> int:
+        row = len(self.ids)
+        self.ids.append(item_id)
+        self.prices.append(price)
+        self.names += name.encode()
+        self.name_ends.append(len(self.names))
+        return row
+
+    def find(self, item_id: int) -> int | None:
+        """Row holding ``item_id``, or None."""
+        ids = self.ids
+        if not ids:
+            return None
+        # IDs are normally dense, which puts the row at a fixed offset.
+        row = item_id - ids[0]
+        if 0 <= row < len(ids) and ids[row] == item_id:
+            return row
+        row = bisect_left(ids, item_id)
+        return row if row < len(ids) and ids[row] == item_id else None
+
+    def name_bytes(self, row: int) -> bytearray:
+        # UTF-8 byte order matches code point order, so names compare the same
+        # encoded as decoded.
+        return self.names[self.name_ends[row] : self.name_ends[row + 1]]
+
+    def row(self, row: int) -> StoredItem:
+        return _make_item((self.ids[row], self.name_bytes(row).decode(), self.prices[row]))
+
+    def rows(self, start: int, stop: int) -> list[StoredItem]:
+        """Materialize the consecutive rows ``start:stop``."""
+        ends = self.name_ends[start : stop + 1]
+        text = self.names[ends[0] : ends[-1]].decode()
+        base = ends[0]
+        if len(text) == ends[-1] - base:
+            # ASCII only: byte offsets are character offsets.
+            names = [text[a - base : b - base] for a, b in zip(ends, islice(ends, 1, None))]
+        else:
+            names = [self.name_bytes(r).decode() for r in range(start, stop)]
+        return list(map(_make_item, zip(self.ids[start:stop], names, self.prices[start:stop])))
+
+    @property
+    def nbytes(self) -> int:
+        """Allocated size of all columns, in bytes."""
+        return sum(
+            sys.getsizeof(column)
+            for column in (self.ids, self.prices, self.name_ends, self.names)
+        )
+
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class PriceStats(NamedTuple):
+    count: int
+    total: float
+    minimum: float | None
+    maximum: float | None
+    percentiles: dict[int, float]
+    histogram: list[tuple[float, float, int]]
+
+
+def summarize_prices(
+    count: int,
+    total: float,
+    minimum: float,
+    maximum: float,
+    nth: Callable[[int], float],
+    count_range: Callable[[float, float], int],
+    buckets: int,
+) -> PriceStats:
+    """Build ``PriceStats`` from aggregates and sorted-order lookups.
+
+    ``nth(k)`` returns the k-th smallest price and ``count_range(low, high)``
+    the number of prices in ``[low, high)``. Percentiles interpolate linearly
+    between ranks; the histogram has ``buckets`` equal-width buckets from
+    ``minimum`` to ``maximum``, the last one including ``maximum``.
+    """
+    if count == 0:
+        return PriceStats(0, 0.0, None, None, {}, [])
+    percentiles = {}
+    for p in PERCENTILES:
+        position = (count - 1) * p / 100
+        rank = math.floor(position)
+        value = nth(rank)
+        if position > rank:
+            value += (nth(rank + 1) - value) * (position - rank)
+        percentiles[p] = value
+    width = (maximum - minimum) / buckets
+    if width == 0:
+        return PriceStats(count, total, minimum, maximum, percentiles, [(minimum, maximum, count)])
+    edges = [minimum + width * i for i in range(buckets)] + [maximum]
+    histogram = []
+    for i in range(buckets):
+        low, high = edges[i], edges[i + 1]
+        upper = high if i < buckets - 1 else math.nextafter(maximum, math.inf)
+        histogram.append((low, high, count_range(low, upper)))
+    return PriceStats(count, total, minimum, maximum, percentiles, histogram)
+
+
+def summarize_price_list(prices: list[float], buckets: int) -> PriceStats:
+    """``summarize_prices`` for an unsorted list of prices."""
+    if not prices:
+        return PriceStats(0, 0.0, None, None, {}, [])
+    prices.sort()
+    return summarize_prices(
+        len(prices),
+        math.fsum(prices),
+        prices[0],
+        prices[-1],
+        prices.__getitem__,
+        lambda low, high: bisect_left(prices, high) - bisect_left(prices, low),
+        buckets,
+    )
+
+
+class ItemRepository(ABC):
+    """Storage backend for items. IDs are allocated monotonically starting at 1."""
+
+    @abstractmethod
+    async def get(self, item_id: int) -> StoredItem | None: ...
+
+    @abstractmethod
+    async def get_many(self, item_ids: Sequence[int]) -> dict[int, StoredItem]:
+        """Look up several IDs at once; missing IDs are absent from the result."""
+
+    @abstractmethod
+    async def add(self, item: Item) -> StoredItem: ...
+
+    @abstractmethod
+    async def add_many(self, items: Sequence[Item]) -> list[StoredItem]:
+        """Store ``items`` atomically, allocating consecutive IDs in order."""
+
+    @abstractmethod
+    async def list_items(
+        self, after: int, limit: int, filters: ItemFilter = ItemFilter()
+    ) -> list[StoredItem]:
+        """Return up to ``limit`` matching items with ``item_id > after``, by ID."""
+
+    @abstractmethod
+    async def reserve_ids(self, count: int) -> int:
+        """Allocate ``count`` consecutive IDs without storing anything; return the first."""
+
+    @abstractmethod
+    async def insert(self, items: Sequence[StoredItem]) -> None:
+        """Store items whose IDs came from ``reserve_ids``, atomically and in ID order."""
+
+    @abstractmethod
+    async def count(self) -> int: ...
+
+    @abstractmethod
+    async def price_stats(
+        self, name_prefix: str | None = None, buckets: int = 10
+    ) -> PriceStats:
+        """Price statistics over all items, or those whose name has ``name_prefix``."""
+
+    async def stop(self) -> None:
+        """Finish background work before shutdown."""
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryItemRepository(ItemRepository):
+    """Columnar in-memory backend.
+
+    Items are kept in an ``ItemTable``. Sorted secondary indexes of row numbers
+    ordered by ``price`` and by ``name`` let listings locate a filter range by
+    binary search; the ID column is itself sorted and locates the cursor.
+
+    Running price aggregates are updated on every insert, and percentiles and
+    histogram counts of the whole catalog are lookups in the price index.
+    """
+
+    def __init__(self) -> None:
+        self._table = table = ItemTable()
+        self._by_price = SortedIndex(key=table.prices.__getitem__, typecode="q")
+        self._by_name = SortedIndex(key=table.name_bytes, typecode="q")
+        self._last_id = 0
+        self._price_total = 0.0
+        self._price_min = math.inf
+        self._price_max = -math.inf
+
+    def _index(self, stored: StoredItem) -> None:
+        row = self._table.append(stored.item_id, stored.name, stored.price)
+        self._by_price.add(row)
+        self._by_name.add(row)
+        self._price_total += stored.price
+        self._price_min = min(self._price_min, stored.price)
+        self._price_max = max(self._price_max, stored.price)
+
+    async def get(self, item_id: int) -> StoredItem | None:
+        row = self._table.find(item_id)
+        return self._table.row(row) if row is not None else None
+
+    async def get_many(self, item_ids: Sequence[int]) -> dict[int, StoredItem]:
+        table = self._table
+        found = {}
+        for item_id in item_ids:
+            row = table.find(item_id)
+            if row is not None:
+                found[item_id] = table.row(row)
+        return found
+
+    async def add(self, item: Item) -> StoredItem:
+        self._last_id += 1
+        stored = StoredItem(self._last_id, item.name, item.price)
+        self._index(stored)
+        return stored
+
+    async def add_many(self, items: Sequence[Item]) -> list[StoredItem]:
+        first_id = self._last_id + 1
+        stored = [
+            StoredItem(item_id, item.name, item.price)
+            for item_id, item in enumerate(items, start=first_id)
+        ]
+        for s in stored:
+            self._index(s)
+        self._last_id += len(stored)
+        return stored
+
+    async def reserve_ids(self, count: int) -> int:
+        first_id = self._last_id + 1
+        self._last_id += count
+        return first_id
+
+    async def insert(self, items: Sequence[StoredItem]) -> None:
+        for stored in items:
+            self._index(stored)
+
+    async def list_items(
+        self, after: int, limit: int, filters: ItemFilter = ItemFilter()
+    ) -> list[StoredItem]:
+        table = self._table
+        start = bisect_right(table.ids, after)
+        if not filters.active:
+            return table.rows(start, min(start + limit, len(table)))
+
+        prices = table.prices
+        min_price, max_price = filters.min_price, filters.max_price
+        prefix = filters.name_prefix.encode() if filters.name_prefix is not None else None
+
+        def matches(row: int) -> bool:
+            if min_price is not None and prices[row] < min_price:
+                return False
+            if max_price is not None and prices[row] > max_price:
+                return False
+            return prefix is None or table.name_bytes(row).startswith(prefix)
+
+        # Candidate rows from the narrowest filter index. 0xFF never occurs in
+        # UTF-8, so it bounds every name starting with the prefix.
+        ranges = []
+        if prefix is not None:
+            low, high = prefix, prefix + b"\xff"
+            size = self._by_name.count_range(low, high)
+            ranges.append((size, self._by_name, low, high))
+        if min_price is not None or max_price is not None:
+            low = min_price if min_price is not None else -math.inf
+            high = math.nextafter(max_price, math.inf) if max_price is not None else math.inf
+            size = self._by_price.count_range(low, high)
+            ranges.append((size, self._by_price, low, high))
+        size, index, low, high = min(ranges, key=lambda r: r[0])
+        if size == 0:
+            return []
+
+        # Walking the ID column from the cursor is expected to touch about
+        # limit * total / size rows; use whichever path is cheaper.
+        if limit * len(table) / size < size:
+            rows = []
+            for row in range(start, len(table)):
+                if matches(row):
+                    rows.append(row)
+                    if len(rows) == limit:
+                        break
+        else:
+            candidates = (
+                row for row in index.iter_range(low, high) if row >= start and matches(row)
+            )
+            rows = heapq.nsmallest(limit, candidates)
+        return [table.row(r) for r in rows]
+
+    async def count(self) -> int:
+        return len(self._table)
+
+    async def price_stats(
+        self, name_prefix: str | None = None, buckets: int = 10
+    ) -> PriceStats:
+        table = self._table
+        if name_prefix is not None:
+            prefix = name_prefix.encode()
+            rows = self._by_name.iter_range(prefix, prefix + b"\xff")
+            return summarize_price_list([table.prices[r] for r in rows], buckets)
+        prices = table.prices
+        return summarize_prices(
+            len(table),
+            self._price_total,
+            self._price_min,
+            self._price_max,
+            lambda k: prices[self._by_price.nth(k)],
+            self._by_price.count_range,
+            buckets,
+        )
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_price ON items (price);
+CREATE INDEX IF NOT EXISTS items_name ON items (name);
+CREATE TABLE IF NOT EXISTS item_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    min_price REAL,
+    max_price REAL
+);
+CREATE TRIGGER IF NOT EXISTS items_update_stats AFTER INSERT ON items BEGIN
+    UPDATE item_stats SET
+        count = count + 1,
+        total = total + NEW.price,
+        min_price = MIN(COALESCE(min_price, NEW.price), NEW.price),
+        max_price = MAX(COALESCE(max_price, NEW.price), NEW.price)
+    WHERE id = 1;
+END;
+"""
+_INIT_STATS = (
+    "INSERT OR IGNORE INTO item_stats"
+    " SELECT 1, COUNT(*), TOTAL(price), MIN(price), MAX(price) FROM items"
+)
+_SELECT_STATS = "SELECT count, total, min_price, max_price FROM item_stats"
+_NTH_PRICE = "SELECT price FROM items ORDER BY price LIMIT 1 OFFSET ?"
+_COUNT_PRICE_RANGE = "SELECT COUNT(*) FROM items WHERE price >= ? AND price < ?"
+_SELECT_PREFIX_PRICES = "SELECT price FROM items WHERE name >= ? AND name < ?"
+_SELECT_ITEM = "SELECT item_id, name, price FROM items WHERE item_id = ?"
+_SELECT_ITEMS = (
+    "SELECT item_id, name, price FROM items"
+    " WHERE item_id IN (SELECT value FROM json_each(?))"
+)
+_INSERT_ITEM = "INSERT INTO items (name, price) VALUES (?, ?) RETURNING item_id"
+_INSERT_ITEMS = "INSERT INTO items (name, price) VALUES (?, ?)"
+_INSERT_ITEMS_WITH_ID = "INSERT INTO items (item_id, name, price) VALUES (?, ?, ?)"
+_LAST_ID = "SELECT seq FROM sqlite_sequence WHERE name = 'items'"
+_SET_LAST_ID = "UPDATE sqlite_sequence SET seq = ? WHERE name = 'items'"
+_INIT_LAST_ID = "INSERT INTO sqlite_sequence (name, seq) VALUES ('items', ?)"
+_COUNT_ITEMS = "SELECT COUNT(*) FROM items"
+
+
+class SQLiteItemRepository(ItemRepository):
+    """SQLite backend in WAL mode.
+
+    Queries run in worker threads, each borrowing a connection from a fixed pool,
+    so the event loop is never blocked on disk I/O. Statements are constant SQL
+    strings and therefore hit sqlite3's per-connection prepared statement cache.
+    """
+
+    def __init__(
+        self, path: str, pool_size: int = 4, stats_refresh: float = 5.0
+    ) -> None:
+        self.stats_refresh = stats_refresh
+        # Catalog-wide stats by bucket count: (item count, computed at, stats).
+        self._stats: dict[int, tuple[int, float, PriceStats]] = {}
+        self._stats_lock = threading.Lock()
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(max(pool_size, 1)):
+            self._pool.put(self._connect(path))
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            # Seed the running aggregates the trigger maintains from then on.
+            if conn.execute(_SELECT_STATS).fetchone() is None:
+                conn.execute(_INIT_STATS)
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _get(self, item_id: int) -> StoredItem | None:
+        with self._connection() as conn:
+            row = conn.execute(_SELECT_ITEM, (item_id,)).fetchone()
+        return StoredItem(*row) if row else None
+
+    def _get_many(self, ids_json: str) -> dict[int, StoredItem]:
+        with self._connection() as conn:
+            rows = conn.execute(_SELECT_ITEMS, (ids_json,)).fetchall()
+        return {row[0]: StoredItem(*row) for row in rows}
+
+    def _add(self, name: str, price: float) -> StoredItem:
+        with self._connection() as conn:
+            (item_id,) = conn.execute(_INSERT_ITEM, (name, price)).fetchone()
+        return StoredItem(item_id, name, price)
+
+    def _add_many(self, rows: list[tuple[str, float]]) -> list[StoredItem]:
+        with self._connection() as conn:
+            # The write lock taken by BEGIN IMMEDIATE guarantees the AUTOINCREMENT
+            # IDs of this batch are consecutive after the current sequence value.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(_LAST_ID).fetchone()
+                conn.executemany(_INSERT_ITEMS, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        first_id = (row[0] if row else 0) + 1
+        return [
+            StoredItem(item_id, name, price)
+            for item_id, (name, price) in enumerate(rows, start=first_id)
+        ]
+
+    def _reserve_ids(self, count: int) -> int:
+        with self._connection() as conn:
+            # Advancing the AUTOINCREMENT sequence keeps the reserved IDs from
+            # being handed out again, by this process or any other.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(_LAST_ID).fetchone()
+                last_id = row[0] if row else 0
+                conn.execute(_SET_LAST_ID if row else _INIT_LAST_ID, (last_id + count,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return last_id + 1
+
+    def _insert(self, rows: list[tuple[int, str, float]]) -> None:
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_INSERT_ITEMS_WITH_ID, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _list_items(self, sql: str, params: tuple) -> list[StoredItem]:
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [StoredItem(*row) for row in rows]
+
+    def _count(self) -> int:
+        with self._connection() as conn:
+            return conn.execute(_COUNT_ITEMS).fetchone()[0]
+
+    def _price_stats(self, name_prefix: str | None, buckets: int) -> PriceStats:
+        with self._connection() as conn:
+            if name_prefix is not None:
+                params = (name_prefix, name_prefix + _MAX_CHAR)
+                rows = conn.execute(_SELECT_PREFIX_PRICES, params).fetchall()
+                return summarize_price_list([row[0] for row in rows], buckets)
+            # Percentile and bucket lookups walk the price index up to their
+            # offset, which is linear in the catalog size, so their results are
+            # reused until items are added and PRICE_STATS_REFRESH_SECONDS have passed.
+            with self._stats_lock:
+                count = conn.execute(_SELECT_STATS).fetchone()[0]
+                cached = self._stats.get(buckets)
+                if cached is not None and (
+                    cached[0] == count
+                    or time.monotonic() - cached[1] < self.stats_refresh
+                ):
+                    return cached[2]
+                stats = self._compute_price_stats(conn, buckets)
+                self._stats[buckets] = (stats.count, time.monotonic(), stats)
+                return stats
+
+    @staticmethod
+    def _compute_price_stats(conn: sqlite3.Connection, buckets: int) -> PriceStats:
+        # One read transaction so every lookup sees the same snapshot.
+        conn.execute("BEGIN")
+        try:
+            count, total, minimum, maximum = conn.execute(_SELECT_STATS).fetchone()
+            return summarize_prices(
+                count,
+                total,
+                minimum,
+                maximum,
+                lambda k: conn.execute(_NTH_PRICE, (k,)).fetchone()[0],
+                lambda low, high: conn.execute(
+                    _COUNT_PRICE_RANGE, (low, high)
+                ).fetchone()[0],
+                buckets,
+            )
+        finally:
+            conn.execute("COMMIT")
+
+    async def get(self, item_id: int) -> StoredItem | None:
+        return await to_thread.run_sync(self._get, item_id)
+
+    async def get_many(self, item_ids: Sequence[int]) -> dict[int, StoredItem]:
+        if not item_ids:
+            return {}
+        return await to_thread.run_sync(self._get_many, json.dumps(list(item_ids)))
+
+    async def add(self, item: Item) -> StoredItem:
+        return await to_thread.run_sync(self._add, item.name, item.price)
+
+    async def add_many(self, items: Sequence[Item]) -> list[StoredItem]:
+        if not items:
+            return []
+        rows = [(item.name, item.price) for item in items]
+        return await to_thread.run_sync(self._add_many, rows)
+
+    async def reserve_ids(self, count: int) -> int:
+        return await to_thread.run_sync(self._reserve_ids, count)
+
+    async def insert(self, items: Sequence[StoredItem]) -> None:
+        if items:
+            await to_thread.run_sync(self._insert, [tuple(s) for s in items])
+
+    async def list_items(
+        self, after: int, limit: int, filters: ItemFilter = ItemFilter()
+    ) -> list[StoredItem]:
+        # Only the set of active conditions varies, so there are a handful of
+        # distinct statements and each stays in the prepared statement cache.
+        clauses = ["item_id > ?"]
+        params: list = [after]
+        if filters.min_price is not None:
+            clauses.append("price >= ?")
+            params.append(filters.min_price)
+        if filters.max_price is not None:
+            clauses.append("price <= ?")
+            params.append(filters.max_price)
+        if filters.name_prefix is not None:
+            clauses.append("name >= ? AND name < ?")
+            params += [filters.name_prefix, filters.name_prefix + _MAX_CHAR]
+        sql = (
+            "SELECT item_id, name, price FROM items WHERE "
+            + " AND ".join(clauses)
+            + " ORDER BY item_id LIMIT ?"
+        )
+        params.append(limit)
+        return await to_thread.run_sync(self._list_items, sql, tuple(params))
+
+    async def count(self) -> int:
+        return await to_thread.run_sync(self._count)
+
+    async def price_stats(
+        self, name_prefix: str | None = None, buckets: int = 10
+    ) -> PriceStats:
+        return await to_thread.run_sync(self._price_stats, name_prefix, buckets)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def create_repository(settings: Settings) -> ItemRepository:
+    if settings.store_backend == "memory":
+        repository: ItemRepository = InMemoryItemRepository()
+    elif settings.store_backend == "sqlite":
+        repository = SQLiteItemRepository(
+            settings.sqlite_path,
+            settings.sqlite_pool_size,
+            settings.price_stats_refresh_seconds,
+        )
+    else:
+        raise ValueError(f"Unknown store backend: {settings.store_backend}")
+    if settings.write_behind:
+        from .write_behind import WriteBehindRepository
+
+        repository = WriteBehindRepository(
+            repository,
+            queue_size=settings.write_behind_queue_size,
+            batch_size=settings.write_behind_batch_size,
+            flush_interval=settings.write_behind_flush_seconds,
+            durability=settings.write_behind_durability,
+        )
+    return repository
+
+
+_repository: ItemRepository | None = None
+
+
+def get_repository() -> ItemRepository:
+    global _repository
+    if _repository is None:
+        _repository = create_repository(get_settings())
+    return _repository
+
+
+async def shutdown_repository() -> None:
+    """Let the repository finish background writes, then release it."""
+    global _repository
+    if _repository is not None:
+        await _repository.stop()
+        _repository.close()
+        _repository = None
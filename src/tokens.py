@@ -0,0 +1,160 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Any
+
+# DER encoded DigestInfo prefix for SHA-256 (RFC 8017, section 9.2).
+_SHA256_DIGEST_INFO = bytes.fromhex("3031300d060960864801650304020105000420")
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+def b64url_decode(data: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except (ValueError, TypeError) as exc:
+        raise InvalidTokenError("Malformed base64url segment") from exc
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64url_int(data: str) -> int:
+    return int.from_bytes(b64url_decode(data), "big")
+
+
+def _verify_hs256(key: bytes, signing_input: bytes, signature: bytes) -> bool:
+    expected = hmac.new(key, signing_input, hashlib.sha256).digest()
+    return hmac.compare_digest(expected, signature)
+
+
+def _verify_rs256(
+    n: int, e: int, signing_input: bytes, signature: bytes
+) -> bool:
+    # RSASSA-PKCS1-v1_5 verification: recover the encoded message and compare
+    # it with the expected padding + DigestInfo.
+    size = (n.bit_length() + 7) // 8
+    if len(signature) != size:
+        return False
+    recovered = pow(int.from_bytes(signature, "big"), e, n).to_bytes(size, "big")
+    digest_info = _SHA256_DIGEST_INFO + hashlib.sha256(signing_input).digest()
+    padding = b"\xff" * (size - len(digest_info) - 3)
+    return hmac.compare_digest(recovered, b"\x00\x01" + padding + b"\x00" + digest_info)
+
+
+class KeySet:
+    """Verification keys loaded from a JWKS-style JSON file.
+
+    The file is re-read when its modification time changes, which allows keys
+    to be rotated without restarting the process.
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 30.0) -> None:
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._keys: list[dict[str, Any]] = []
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+        self.refresh()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the file if it changed; returns True when keys were reloaded.
+
+        The modification time is checked at most once per ``refresh_interval``
+        unless ``force`` is set.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return False
+        self._checked_at = now
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self._mtime:
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            document = json.load(f)
+        self._keys = [self._parse_key(jwk) for jwk in document.get("keys", [])]
+        self._mtime = mtime
+        self.version += 1
+        return True
+
+    @staticmethod
+    def _parse_key(jwk: dict[str, Any]) -> dict[str, Any]:
+        kty = jwk.get("kty")
+        if kty == "oct":
+            return {"kid": jwk.get("kid"), "alg": "HS256", "k": b64url_decode(jwk["k"])}
+        if kty == "RSA":
+            return {
+                "kid": jwk.get("kid"),
+                "alg": "RS256",
+                "n": _b64url_int(jwk["n"]),
+                "e": _b64url_int(jwk["e"]),
+            }
+        raise ValueError(f"Unsupported key type: {kty}")
+
+    def candidates(self, alg: str, kid: str | None) -> list[dict[str, Any]]:
+        keys = [
+            k for k in self._keys if k["alg"] == alg and (kid is None or k["kid"] == kid)
+        ]
+        if not keys and kid is not None and self.refresh(force=True):
+            return self.candidates(alg, kid)
+        return keys
+
+
+def decode_jwt(
+    token: str,
+    keys: KeySet,
+    audience: str | None = None,
+    leeway: float = 0,
+    now: float | None = None,
+) -> dict[str, Any]:
+    """Verify an HS256/RS256 JWT and return its claims."""
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(b64url_decode(header_b64))
+        claims = json.loads(b64url_decode(payload_b64))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidTokenError("Malformed token") from exc
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise InvalidTokenError("Malformed token")
+
+    alg = header.get("alg")
+    if alg not in ("HS256", "RS256"):
+        raise InvalidTokenError("Unsupported algorithm")
+    signing_input = f"{header_b64}.{payload_b64}".encode()
+    signature = b64url_decode(signature_b64)
+    for key in keys.candidates(alg, header.get("kid")):
+        if alg == "HS256":
+            valid = _verify_hs256(key["k"], signing_input, signature)
+        else:
+            valid = _verify_rs256(key["n"], key["e"], signing_input, signature)
+        if valid:
+            break
+    else:
+        raise InvalidTokenError("Invalid signature")
+
+    for claim in ("exp", "nbf"):
+        value = claims.get(claim)
+        if value is not None and (
+            isinstance(value, bool) or not isinstance(value, (int, float))
+        ):
+            raise InvalidTokenError(f"Malformed {claim} claim")
+    now = time.time() if now is None else now
+    exp = claims.get("exp")
+    if exp is not None and now >= exp + leeway:
+        raise InvalidTokenError("Token expired")
+    nbf = claims.get("nbf")
+    if nbf is not None and now < nbf - leeway:
+        raise InvalidTokenError("Token not yet valid")
+    if audience is not None:
+        aud = claims.get("aud")
+        audiences = aud if isinstance(aud, list) else [aud]
+        if audience not in audiences:
+            raise InvalidTokenError("Invalid audience")
+    return claims
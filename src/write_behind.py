@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from typing import Sequence
+
+from .models import Item
+from .store import ItemFilter, ItemRepository, PriceStats, StoredItem
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("commit", "enqueue")
+
+
+class WriteQueueFull(Exception):
+    """Raised by ``add`` when the write-behind queue is at capacity."""
+
+
+class WriteBehindRepository(ItemRepository):
+    """Repository wrapper that batches single-item writes in the background.
+
+    ``add`` assigns an ID right away from a block reserved in the backing
+    store and puts the item on a bounded queue, which a background task
+    writes to the store in batched transactions of up to ``batch_size`` items.
+
+    With ``durability="commit"`` ``add`` returns once the item's batch has
+    committed. Batches are written back to back, each taking whatever queued
+    up during the previous commit, so concurrent requests share commits
+    without waiting on a timer. With ``"enqueue"`` ``add`` returns as soon as
+    the item is queued and a batch is written once ``batch_size`` items are
+    queued or ``flush_interval`` seconds after its first item; an item can
+    then be lost if the process dies before its batch commits.
+
+    Queued items are visible to ``get`` and ``get_many`` straight away;
+    listings, counts and stats only include committed items. With several
+    workers, each reserving its own blocks, IDs commit out of order, so a
+    keyset listing can move past a lower ID that commits later.
+
+    The background task runs on the event loop of the first ``add``. ``stop``
+    drains the queue and ends it; ``close`` cancels it if ``stop`` was not
+    awaited, and ``add`` from a different event loop raises ``RuntimeError``.
+    """
+
+    def __init__(
+        self,
+        inner: ItemRepository,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        durability: str = "commit",
+    ) -> None:
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self._inner = inner
+        self._queue: asyncio.Queue[tuple[StoredItem, asyncio.Future | None]] = (
+            asyncio.Queue(queue_size)
+        )
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._durability = durability
+        self._pending: dict[int, StoredItem] = {}
+        self._lock = asyncio.Lock()
+        self._batch_ready = asyncio.Event()
+        self._next_id = 0
+        self._block_end = 0
+        self._task: asyncio.Task | None = None
+
+    async def _allocate(self, count: int) -> int:
+        # Callers hold self._lock, so IDs are handed out in queue order.
+        if self._next_id + count > self._block_end:
+            size = max(count, self._batch_size)
+            self._next_id = await self._inner.reserve_ids(size)
+            self._block_end = self._next_id + size
+        first_id = self._next_id
+        self._next_id += count
+        return first_id
+
+    async def add(self, item: Item) -> StoredItem:
+        if self._queue.full():
+            raise WriteQueueFull
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        elif self._task.get_loop() is not asyncio.get_running_loop():
+            # Its loop has gone (e.g. the app ran without its lifespan), so a
+            # commit future from it would never resolve.
+            raise RuntimeError("Write-behind writer runs on another event loop")
+        async with self._lock:
+            stored = StoredItem(await self._allocate(1), item.name, item.price)
+            committed = None
+            if self._durability == "commit":
+                committed = asyncio.get_running_loop().create_future()
+            try:
+                self._queue.put_nowait((stored, committed))
+            except asyncio.QueueFull:
+                raise WriteQueueFull from None
+            self._pending[stored.item_id] = stored
+            if self._queue.qsize() >= self._batch_size - 1:
+                self._batch_ready.set()
+        if committed is not None:
+            await committed
+        return stored
+
+    async def add_many(self, items: Sequence[Item]) -> list[StoredItem]:
+        if not items:
+            return []
+        async with self._lock:
+            first_id = await self._allocate(len(items))
+            stored = [
+                StoredItem(item_id, item.name, item.price)
+                for item_id, item in enumerate(items, start=first_id)
+            ]
+            # Earlier IDs must reach the store first.
+            await self._queue.join()
+            await self._inner.insert(stored)
+        return stored
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self._durability == "enqueue" and self._queue.qsize() < self._batch_size - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self._flush_interval)
+                except TimeoutError:
+                    pass
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[StoredItem, asyncio.Future | None]]) -> None:
+        error = None
+        try:
+            await self._inner.insert([stored for stored, _ in batch])
+        except Exception as exc:
+            logger.exception("Write-behind batch of %d items failed", len(batch))
+            error = exc
+        for stored, committed in batch:
+            self._pending.pop(stored.item_id, None)
+            if committed is not None and not committed.done():
+                if error is None:
+                    committed.set_result(None)
+                else:
+                    committed.set_exception(error)
+            self._queue.task_done()
+
+    async def stop(self) -> None:
+        """Write out everything queued, then stop the background task."""
+        if self._task is not None:
+            self._batch_ready.set()
+            await self._queue.join()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._inner.stop()
+
+    async def get(self, item_id: int) -> StoredItem | None:
+        pending = self._pending.get(item_id)
+        if pending is not None:
+            return pending
+        return await self._inner.get(item_id)
+
+    async def get_many(self, item_ids: Sequence[int]) -> dict[int, StoredItem]:
+        found = {i: self._pending[i] for i in item_ids if i in self._pending}
+        rest = [i for i in item_ids if i not in found]
+        if rest:
+            found.update(await self._inner.get_many(rest))
+        return found
+
+    async def reserve_ids(self, count: int) -> int:
+        return await self._inner.reserve_ids(count)
+
+    async def insert(self, items: Sequence[StoredItem]) -> None:
+        await self._inner.insert(items)
+
+    async def list_items(
+        self, after: int, limit: int, filters: ItemFilter = ItemFilter()
+    ) -> list[StoredItem]:
+        return await self._inner.list_items(after, limit, filters)
+
+    async def count(self) -> int:
+        return await self._inner.count()
+
+    async def price_stats(
+        self, name_prefix: str | None = None, buckets: int = 10
+    ) -> PriceStats:
+        return await self._inner.price_stats(name_prefix, buckets)
+
+    def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            # stop() was not awaited; do not leave the writer pending.
+            loop = task.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(task.cancel)
+        self._inner.close()
@@ -0,0 +1,155 @@
+import httpx
+import pytest
+from main import app
+from src import (
+    auth,
+    idempotency,
+    metrics,
+    profiling,
+    ratelimit,
+    response_cache,
+    search,
+    singleflight,
+    store,
+)
+from tests.perf_budget import LatencyBudget, load_budgets, save_budgets
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("perf", "latency budgets")
+    group.addoption(
+        "--perf",
+        action="store_true",
+        help="run tests marked perf_budget and fail when latency exceeds the budget",
+    )
+    group.addoption(
+        "--perf-tolerance",
+        type=float,
+        default=1.0,
+        help="fraction a percentile may exceed its budget by (default 1.0)",
+    )
+    group.addoption(
+        "--perf-record",
+        action="store_true",
+        help="run tests marked perf_budget and store their latencies as budgets",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf") or config.getoption("--perf-record"):
+        return
+    skip = pytest.mark.skip(reason="latency budgets are checked with --perf")
+    for item in items:
+        if item.get_closest_marker("perf_budget") is not None:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def recorded_budgets(request):
+    """--perf-record指定時に計測値を集め、終了時に予算として保存する"""
+    if not request.config.getoption("--perf-record"):
+        yield None
+        return
+    recorded = {}
+    yield recorded
+    save_budgets({**load_budgets(), **recorded})
+
+
+@pytest.fixture
+def latency_budget(request, recorded_budgets):
+    """perf_budgetマーカーで指定されたエンドポイントのレイテンシ予算"""
+    endpoint = request.node.get_closest_marker("perf_budget").args[0]
+    return LatencyBudget(
+        endpoint,
+        load_budgets().get(endpoint),
+        request.config.getoption("--perf-tolerance"),
+        recorded_budgets,
+    )
+
+
+@pytest.fixture
+async def async_client():
+    """main.appにASGIで接続する非同期クライアント"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def repository(monkeypatch):
+    """テストごとに空のインメモリストアを使用する"""
+    repo = store.InMemoryItemRepository()
+    monkeypatch.setattr(store, "_repository", repo)
+    return repo
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """テストごとに空のレスポンスキャッシュを使用する"""
+    fresh = response_cache.ResponseCache(1024 * 1024)
+    monkeypatch.setattr(response_cache, "_response_cache", fresh)
+    return fresh
+
+
+@pytest.fixture(autouse=True)
+def idempotency_cache(monkeypatch):
+    """テストごとに空の冪等性キャッシュを使用する"""
+    fresh = idempotency.IdempotencyCache(1024 * 1024, 60.0)
+    monkeypatch.setattr(idempotency, "_idempotency_cache", fresh)
+    return fresh
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """テストごとに空のメトリクスレジストリを使用する"""
+    fresh = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, "_registry", fresh)
+    return fresh
+
+
+@pytest.fixture(autouse=True)
+def flight_groups(monkeypatch):
+    """テストごとにシングルフライトのグループを初期化する"""
+    groups = {}
+    monkeypatch.setattr(singleflight, "_groups", groups)
+    return groups
+
+
+@pytest.fixture(autouse=True)
+def rate_limiter(monkeypatch):
+    """テストごとにレート制限の状態を初期化する"""
+    monkeypatch.setattr(ratelimit, "_limiter", None)
+
+
+@pytest.fixture(autouse=True)
+def auth_sessions(monkeypatch):
+    """テストごとに認証セッションを初期化する"""
+    monkeypatch.setattr(auth, "_sessions", None)
+
+
+@pytest.fixture(autouse=True)
+def search_index(monkeypatch):
+    """テストごとに空の検索インデックスを使用する"""
+    fresh = search.SearchIndex()
+    monkeypatch.setattr(search, "_index", fresh)
+    return fresh
+
+
+@pytest.fixture(autouse=True)
+def slow_requests(monkeypatch):
+    """テストごとに低速リクエストの記録を初期化する"""
+    monkeypatch.setattr(metrics, "_slow_requests", None)
+
+
+@pytest.fixture(autouse=True)
+def profiler(monkeypatch):
+    """テストごとに新しいプロファイラを使用し、終了時に停止する"""
+    fresh = profiling.SamplingProfiler()
+    monkeypatch.setattr(profiling, "_profiler", fresh)
+    yield fresh
+    fresh.stop()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,63 @@
+"""テスト用のJWT生成ヘルパー"""
+
+import hashlib
+import hmac
+import json
+
+from src.tokens import b64url_encode
+
+HS_KEY = b"test-secret-key-0123456789abcdef"
+
+# テスト専用の1024bit RSA鍵（本番では使用しないこと）
+RSA_N = int(
+    "4cea5b1b557ba7fa5b014f2302c173ef5a7a6cb44dbed6ebf4d8a46c9c41be4c"
+    "987d7ca0892f7453bc1a16a353bce450b3f1575dbd23335e280405e0207b927b"
+    "14fad0b737faef0777f66d34a28d87def1dd329d1f0e75dabf4d8ba0ca77bd20"
+    "b128cccf6631fe7ff0d27c3b422cb06d315334fae0b0c913adf27e1df8dce88f",
+    16,
+)
+RSA_E = 65537
+RSA_D = int(
+    "229674b7dafe0b70c2c1d8f37686c5fac9a62a01fec025e7dfa818709ae7d98a"
+    "9a3c3bf1f91ef4e1bec1c0925bd2a29d43fdf07abfd5f7808ce01a404a7b2748"
+    "61b8902a53036352f8e74dcc67383086a9bfadbefc7333bf5842c933faebe2c4"
+    "3210f56ef9894d55ec610ca0e4f6578cdf448d337cb02e6d72491f26c4b52519",
+    16,
+)
+_SHA256_DIGEST_INFO = bytes.fromhex("3031300d060960864801650304020105000420")
+
+
+def _int_b64(value: int) -> str:
+    return b64url_encode(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def jwks(hs_kid: str = "hs-1", rsa_kid: str = "rsa-1") -> dict:
+    return {
+        "keys": [
+            {"kty": "oct", "kid": hs_kid, "k": b64url_encode(HS_KEY)},
+            {"kty": "RSA", "kid": rsa_kid, "n": _int_b64(RSA_N), "e": _int_b64(RSA_E)},
+        ]
+    }
+
+
+def make_token(claims: dict, alg: str = "HS256", kid: str | None = None) -> str:
+    header = {"alg": alg, "typ": "JWT"}
+    if kid is not None:
+        header["kid"] = kid
+    signing_input = (
+        b64url_encode(json.dumps(header).encode())
+        + "."
+        + b64url_encode(json.dumps(claims).encode())
+    )
+    if alg == "HS256":
+        signature = hmac.new(HS_KEY, signing_input.encode(), hashlib.sha256).digest()
+    else:
+        size = (RSA_N.bit_length() + 7) // 8
+        digest_info = (
+            _SHA256_DIGEST_INFO + hashlib.sha256(signing_input.encode()).digest()
+        )
+        padded = (
+            b"\x00\x01" + b"\xff" * (size - len(digest_info) - 3) + b"\x00" + digest_info
+        )
+        signature = pow(int.from_bytes(padded, "big"), RSA_D, RSA_N).to_bytes(size, "big")
+    return signing_input + "." + b64url_encode(signature)
@@ -0,0 +1,75 @@
+"""Latency budgets for tests marked ``perf_budget``.
+
+Budgets live in ``perf_budgets.json`` as p50/p99 latency in microseconds per
+endpoint (``"GET /items/{item_id}"``). Latency is measured in several rounds
+and each percentile taken from its best round, as ``timeit`` does, so other
+load on the machine is not mistaken for a regression. A measured percentile
+may exceed its budget by the ``--perf-tolerance`` fraction. ``--perf-record``
+replaces the budgets of the endpoints measured in the run with the new
+figures.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.common import percentiles
+
+BUDGETS_FILE = Path(__file__).with_name("perf_budgets.json")
+CHECKED = ("p50_us", "p99_us")
+
+
+def load_budgets(path: Path = BUDGETS_FILE) -> dict[str, dict[str, float]]:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_budgets(
+    budgets: dict[str, dict[str, float]], path: Path = BUDGETS_FILE
+) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(budgets.items())), f, indent=2)
+        f.write("\n")
+
+
+class LatencyBudget:
+    """Checks latency samples of one endpoint against its stored budget."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        budget: dict[str, float] | None,
+        tolerance: float,
+        recorded: dict[str, dict[str, float]] | None = None,
+    ) -> None:
+        self.endpoint = endpoint
+        self.budget = budget
+        self.tolerance = tolerance
+        # With --perf-record, measurements are collected here instead of checked.
+        self.recorded = recorded
+
+    def check(self, rounds: list[list[float]]) -> dict[str, float]:
+        """Fail the test if the best round's p50 or p99 is over budget."""
+        per_round = [percentiles(samples) for samples in rounds]
+        measured = {key: min(result[key] for result in per_round) for key in CHECKED}
+        if self.recorded is not None:
+            self.recorded[self.endpoint] = measured
+            return measured
+        if self.budget is None:
+            pytest.fail(
+                f"No latency budget for {self.endpoint}; run with --perf-record"
+            )
+        over = [
+            f"{key} {measured[key]:.0f}us > budget {self.budget[key]:.0f}us"
+            for key in CHECKED
+            if measured[key] > self.budget[key] * (1 + self.tolerance)
+        ]
+        if over:
+            pytest.fail(
+                f"{self.endpoint} latency regressed beyond "
+                f"{self.tolerance:.0%} tolerance: " + ", ".join(over)
+            )
+        return measured
@@ -1,7 +1,21 @@
+import json
+import os
+import sys
+import threading
+import time
+
 import pytest
 from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
-from src.auth import verify_token
+from fastapi.testclient import TestClient
+from main import app
+from src import auth
+from src.auth import AuthSessions, JWTVerifier, create_verifier, verify_token
+from src.config import Settings
+from src.tokens import InvalidTokenError, KeySet
+from tests.jwt_helpers import jwks, make_token
+
+client = TestClient(app)
 
 
 class TestVerifyToken:
@@ -70,3 +84,238 @@ class TestVerifyToken:
 
         assert exc_info.value.status_code == 401
         assert exc_info.value.detail == "Invalid token"
+
+
+class TestJWTVerifier:
+    """JWTVerifierクラスのテストクラス"""
+
+    @pytest.fixture
+    def verifier(self, tmp_path):
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks()))
+        return JWTVerifier(KeySet(str(path)), audience="api")
+
+    def test_verify_caches_claims(self, verifier):
+        """検証済みトークンがキャッシュされ、再検証されないことを確認"""
+        token = make_token({"sub": "u1", "aud": "api", "exp": time.time() + 60})
+        assert verifier.verify(token)["sub"] == "u1"
+        assert verifier.verify(token)["sub"] == "u1"
+        assert (verifier.cache.hits, verifier.cache.misses) == (1, 1)
+
+    def test_cache_entry_expires_with_token(self, verifier):
+        """トークンの有効期限でキャッシュエントリも失効することを確認"""
+        token = make_token({"sub": "u1", "aud": "api", "exp": time.time() + 60})
+        verifier.verify(token)
+        entry = next(iter(verifier.cache._entries.values()))
+        assert entry[1] <= time.time() + 60
+
+    def test_invalid_tokens_not_cached(self, verifier):
+        """検証に失敗したトークンはキャッシュされないことを確認"""
+        token = make_token({"sub": "u1", "aud": "other"})
+        for _ in range(2):
+            with pytest.raises(InvalidTokenError):
+                verifier.verify(token)
+        assert len(verifier.cache) == 0
+
+    def test_concurrent_verification(self, tmp_path):
+        """スレッドプールから同時に検証してもキャッシュが壊れないことを確認"""
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks()))
+        verifier = JWTVerifier(KeySet(str(path)), audience="api", cache_size=4)
+        tokens = [
+            make_token({"sub": f"u{i}", "aud": "api", "exp": time.time() + 60})
+            for i in range(12)
+        ]
+        errors = []
+
+        def worker(seed: int) -> None:
+            try:
+                for i in range(300):
+                    index = (seed + i) % len(tokens)
+                    assert verifier.verify(tokens[index])["sub"] == f"u{index}"
+                    if i % 50 == 0:
+                        verifier.cache.clear()
+            except Exception as exc:
+                errors.append(exc)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert errors == []
+        assert verifier.cache.weight == len(verifier.cache) <= 4
+
+    def test_entry_from_before_key_reload_not_reused(self, verifier, monkeypatch):
+        """鍵セットの再読み込み前のバージョンで検証されたエントリは再利用されないことを確認"""
+        decoded = []
+        decode = auth.decode_jwt
+        monkeypatch.setattr(
+            auth, "decode_jwt", lambda *args: decoded.append(args) or decode(*args)
+        )
+        token = make_token({"sub": "u1", "aud": "api", "exp": time.time() + 60})
+        verifier.verify(token)
+        [(key, ((claims, version), _, _))] = verifier.cache._entries.items()
+        # As if another thread finished verifying just after the keys changed.
+        verifier.cache.set(key, (claims, version - 1))
+        verifier.verify(token)
+        assert len(decoded) == 2
+        assert verifier.cache.get(key, count=False) == (claims, version)
+
+
+class TestVerifyTokenJWTMode:
+    """JWTモードでのverify_token関数のテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def jwt_mode(self, tmp_path, monkeypatch):
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks()))
+        settings = Settings(auth_mode="jwt", jwt_keys_file=str(path))
+        monkeypatch.setattr(auth, "_verifier", create_verifier(settings))
+
+    def test_valid_jwt(self):
+        """有効なJWTの場合、トークンを返すことを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() + 60}, "RS256")
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        assert verify_token(credentials) == token
+
+    def test_expired_jwt(self):
+        """期限切れのJWTの場合、HTTPExceptionが発生することを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() - 1})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        with pytest.raises(HTTPException) as exc_info:
+            verify_token(credentials)
+        assert exc_info.value.status_code == 401
+
+    def test_static_token_rejected(self):
+        """JWTモードでは固定トークンが拒否されることを確認"""
+        credentials = HTTPAuthorizationCredentials(
+            scheme="Bearer", credentials="mocked-jwt-token"
+        )
+        with pytest.raises(HTTPException):
+            verify_token(credentials)
+
+
+SCOPE = {"type": "http", "client": ("10.0.0.1", 40000), "server": ("10.0.0.2", 8000)}
+
+
+class TestAuthSessions:
+    """AuthSessionsクラスのテストクラス"""
+
+    @pytest.fixture
+    def clock(self):
+        now = [1000.0]
+        return now
+
+    @pytest.fixture
+    def sessions(self, clock):
+        return AuthSessions(10, ttl=300.0, clock=lambda: clock[0])
+
+    def test_reused_for_same_connection_and_token(self, sessions):
+        """同じ接続で同じトークンの場合のみセッションが再利用されることを確認"""
+        sessions.put(SCOPE, "token-a", {"sub": "a"}, 0)
+        assert sessions.get(SCOPE, "token-a", 0) == {"sub": "a"}
+        assert sessions.get(SCOPE, "token-b", 0) is None
+        other = {**SCOPE, "client": ("10.0.0.1", 40001)}
+        assert sessions.get(other, "token-a", 0) is None
+
+    def test_expires_with_token(self, sessions, clock):
+        """トークンの有効期限（猶予を含む）でセッションが失効することを確認"""
+        sessions.put(SCOPE, "token-a", {"sub": "a", "exp": 1010.0}, 0, leeway=5.0)
+        clock[0] = 1014.0
+        assert sessions.get(SCOPE, "token-a", 0) is not None
+        clock[0] = 1015.0
+        assert sessions.get(SCOPE, "token-a", 0) is None
+
+    def test_expires_after_ttl(self, sessions, clock):
+        """有効期限のないトークンでもttl経過後に失効することを確認"""
+        sessions.put(SCOPE, "token-a", {"sub": "a"}, 0)
+        clock[0] += 300.0
+        assert sessions.get(SCOPE, "token-a", 0) is None
+
+    def test_invalidated_by_key_version(self, sessions):
+        """鍵セットの再読み込み後はセッションが使われないことを確認"""
+        sessions.put(SCOPE, "token-a", {"sub": "a"}, 1)
+        assert sessions.get(SCOPE, "token-a", 2) is None
+
+    def test_no_session_without_client_address(self, sessions):
+        """クライアントアドレスのない接続ではセッションを作らないことを確認"""
+        scope = {**SCOPE, "client": None}
+        sessions.put(scope, "token-a", {"sub": "a"}, 0)
+        assert sessions.get(scope, "token-a", 0) is None
+        assert len(sessions.cache) == 0
+
+
+class TestAuthenticate:
+    """authenticate依存関数（認証セッション有効時）のテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def jwt_mode(self, tmp_path, monkeypatch):
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks()))
+        settings = Settings(auth_mode="jwt", jwt_keys_file=str(path), auth_sessions=True)
+        verifier = create_verifier(settings)
+        monkeypatch.setattr(auth, "_verifier", verifier)
+        monkeypatch.setattr(auth, "get_settings", lambda: settings)
+        return path
+
+    @pytest.fixture
+    def verify_calls(self, monkeypatch):
+        calls = []
+        verify = auth._verifier.verify
+        monkeypatch.setattr(
+            auth._verifier, "verify", lambda token: calls.append(token) or verify(token)
+        )
+        return calls
+
+    def test_second_request_skips_verification(self, verify_calls):
+        """同じ接続の2回目以降のリクエストではトークンを再検証しないことを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() + 60}, "RS256")
+        headers = {"Authorization": f"Bearer {token}"}
+        for _ in range(3):
+            assert client.get("/items/1", headers=headers).status_code == 404
+        assert verify_calls == [token]
+
+    def test_other_token_is_verified(self, verify_calls):
+        """同じ接続でも異なるトークンは検証され、無効なら401になることを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() + 60})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/items/1", headers=headers).status_code == 404
+        response = client.get("/items/1", headers={"Authorization": "Bearer bad"})
+        assert response.status_code == 401
+        assert verify_calls == [token, "bad"]
+
+    def test_expired_session_is_verified_again(self, verify_calls):
+        """トークンの有効期限が切れると再検証されて401になることを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() + 0.2})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/items/1", headers=headers).status_code == 404
+        time.sleep(0.3)
+        assert client.get("/items/1", headers=headers).status_code == 401
+        assert verify_calls == [token, token]
+
+    def test_key_reload_ends_sessions(self, jwt_mode, verify_calls):
+        """鍵セットが再読み込みされるとセッションが破棄されることを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() + 60}, "RS256")
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/items/1", headers=headers).status_code == 404
+        auth._verifier.keys.refresh_interval = 0
+        jwt_mode.write_text(json.dumps(jwks(rsa_kid="rsa-2")))
+        stat = jwt_mode.stat()
+        os.utime(jwt_mode, (stat.st_atime, stat.st_mtime + 10))
+        assert client.get("/items/1", headers=headers).status_code == 404
+        assert verify_calls == [token, token]
+
+    def test_session_metrics(self):
+        """セッションの統計が/metricsに出力されることを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() + 60})
+        for _ in range(2):
+            client.get("/items/1", headers={"Authorization": f"Bearer {token}"})
+        body = client.get("/metrics").text
+        assert "auth_session_hits 1" in body
+        assert "auth_session_entries 1" in body
@@ -0,0 +1,94 @@
+import sys
+import threading
+
+from src.cache import LRUCache, SynchronizedLRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+    """LRUCacheクラスのテストクラス"""
+
+    def test_get_and_set(self):
+        """設定した値を取得でき、ヒット/ミスが記録されることを確認"""
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        """容量を超えた場合に最も使われていないエントリが削除されることを確認"""
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+        assert cache.evictions == 1
+
+    def test_expiry(self):
+        """有効期限を過ぎたエントリが返されないことを確認"""
+        clock = FakeClock()
+        cache = LRUCache(10, clock=clock)
+        cache.set("a", 1, expires_at=5.0)
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_weighted_capacity(self):
+        """weighで指定したサイズの合計で容量が制限されることを確認"""
+        cache = LRUCache(10, weigh=len)
+        cache.set("a", b"12345")
+        cache.set("b", b"123456")
+        assert "a" not in cache
+        assert cache.weight == 6
+        cache.set("huge", b"x" * 11)
+        assert "huge" not in cache
+        assert cache.pop("b") == b"123456"
+        assert cache.weight == 0
+
+
+class TestSynchronizedLRUCache:
+    """SynchronizedLRUCacheクラスのテストクラス"""
+
+    def test_shared_between_threads(self):
+        """複数スレッドから同時に使っても重みとエントリが一致し、例外が発生しないことを確認"""
+        # Switch threads as often as possible so unlocked updates would interleave.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        cache = SynchronizedLRUCache(16, clock=lambda: 0.0)
+        errors = []
+
+        def worker(seed: int) -> None:
+            try:
+                for i in range(5000):
+                    key = (seed * 7 + i) % 40
+                    if cache.get(key) is None:
+                        # Some entries are already expired, so get() pops them.
+                        cache.set(key, i, expires_at=1.0 if i % 3 else 0.0)
+                    if i % 500 == 0:
+                        cache.clear()
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert errors == []
+        assert len(cache) <= 16
+        assert cache.weight == len(cache)
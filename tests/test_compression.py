@@ -0,0 +1,186 @@
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from main import app
+from src import compression, response_cache
+from src.compression import CompressionMiddleware, choose_encoding, encoded_etag
+from src.config import Settings
+
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+LARGE = b'{"items": [' + b",".join(b'{"name": "item"}' for _ in range(200)) + b"]}"
+
+
+def make_client() -> TestClient:
+    test_app = FastAPI()
+
+    @test_app.get("/large")
+    async def large():
+        return Response(LARGE, media_type="application/json", headers={"ETag": '"abc"'})
+
+    @test_app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @test_app.get("/binary")
+    async def binary():
+        return Response(bytes(4096), media_type="application/octet-stream")
+
+    @test_app.get("/encoded")
+    async def encoded():
+        return PlainTextResponse(
+            zlib.compress(LARGE, wbits=31), headers={"Content-Encoding": "gzip"}
+        )
+
+    @test_app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield b'{"line": %d}\n' % i
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    test_app.add_middleware(CompressionMiddleware)
+    return TestClient(test_app)
+
+
+def use_settings(monkeypatch, **values):
+    settings = Settings(**values)
+    monkeypatch.setattr(compression, "get_settings", lambda: settings)
+    monkeypatch.setattr(response_cache, "get_settings", lambda: settings)
+
+
+class TestChooseEncoding:
+    """choose_encoding関数のテストクラス"""
+
+    @pytest.mark.parametrize(
+        "accept, expected",
+        [
+            (None, None),
+            ("", None),
+            ("gzip", "gzip"),
+            ("identity", None),
+            ("deflate, gzip;q=0.5", "gzip"),
+            ("gzip;q=0", None),
+            ("*", "br"),
+            ("*, br;q=0", "gzip"),
+            ("gzip;q=0.5, br;q=0.8", "br"),
+            ("gzip, br", "br"),
+            ("x-gzip", "gzip"),
+            ("GZIP;Q=1", "gzip"),
+        ],
+    )
+    def test_negotiation(self, accept, expected):
+        """q値とサーバー側の優先順位に従って選ばれることを確認"""
+        assert choose_encoding(accept, ("br", "gzip")) == expected
+
+    def test_encoded_etag(self):
+        """符号化ごとに異なるETagになることを確認"""
+        assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+
+
+class TestCompressionMiddleware:
+    """CompressionMiddlewareクラスのテストクラス"""
+
+    def test_compresses_large_responses(self):
+        """閾値以上の応答が圧縮されることを確認"""
+        response = make_client().get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(LARGE)
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == '"abc-gzip"'
+        assert response.content == LARGE
+
+    def test_skips_small_responses(self):
+        """閾値未満の応答は圧縮されないことを確認"""
+        response = make_client().get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == {"ok": True}
+
+    def test_respects_accept_encoding(self):
+        """クライアントが受け付けない場合は圧縮されないことを確認"""
+        response = make_client().get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == '"abc"'
+        assert response.content == LARGE
+
+    def test_skips_binary_and_encoded_responses(self):
+        """圧縮対象外の型や符号化済みの応答はそのまま返ることを確認"""
+        client = make_client()
+        binary = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in binary.headers
+        encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        assert encoded.content == LARGE
+
+    def test_streams_compressed_chunks(self):
+        """ストリーミング応答が逐次圧縮されることを確認"""
+        response = make_client().get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == '{"line": 0}\n{"line": 1}\n{"line": 2}\n'
+
+    def test_disabled_without_encodings(self, monkeypatch):
+        """COMPRESSION_ENCODINGSが空の場合は圧縮しないことを確認"""
+        use_settings(monkeypatch, compression_encodings="")
+        response = make_client().get("/large", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+class TestPrecompressedCache:
+    """キャッシュ済み応答の事前圧縮のテストクラス"""
+
+    def test_hits_serve_stored_compressed_body(self, monkeypatch, cache):
+        """キャッシュヒット時に圧縮処理をせず保存済みの圧縮済み本文を返すことを確認"""
+        use_settings(monkeypatch, compression_min_bytes=1)
+        client = TestClient(app)
+        client.post("/items", json={"name": "Cached", "price": 1.0}, headers=headers)
+        request_headers = {**headers, "Accept-Encoding": "gzip"}
+
+        first = client.get("/items/1", headers=request_headers)
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.json()["name"] == "Cached"
+
+        calls = []
+        monkeypatch.setattr(
+            compression, "compress", lambda *args: calls.append(args) or b""
+        )
+        monkeypatch.setattr(
+            response_cache, "compress", lambda *args: calls.append(args) or b""
+        )
+        second = client.get("/items/1", headers=request_headers)
+        assert second.headers["content-encoding"] == "gzip"
+        assert second.content == first.content
+        assert calls == []
+        assert cache.stats()["bytes_cached"] > len(second.content)
+
+    def test_etag_per_encoding(self, monkeypatch):
+        """ETagが符号化ごとに異なり、それぞれで304が返ることを確認"""
+        use_settings(monkeypatch, compression_min_bytes=1)
+        client = TestClient(app)
+        client.post("/items", json={"name": "Cached", "price": 1.0}, headers=headers)
+        gzip_headers = {**headers, "Accept-Encoding": "gzip"}
+        identity_headers = {**headers, "Accept-Encoding": "identity"}
+
+        compressed = client.get("/items/1", headers=gzip_headers)
+        plain = client.get("/items/1", headers=identity_headers)
+        assert "content-encoding" not in plain.headers
+        assert compressed.headers["etag"] == encoded_etag(plain.headers["etag"], "gzip")
+        assert compressed.headers["vary"] == plain.headers["vary"] == "Accept-Encoding"
+
+        etag = compressed.headers["etag"]
+        matched = client.get("/items/1", headers={**gzip_headers, "If-None-Match": etag})
+        assert matched.status_code == 304
+        mismatched = client.get(
+            "/items/1", headers={**identity_headers, "If-None-Match": etag}
+        )
+        assert mismatched.status_code == 200
+
+    def test_small_items_not_compressed(self):
+        """既定の閾値では単一アイテムの応答が圧縮されないことを確認"""
+        client = TestClient(app)
+        client.post("/items", json={"name": "Small", "price": 1.0}, headers=headers)
+        response = client.get("/items/1", headers={**headers, "Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
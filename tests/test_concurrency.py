@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from src.models import Item
+
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+CONCURRENCY = 2000
+SEED_ITEMS = 20
+
+
+@pytest.fixture
+async def seeded(repository):
+    for i in range(1, SEED_ITEMS + 1):
+        await repository.add(Item(name=f"item{i}", price=float(i)))
+
+
+@pytest.mark.anyio
+class TestConcurrentRequests:
+    """同時リクエストのテストクラス"""
+
+    async def test_creates_get_unique_ids(self, async_client, repository):
+        """同時に作成したアイテムに一意のIDが振られ、内容が取り違えられないことを確認"""
+
+        async def create(n: int):
+            response = await async_client.post(
+                "/items", json={"name": f"new{n}", "price": n + 0.5}, headers=headers
+            )
+            assert response.status_code == 200
+            return n, response.json()
+
+        results = await asyncio.gather(*(create(n) for n in range(CONCURRENCY)))
+        ids = [body["item_id"] for _, body in results]
+        assert sorted(ids) == list(range(1, CONCURRENCY + 1))
+        for n, body in results:
+            assert (body["name"], body["price"]) == (f"new{n}", n + 0.5)
+            stored = await repository.get(body["item_id"])
+            assert (stored.name, stored.price) == (f"new{n}", n + 0.5)
+
+    async def test_reads_keep_their_query(self, async_client, seeded):
+        """同時に読み込んでも各リクエストのqと商品が他のリクエストと混ざらないことを確認"""
+
+        async def read(n: int):
+            item_id = n % SEED_ITEMS + 1
+            # Few distinct (item, q) pairs, so cached and coalesced reads are shared.
+            q = f"q{n % 7}" if n % 3 else None
+            params = {"q": q} if q is not None else {}
+            response = await async_client.get(
+                f"/items/{item_id}", params=params, headers=headers
+            )
+            assert response.status_code == 200
+            body = response.json()
+            assert (body["item_id"], body["name"], body["q"]) == (
+                item_id, f"item{item_id}", q
+            )
+
+        await asyncio.gather(*(read(n) for n in range(CONCURRENCY)))
+
+    async def test_mixed_reads_and_writes(self, async_client, seeded):
+        """作成と読み込みを同時に行っても、どちらの結果も正しいことを確認"""
+
+        async def create(n: int) -> int:
+            response = await async_client.post(
+                "/items", json={"name": f"mixed{n}", "price": 1.0}, headers=headers
+            )
+            assert response.json()["name"] == f"mixed{n}"
+            return response.json()["item_id"]
+
+        async def read(n: int) -> None:
+            item_id = n % SEED_ITEMS + 1
+            response = await async_client.get(f"/items/{item_id}", headers=headers)
+            assert response.json()["name"] == f"item{item_id}"
+
+        half = CONCURRENCY // 2
+        results = await asyncio.gather(
+            *(create(n) if n % 2 else read(n) for n in range(CONCURRENCY))
+        )
+        created = [item_id for item_id in results if item_id is not None]
+        assert sorted(created) == list(range(SEED_ITEMS + 1, SEED_ITEMS + half + 1))
+
+    async def test_auth_results_do_not_leak(self, async_client, seeded):
+        """有効・無効・欠落したトークンの同時リクエストが互いに影響しないことを確認"""
+        tokens = [headers, {"Authorization": "Bearer invalid"}, {}]
+        expected = [200, 401, 403]
+
+        async def read(n: int) -> None:
+            response = await async_client.get("/items/1", headers=tokens[n % 3])
+            assert response.status_code == expected[n % 3]
+
+        await asyncio.gather(*(read(n) for n in range(CONCURRENCY)))
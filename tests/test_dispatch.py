@@ -0,0 +1,159 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.routing import Mount
+from starlette.responses import PlainTextResponse
+from src import dispatch
+from src.config import Settings
+from src.dispatch import CompiledDispatcher, use_compiled_dispatch
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"route": "root"}
+
+    @app.get("/items/search")
+    async def search():
+        return {"route": "search"}
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"route": "read_item", "item_id": item_id}
+
+    @app.put("/items/{item_id}")
+    async def replace_item(item_id: int):
+        return {"route": "replace_item", "item_id": item_id}
+
+    @app.post("/items")
+    async def create_item():
+        return {"route": "create_item"}
+
+    @app.get("/users/{name}/items/{item_id:int}")
+    async def user_item(name: str, item_id: int):
+        return {"route": "user_item", "name": name, "item_id": item_id}
+
+    @app.get("/files/{file_path:path}")
+    async def read_file(file_path: str):
+        return {"route": "read_file", "file_path": file_path}
+
+    @app.get("/reports/")
+    async def reports():
+        return {"route": "reports"}
+
+    app.router.routes.append(
+        Mount("/static", app=PlainTextResponse("static"), name="static")
+    )
+    return app
+
+
+REQUESTS = [
+    ("GET", "/"),
+    ("GET", "/items/search"),
+    ("GET", "/items/7"),
+    ("GET", "/items/abc"),
+    ("PUT", "/items/7"),
+    ("DELETE", "/items/7"),
+    ("GET", "/items"),
+    ("POST", "/items"),
+    ("GET", "/items/7/"),
+    ("GET", "/users/ann/items/3"),
+    ("GET", "/users/ann/items/x"),
+    ("GET", "/files/a/b/c.txt"),
+    ("GET", "/files/"),
+    ("GET", "/reports"),
+    ("GET", "/static/app.js"),
+    ("GET", "/missing"),
+    ("GET", "/openapi.json"),
+]
+
+
+def summarize(response):
+    return (
+        response.status_code,
+        response.content,
+        response.headers.get("allow"),
+        response.headers.get("location"),
+    )
+
+
+class TestCompiledDispatcher:
+    """CompiledDispatcherクラスのテストクラス"""
+
+    @pytest.fixture
+    def clients(self):
+        plain = build_app()
+        compiled = build_app()
+        compiled.router.middleware_stack = CompiledDispatcher(compiled.router)
+        return (
+            TestClient(plain, follow_redirects=False),
+            TestClient(compiled, follow_redirects=False),
+        )
+
+    @pytest.mark.parametrize("method,path", REQUESTS)
+    def test_same_responses_as_starlette(self, clients, method, path):
+        """変換・404・405・リダイレクトを含め、通常のルーターと同じ応答になることを確認"""
+        plain, compiled = clients
+        assert summarize(compiled.request(method, path)) == summarize(
+            plain.request(method, path)
+        )
+
+    @pytest.mark.parametrize("root_path", ["/api", "/api/"])
+    @pytest.mark.parametrize(
+        "method,path",
+        REQUESTS + [("GET", "/api"), ("GET", "/apiary/items/7"), ("GET", "/api/api/items/7")],
+    )
+    def test_same_responses_under_root_path(self, root_path, method, path):
+        """root_path配下にマウントされた場合も通常のルーターと同じ応答になることを確認"""
+        plain = build_app()
+        compiled = build_app()
+        compiled.router.middleware_stack = CompiledDispatcher(compiled.router)
+        responses = []
+        for app in (plain, compiled):
+            client = TestClient(app, root_path=root_path, follow_redirects=False)
+            responses.append(summarize(client.request(method, path)))
+            if path.startswith("/"):
+                responses.append(summarize(client.request(method, "/api" + path)))
+        assert responses[: len(responses) // 2] == responses[len(responses) // 2 :]
+
+    def test_candidates_keep_registration_order(self):
+        """候補のルートが登録順で、パスに合うものだけに絞られることを確認"""
+        app = build_app()
+        dispatcher = CompiledDispatcher(app.router)
+        names = [route.name for route in dispatcher.candidates("/items/search")]
+        assert names == ["search", "read_item", "replace_item", "static"]
+        names = [route.name for route in dispatcher.candidates("/files/a/b")]
+        assert names == ["read_file", "static"]
+
+    def test_routes_added_later_are_found(self):
+        """作成後に追加されたルートも振り分けられることを確認"""
+        app = build_app()
+        app.router.middleware_stack = CompiledDispatcher(app.router)
+
+        @app.get("/late")
+        async def late():
+            return {"route": "late"}
+
+        assert TestClient(app).get("/late").json() == {"route": "late"}
+
+
+class TestUseCompiledDispatch:
+    """use_compiled_dispatch関数のテストクラス"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """COMPILED_ROUTINGが無効の場合はルーターを変更しないことを確認"""
+        monkeypatch.setattr(dispatch, "get_settings", lambda: Settings())
+        app = build_app()
+        assert use_compiled_dispatch(app) is None
+        assert app.router.middleware_stack == app.router.app
+
+    def test_enabled(self, monkeypatch):
+        """有効な場合はディスパッチャーが組み込まれ、ライフスパンも動作することを確認"""
+        monkeypatch.setattr(dispatch, "get_settings", lambda: Settings(compiled_routing=True))
+        app = build_app()
+        dispatcher = use_compiled_dispatch(app)
+        assert app.router.middleware_stack is dispatcher
+        with TestClient(app) as client:
+            assert client.get("/items/3").json() == {"route": "read_item", "item_id": 3}
@@ -0,0 +1,130 @@
+import asyncio
+import csv
+import io
+import json
+import tracemalloc
+
+import pytest
+from benchmarks.common import GeneratedRepository
+from main import app
+from src import store
+from src.export import export_items, iter_batches
+from src.store import ItemFilter, StoredItem
+
+
+class CountingRepository(GeneratedRepository):
+    """一覧の呼び出し回数を数える生成リポジトリ"""
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.calls = 0
+
+    async def list_items(self, after, limit, filters=ItemFilter()):
+        self.calls += 1
+        return await super().list_items(after, limit, filters)
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.anyio
+class TestExportItems:
+    """export_items関数のテストクラス"""
+
+    async def test_batches_cover_catalog(self):
+        """バッチが全アイテムを一度ずつ含むことを確認"""
+        repository = GeneratedRepository(10)
+        batches = [batch async for batch in iter_batches(repository, 0, 3)]
+        assert [len(b) for b in batches] == [3, 3, 3, 1]
+        assert [item.item_id for b in batches for item in b] == list(range(1, 11))
+
+    async def test_exact_multiple_of_batch_size(self):
+        """件数がバッチサイズの倍数でも空のバッチを出力しないことを確認"""
+        repository = CountingRepository(6)
+        batches = [batch async for batch in iter_batches(repository, 0, 3)]
+        assert [len(b) for b in batches] == [3, 3]
+        assert repository.calls == 3
+
+    async def test_ndjson_escaping(self, repository):
+        """名前に含まれる特殊文字がJSONとして正しく出力されることを確認"""
+        repository._index(StoredItem(1, 'quote " back \\ new\nline é', 1e16))
+        body = await collect(export_items(repository, "ndjson", 0, 10))
+        assert json.loads(body) == {
+            "item_id": 1, "name": 'quote " back \\ new\nline é', "price": 1e16
+        }
+
+    async def test_csv_quoting(self, repository):
+        """カンマや引用符を含む名前がCSVとして正しく出力されることを確認"""
+        repository._index(StoredItem(1, 'a,"b"', 2.5))
+        body = await collect(export_items(repository, "csv", 0, 10))
+        assert list(csv.reader(io.StringIO(body.decode()))) == [
+            ["item_id", "name", "price"], ["1", 'a,"b"', "2.5"]
+        ]
+
+    async def test_empty_catalog(self):
+        """アイテムがない場合はCSVのヘッダーのみが出力されることを確認"""
+        repository = GeneratedRepository(0)
+        assert await collect(export_items(repository, "ndjson", 0, 10)) == b""
+        assert await collect(export_items(repository, "csv", 0, 10)) == b"item_id,name,price\n"
+
+
+async def stream_export(size: int) -> tuple[int, int]:
+    """エクスポートをASGIで直接受信し、受信バイト数とメモリ使用量の最大値を返す"""
+    store._repository = GeneratedRepository(size)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/export",
+        "raw_path": b"/items/export",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"authorization", b"Bearer mocked-jwt-token"),
+            (b"accept-encoding", b"gzip"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    requested = False
+    done = asyncio.Event()
+    received = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    tracemalloc.start()
+    try:
+        await app(scope, receive, send)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return received, peak
+
+
+@pytest.mark.anyio
+class TestExportMemory:
+    """エクスポートのメモリ使用量のテストクラス"""
+
+    async def test_peak_memory_independent_of_catalog_size(self):
+        """カタログが10倍になってもメモリ使用量の最大値が増えないことを確認"""
+        await stream_export(1000)
+        small_bytes, small_peak = await stream_export(10_000)
+        large_bytes, large_peak = await stream_export(100_000)
+        assert large_bytes > small_bytes * 5
+        assert large_peak < small_peak * 1.5
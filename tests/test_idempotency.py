@@ -0,0 +1,203 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from src import auth, ratelimit
+from src.auth import create_verifier
+from src.config import Settings
+from src.idempotency import IdempotencyCache, StoredResponse
+from src.write_behind import WriteQueueFull
+from tests.jwt_helpers import jwks, make_token
+
+client = TestClient(app)
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+ITEM = {"name": "retried", "price": 1.0}
+
+
+@pytest.fixture
+def writes(repository, monkeypatch):
+    calls = []
+    add = repository.add
+
+    async def counting_add(item):
+        calls.append(item)
+        return await add(item)
+
+    monkeypatch.setattr(repository, "add", counting_add)
+    return calls
+
+
+def post(key: str | None, body=ITEM, extra: dict | None = None):
+    request_headers = dict(headers, **(extra or {}))
+    if key is not None:
+        request_headers["Idempotency-Key"] = key
+    return client.post("/items", json=body, headers=request_headers)
+
+
+class TestIdempotencyCache:
+    """IdempotencyCacheクラスのテストクラス"""
+
+    def test_entries_expire_after_ttl(self):
+        """保存したレスポンスがTTL経過後に破棄されることを確認"""
+        now = [0.0]
+        cache = IdempotencyCache(1024, 10.0, clock=lambda: now[0])
+        stored = StoredResponse(200, [(b"content-type", b"application/json")], b"{}")
+        cache.put(("k",), stored)
+        now[0] = 9.0
+        assert cache.get(("k",)) is stored
+        now[0] = 10.0
+        assert cache.get(("k",)) is None
+
+    def test_bounded_by_size(self):
+        """合計サイズが上限を超えると古いレスポンスから破棄されることを確認"""
+        cache = IdempotencyCache(100, 10.0)
+        for key in range(3):
+            cache.put((key,), StoredResponse(200, [], b"x" * 40))
+        assert cache.get((0,)) is None
+        assert cache.stats()["entries"] == 2
+        assert cache.stats()["evictions"] == 1
+
+
+class TestIdempotentCreate:
+    """Idempotency-Keyを指定したPOST /itemsのテストクラス"""
+
+    def test_retry_is_replayed(self, writes):
+        """同じキーと本文の再送には保存済みのレスポンスが返され、書き込まれないことを確認"""
+        first = post("k1")
+        second = post("k1")
+        assert first.status_code == second.status_code == 200
+        assert second.content == first.content
+        assert "idempotent-replayed" not in first.headers
+        assert second.headers["idempotent-replayed"] == "true"
+        assert len(writes) == 1
+
+    def test_other_key_or_body_creates(self, writes):
+        """キーまたは本文が異なる場合は新たに作成されることを確認"""
+        ids = {
+            post("k1").json()["item_id"],
+            post("k2").json()["item_id"],
+            post("k1", {"name": "other", "price": 2.0}).json()["item_id"],
+        }
+        assert ids == {1, 2, 3}
+        assert len(writes) == 3
+
+    def test_without_key_creates_every_time(self, writes):
+        """キーがない場合は再送のたびに作成されることを確認"""
+        assert post(None).json()["item_id"] == 1
+        assert post(None).json()["item_id"] == 2
+
+    def test_invalid_key(self, writes):
+        """長すぎるキーや空のキーは400になることを確認"""
+        assert post("x" * 256).status_code == 400
+        assert post("").status_code == 400
+        assert writes == []
+
+    def test_errors_are_not_stored(self, repository, monkeypatch):
+        """5xxのエラーは保存されず、再送で再実行されることを確認"""
+        add = repository.add
+
+        async def full(item):
+            raise WriteQueueFull()
+
+        monkeypatch.setattr(repository, "add", full)
+        assert post("k1").status_code == 503
+        monkeypatch.setattr(repository, "add", add)
+        response = post("k1")
+        assert response.status_code == 200
+        assert "idempotent-replayed" not in response.headers
+
+    def test_validation_errors_are_not_stored(self, writes):
+        """検証エラーのリクエストは再送のたびに検証されることを確認"""
+        assert post("k1", {"name": "", "price": -1}).status_code == 422
+        assert post("k1", {"name": "", "price": -1}).status_code == 422
+
+    def test_idempotency_metrics(self):
+        """再送の統計が/metricsに出力されることを確認"""
+        post("k1")
+        post("k1")
+        body = client.get("/metrics").text
+        assert "idempotency_replays 1" in body
+        assert "idempotency_entries 1" in body
+
+
+class TestIdempotentCreateJWT:
+    """JWTモードでのIdempotency-Keyのテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def jwt_mode(self, tmp_path, monkeypatch):
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks()))
+        settings = Settings(auth_mode="jwt", jwt_keys_file=str(path))
+        monkeypatch.setattr(auth, "_verifier", create_verifier(settings))
+
+    def bearer(self, sub: str, ttl: float = 60) -> dict:
+        token = make_token({"sub": sub, "exp": time.time() + ttl})
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_keys_are_scoped_to_token(self, writes):
+        """同じキーでも別のトークンのレスポンスは再送されないことを確認"""
+        assert post("k1", extra=self.bearer("u1")).json()["item_id"] == 1
+        assert post("k1", extra=self.bearer("u2")).json()["item_id"] == 2
+        assert len(writes) == 2
+
+    def test_expired_token_is_not_replayed(self, writes):
+        """トークンの有効期限が切れると再送でも401になることを確認"""
+        bearer = self.bearer("u1", ttl=0.3)
+        assert post("k1", extra=bearer).status_code == 200
+        time.sleep(0.4)
+        assert post("k1", extra=bearer).status_code == 401
+        assert len(writes) == 1
+
+
+class TestIdempotentCreateRateLimit:
+    """再送リクエストのレート制限のテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def limited(self, monkeypatch):
+        monkeypatch.setattr(
+            ratelimit,
+            "get_settings",
+            lambda: Settings(rate_limit_per_second=0.01, rate_limit_burst=2),
+        )
+
+    def test_replays_are_rate_limited(self, writes):
+        """再送も制限の対象となり、最初のリクエストは二重に数えられないことを確認"""
+        assert post("k1").status_code == 200
+        assert post("k1").headers["idempotent-replayed"] == "true"
+        response = post("k1")
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+        assert len(writes) == 1
+        assert ratelimit.get_rate_limiter().stats()["allowed"] == 2
+
+
+@pytest.mark.anyio
+class TestConcurrentDuplicates:
+    """同時に届いた重複リクエストのテストクラス"""
+
+    async def test_duplicates_wait_for_first(
+        self, writes, repository, monkeypatch, async_client
+    ):
+        """処理中の重複リクエストは先行リクエストの完了を待ち、同じレスポンスを受け取ることを確認"""
+        add = repository.add
+
+        async def slow_add(item):
+            await asyncio.sleep(0.05)
+            return await add(item)
+
+        monkeypatch.setattr(repository, "add", slow_add)
+        request_headers = dict(headers, **{"Idempotency-Key": "k1"})
+        responses = await asyncio.gather(
+            *(
+                async_client.post("/items", json=ITEM, headers=request_headers)
+                for _ in range(10)
+            )
+        )
+        assert {r.status_code for r in responses} == {200}
+        assert {r.json()["item_id"] for r in responses} == {1}
+        replayed = [r for r in responses if r.headers.get("idempotent-replayed")]
+        assert len(replayed) == 9
+        assert len(writes) == 1
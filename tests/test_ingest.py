@@ -0,0 +1,115 @@
+import json
+
+import pytest
+from src.ingest import iter_json_array, iter_ndjson
+from src.models import Item
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def collect(entries):
+    return [entry async for entry in entries]
+
+
+@pytest.mark.anyio
+class TestIterNdjson:
+    """iter_ndjson関数のテストクラス"""
+
+    @pytest.mark.parametrize("size", [1, 3, 1024])
+    async def test_valid_lines(self, size):
+        """チャンク境界に関係なく各行がItemに変換されることを確認"""
+        data = b'{"name": "a", "price": 1}\n{"name": "b", "price": 2.5}\n'
+        entries = await collect(iter_ndjson(chunked(data, size), 1024))
+        assert entries == [(1, Item(name="a", price=1)), (2, Item(name="b", price=2.5))]
+
+    async def test_blank_lines_and_missing_trailing_newline(self):
+        """空行はスキップされ、末尾の改行がなくても最終行が処理されることを確認"""
+        data = b'\n{"name": "a", "price": 1}\n\n{"name": "b", "price": 2}'
+        entries = await collect(iter_ndjson(chunked(data, 4), 1024))
+        assert [line for line, _ in entries] == [2, 4]
+
+    async def test_invalid_lines_reported(self):
+        """不正な行は行番号付きのエラーとして返されることを確認"""
+        data = b'{"name": "", "price": 1}\nnot json\n{"name": "ok", "price": 1}\n'
+        entries = await collect(iter_ndjson(chunked(data, 5), 1024))
+        assert entries[0][0] == 1
+        assert entries[0][1][0]["type"] == "string_too_short"
+        assert entries[1][0] == 2
+        assert entries[1][1][0]["type"] == "json_invalid"
+        assert entries[2] == (3, Item(name="ok", price=1))
+
+    async def test_invalid_utf8_line(self):
+        """UTF-8として不正な行はjson_invalidとなり、入力は文字列で返ることを確認"""
+        data = b'{"name": "\xff", "price": 1}\n{"name": "ok", "price": 1}\n'
+        entries = await collect(iter_ndjson(chunked(data, 5), 1024))
+        [error] = entries[0][1]
+        assert error["type"] == "json_invalid"
+        assert error["input"] == '{"name": "\ufffd", "price": 1}'
+        assert entries[1] == (2, Item(name="ok", price=1))
+
+    async def test_line_too_long(self):
+        """上限を超える行はエラーとなり、後続の行は処理されることを確認"""
+        long_line = json.dumps({"name": "x" * 100, "price": 1}).encode()
+        data = long_line + b'\n{"name": "ok", "price": 1}\n'
+        entries = await collect(iter_ndjson(chunked(data, 8), 64))
+        assert entries[0][0] == 1
+        assert entries[0][1][0]["type"] == "line_too_long"
+        assert entries[1] == (2, Item(name="ok", price=1))
+
+
+@pytest.mark.anyio
+class TestIterJsonArray:
+    """iter_json_array関数のテストクラス"""
+
+    @pytest.mark.parametrize("size", [1, 7, 1024])
+    async def test_valid_array(self, size):
+        """チャンク境界に関係なく配列の各要素がItemに変換されることを確認"""
+        data = b' [ {"name": "a", "price": 1} , {"name": "b", "price": 22.5} ] '
+        entries = await collect(iter_json_array(chunked(data, size), 1024))
+        assert entries == [(0, Item(name="a", price=1)), (1, Item(name="b", price=22.5))]
+
+    async def test_empty_array(self):
+        """空の配列では何も返さないことを確認"""
+        assert await collect(iter_json_array(chunked(b"[]", 1), 1024)) == []
+
+    async def test_invalid_element_continues(self):
+        """バリデーションエラーの要素があっても後続要素が処理されることを確認"""
+        data = b'[{"name": "a", "price": 0}, {"name": "b", "price": 1}]'
+        entries = await collect(iter_json_array(chunked(data, 4), 1024))
+        assert entries[0][0] == 0
+        assert entries[0][1][0]["type"] == "greater_than"
+        assert entries[1] == (1, Item(name="b", price=1))
+
+    @pytest.mark.parametrize(
+        "data",
+        [b'{"name": "a"}', b'[{"name": "a", "price": 1}', b"[1 2]", b"[] x", b"[{]"],
+    )
+    async def test_malformed_json(self, data):
+        """不正なJSONの場合は最後にjson_invalidエラーが返ることを確認"""
+        entries = await collect(iter_json_array(chunked(data, 3), 1024))
+        assert entries[-1][1][0]["type"] == "json_invalid"
+
+    async def test_element_too_large(self):
+        """上限を超える要素はエラーとなり処理が打ち切られることを確認"""
+        data = b'[{"name": "' + b"x" * 200 + b'", "price": 1}]'
+        entries = await collect(iter_json_array(chunked(data, 16), 64))
+        assert entries == [(0, [{"type": "json_invalid", "loc": [], "msg": "Item too large"}])]
+
+    async def test_invalid_utf8(self):
+        """UTF-8として不正なバイト列で処理が打ち切られることを確認"""
+        data = b'[{"name": "a", "price": 1}, {"name": "\xff", "price": 1}]'
+        entries = await collect(iter_json_array(chunked(data, 4), 1024))
+        assert entries[0] == (0, Item(name="a", price=1))
+        assert entries[1:] == [
+            (1, [{"type": "json_invalid", "loc": [], "msg": "Invalid UTF-8: invalid start byte"}])
+        ]
+
+    async def test_lone_surrogate_rejected(self):
+        """単独のサロゲートのエスケープはjson_invalidとなり、後続要素は処理されることを確認"""
+        data = b'[{"name": "\\ud800", "price": 1}, {"name": "\\ud83d\\ude00", "price": 1}]'
+        entries = await collect(iter_json_array(chunked(data, 8), 1024))
+        assert entries[0][1][0]["type"] == "json_invalid"
+        assert entries[1] == (1, Item(name="\U0001f600", price=1))
@@ -0,0 +1,163 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from src.metrics import Histogram, MetricsRegistry, RequestTiming, SlowRequestLog
+
+client = TestClient(app)
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+class TestHistogram:
+    """Histogramクラスのテストクラス"""
+
+    def test_observe_buckets(self):
+        """値が上限を含むバケットに振り分けられることを確認"""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4
+        assert histogram.sum == 2.65
+
+
+class TestRequestTiming:
+    """RequestTimingクラスのテストクラス"""
+
+    def test_phases(self):
+        """各フェーズの時間が正しく算出されることを確認"""
+        timing = RequestTiming(
+            start=1.0, auth=0.25, endpoint_start=2.0, endpoint_end=3.5, response_start=4.0
+        )
+        assert timing.phases() == {
+            "auth": 0.25,
+            "validation": 0.75,
+            "handler": 1.5,
+            "serialization": 0.5,
+        }
+
+    def test_phases_without_endpoint(self):
+        """エンドポイントに到達しない場合は認証時間のみとなることを確認"""
+        assert RequestTiming(start=1.0).phases() == {}
+        assert RequestTiming(start=1.0, auth=0.1).phases() == {"auth": 0.1}
+
+
+class TestMetricsRegistry:
+    """MetricsRegistryクラスのテストクラス"""
+
+    def test_render(self):
+        """Prometheusテキスト形式で出力されることを確認"""
+        registry = MetricsRegistry()
+        registry.record("GET", "/items/{item_id}", 200, 0.002, RequestTiming(start=0))
+        registry.record("GET", "/items/{item_id}", 404, 0.0005, RequestTiming(start=0))
+        text = registry.render([("cache_hits", {}, 3)])
+        assert 'http_requests_total{method="GET",route="/items/{item_id}",status="2xx"} 1' in text
+        assert 'http_requests_total{method="GET",route="/items/{item_id}",status="4xx"} 1' in text
+        assert (
+            'http_request_duration_seconds_bucket{method="GET",route="/items/{item_id}",le="0.001"} 1'
+            in text
+        )
+        assert (
+            'http_request_duration_seconds_bucket{method="GET",route="/items/{item_id}",le="+Inf"} 2'
+            in text
+        )
+        assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 2' in text
+        assert "cache_hits 3\n" in text
+
+    def test_label_escaping(self):
+        """ラベル値の引用符がエスケープされることを確認"""
+        registry = MetricsRegistry()
+        registry.record("GET", '/a"b', 200, 0.001, RequestTiming(start=0))
+        assert 'route="/a\\"b"' in registry.render()
+
+
+class TestSharedMetrics:
+    """ワーカー間で共有するメトリクスのテストクラス"""
+
+    def test_merge_snapshots(self):
+        """スナップショットを合算できることを確認"""
+        first, second = MetricsRegistry(), MetricsRegistry()
+        first.record("GET", "/", 200, 0.001, RequestTiming(start=0))
+        second.record("GET", "/", 200, 0.002, RequestTiming(start=0))
+        first.merge(second.snapshot())
+        assert first.requests[("GET", "/", "2xx")] == 2
+        assert first.latency[("GET", "/")].count == 2
+
+    @pytest.mark.anyio
+    async def test_render_combines_workers(self, tmp_path):
+        """同じディレクトリを使う全ワーカーの合計が出力されることを確認"""
+        other = MetricsRegistry()
+        other.record("GET", "/", 200, 0.001, RequestTiming(start=0))
+        (tmp_path / "metrics-1.json").write_text(json.dumps(other.snapshot()))
+        registry = MetricsRegistry(str(tmp_path))
+        registry.record("GET", "/", 200, 0.001, RequestTiming(start=0))
+        text = registry.render()
+        assert 'http_requests_total{method="GET",route="/",status="2xx"} 2' in text
+        assert len(list(tmp_path.iterdir())) == 2
+
+
+class TestMetricsMiddleware:
+    """MetricsMiddlewareのテストクラス"""
+
+    def test_records_templated_route(self, registry):
+        """ルートがパステンプレートでラベル付けされることを確認"""
+        client.post("/items", json={"name": "a", "price": 1.0}, headers=headers)
+        client.get("/items/1", headers=headers)
+        client.get("/items/2", headers=headers)
+        assert registry.requests[("GET", "/items/{item_id}", "2xx")] == 1
+        assert registry.requests[("GET", "/items/{item_id}", "4xx")] == 1
+        assert registry.latency[("GET", "/items/{item_id}")].count == 2
+
+    def test_unmatched_route(self, registry):
+        """存在しないパスは<unmatched>として記録されることを確認"""
+        client.get("/no/such/path")
+        assert registry.requests[("GET", "<unmatched>", "4xx")] == 1
+
+    def test_phase_breakdown(self, registry):
+        """認証・検証・ハンドラ・シリアライズの時間が記録されることを確認"""
+        client.post("/items", json={"name": "a", "price": 1.0}, headers=headers)
+        for phase in ("auth", "validation", "handler", "serialization"):
+            assert registry.phases[("/items", phase)].count == 1
+
+    def test_auth_failure_records_auth_phase(self, registry):
+        """認証失敗時も認証時間が記録されることを確認"""
+        client.get("/items/1", headers={"Authorization": "Bearer invalid"})
+        assert registry.requests[("GET", "/items/{item_id}", "4xx")] == 1
+        assert registry.phases[("/items/{item_id}", "auth")].count == 1
+
+
+class TestSlowRequestLog:
+    """SlowRequestLogクラスのテストクラス"""
+
+    def test_records_only_over_threshold(self):
+        """閾値以上のリクエストのみが新しい順に記録されることを確認"""
+        log = SlowRequestLog(0.1, size=2)
+        timing = RequestTiming(start=1.0, auth=0.01, endpoint_start=1.02, endpoint_end=1.2)
+        log.record("GET", "/items/1", "/items/{item_id}", 200, 0.05, timing)
+        assert log.recent() == []
+        for path in ("/items/1", "/items/2", "/items/3"):
+            log.record("GET", path, "/items/{item_id}", 200, 0.25, timing)
+        entries = log.recent()
+        assert [entry["path"] for entry in entries] == ["/items/3", "/items/2"]
+        assert entries[0]["duration_ms"] == 250.0
+        assert entries[0]["phases_ms"] == {
+            "auth": 10.0, "validation": 10.0, "handler": 180.0,
+        }  # fmt: skip
+
+
+class TestMetricsEndpoint:
+    """/metricsエンドポイントのテストクラス"""
+
+    def test_metrics_endpoint(self):
+        """/metricsが認証なしでPrometheus形式のテキストを返すことを確認"""
+        client.get("/")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_requests_total{method="GET",route="/",status="2xx"} 1' in response.text
+        assert "response_cache_hit_ratio" in response.text
+
+    def test_metrics_not_in_schema(self):
+        """/metricsがOpenAPIスキーマに含まれないことを確認"""
+        assert "/metrics" not in client.get("/openapi.json").json()["paths"]
@@ -0,0 +1,81 @@
+import json
+
+import fastapi.applications
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src import openapi
+from src.config import Settings
+from src.openapi import save_schema, schema_fingerprint, use_cached_schema
+
+
+def make_app(title: str = "Items") -> FastAPI:
+    test_app = FastAPI(title=title)
+
+    @test_app.get("/hello")
+    async def hello():
+        return {"message": "hello"}
+
+    use_cached_schema(test_app)
+    return test_app
+
+
+@pytest.fixture
+def cache_file(monkeypatch, tmp_path):
+    path = tmp_path / "openapi.json"
+    settings = Settings(openapi_cache_file=str(path))
+    monkeypatch.setattr(openapi, "get_settings", lambda: settings)
+    return path
+
+
+@pytest.fixture
+def generate_calls(monkeypatch):
+    calls = []
+    original = fastapi.applications.get_openapi
+
+    def counting(**kwargs):
+        calls.append(kwargs["title"])
+        return original(**kwargs)
+
+    monkeypatch.setattr(fastapi.applications, "get_openapi", counting)
+    return calls
+
+
+class TestCachedSchema:
+    """OpenAPIスキーマのキャッシュのテストクラス"""
+
+    def test_generated_without_cache_file(self, generate_calls):
+        """設定がない場合は通常どおり生成されることを確認"""
+        schema = make_app().openapi()
+        assert "/hello" in schema["paths"]
+        assert generate_calls == ["Items"]
+
+    def test_saved_then_loaded(self, cache_file, generate_calls):
+        """初回は生成して保存し、次回の起動ではファイルから読み込むことを確認"""
+        first = make_app().openapi()
+        assert json.loads(cache_file.read_text())["schema"] == first
+        second = make_app().openapi()
+        assert second == first
+        assert generate_calls == ["Items"]
+
+    def test_stale_file_regenerated(self, cache_file, generate_calls):
+        """アプリの内容が変わるとキャッシュが作り直されることを確認"""
+        make_app("Items").openapi()
+        schema = make_app("Renamed").openapi()
+        assert schema["info"]["title"] == "Renamed"
+        assert generate_calls == ["Items", "Renamed"]
+        assert json.loads(cache_file.read_text())["schema"]["info"]["title"] == "Renamed"
+
+    def test_corrupt_file_regenerated(self, cache_file, generate_calls):
+        """壊れたキャッシュファイルは無視されることを確認"""
+        cache_file.write_text("{not json")
+        assert "/hello" in make_app().openapi()["paths"]
+        assert generate_calls == ["Items"]
+
+    def test_served_from_endpoint(self, cache_file, generate_calls):
+        """/openapi.jsonがキャッシュされたスキーマを返すことを確認"""
+        test_app = make_app()
+        save_schema(str(cache_file), schema_fingerprint(test_app), {"openapi": "cached"})
+        response = TestClient(test_app).get("/openapi.json")
+        assert response.json() == {"openapi": "cached"}
+        assert generate_calls == []
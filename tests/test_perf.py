@@ -0,0 +1,68 @@
+import gc
+
+import pytest
+from benchmarks.common import time_async
+from src.models import Item
+
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+WARMUP = 50
+ROUNDS = 10
+REQUESTS = 100
+
+
+@pytest.fixture
+async def seeded(repository, search_index):
+    for i in range(1, 101):
+        await repository.add(Item(name=f"item{i}", price=float(i)))
+
+
+async def measure(call) -> list[list[float]]:
+    await time_async(call, WARMUP)
+    response = await call()
+    assert response.status_code == 200
+    # Like timeit, keep collections of whatever else the run has allocated
+    # out of the figures.
+    gc.collect()
+    gc.disable()
+    try:
+        return [await time_async(call, REQUESTS) for _ in range(ROUNDS)]
+    finally:
+        gc.enable()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("seeded")
+class TestLatencyBudgets:
+    """エンドポイントごとのレイテンシ予算のテストクラス（--perf指定時のみ実行）"""
+
+    @pytest.mark.perf_budget("GET /items/{item_id}")
+    async def test_read_item(self, async_client, latency_budget):
+        """GET /items/{item_id}のレイテンシが予算内であることを確認"""
+        rounds = await measure(lambda: async_client.get("/items/1", headers=headers))
+        latency_budget.check(rounds)
+
+    @pytest.mark.perf_budget("POST /items")
+    async def test_create_item(self, async_client, latency_budget):
+        """POST /itemsのレイテンシが予算内であることを確認"""
+        body = {"name": "perf", "price": 1.0}
+        rounds = await measure(
+            lambda: async_client.post("/items", json=body, headers=headers)
+        )
+        latency_budget.check(rounds)
+
+    @pytest.mark.perf_budget("GET /items")
+    async def test_list_items(self, async_client, latency_budget):
+        """GET /itemsのレイテンシが予算内であることを確認"""
+        rounds = await measure(
+            lambda: async_client.get("/items", params={"limit": 50}, headers=headers)
+        )
+        latency_budget.check(rounds)
+
+    @pytest.mark.perf_budget("GET /items/search")
+    async def test_search_items(self, async_client, latency_budget):
+        """GET /items/searchのレイテンシが予算内であることを確認"""
+        params = {"q": "item"}
+        rounds = await measure(
+            lambda: async_client.get("/items/search", params=params, headers=headers)
+        )
+        latency_budget.check(rounds)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from src import auth, metrics
+from src.auth import create_verifier
+from src.config import Settings
+from src.profiling import SamplingProfiler
+from tests.jwt_helpers import jwks, make_token
+
+client = TestClient(app)
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    """SamplingProfilerクラスのテストクラス"""
+
+    def test_sample_collapses_stacks(self):
+        """スレッド名から始まる折りたたみ形式のスタックが集計されることを確認"""
+        profiler = SamplingProfiler()
+        frames = {threading.get_ident(): sys._getframe()}
+        profiler.sample(frames)
+        profiler.sample(frames)
+        assert profiler.samples == 2
+        [line] = profiler.collapsed().splitlines()
+        stack, count = line.rsplit(" ", 1)
+        assert count == "2"
+        assert stack.startswith(threading.current_thread().name + ";")
+        line = self.test_sample_collapses_stacks.__code__.co_firstlineno
+        assert stack.endswith(
+            f"test_sample_collapses_stacks (tests/test_profiling.py:{line})"
+        )
+
+    def test_background_sampling(self):
+        """開始から停止までの間、他のスレッドのスタックが採取されることを確認"""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+        worker.start()
+        profiler = SamplingProfiler()
+        try:
+            profiler.start(interval=0.001)
+            assert profiler.running
+            with pytest.raises(RuntimeError):
+                profiler.start()
+            time.sleep(0.2)
+            profiler.stop()
+        finally:
+            stop.set()
+            worker.join()
+        assert not profiler.running
+        assert profiler.samples > 0
+        assert profiler.stopped_at is not None
+        text = profiler.collapsed()
+        assert "busy;" in text and "busy_loop (tests/test_profiling.py" in text
+        assert "sampling-profiler" not in text
+
+    def test_stops_after_max_seconds(self):
+        """max_secondsを過ぎると自動的に停止することを確認"""
+        profiler = SamplingProfiler()
+        profiler.start(interval=0.001, max_seconds=0.05)
+        time.sleep(0.3)
+        assert not profiler.running
+        assert profiler.samples > 0
+
+
+class TestAdminEndpoints:
+    """管理用エンドポイントのテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def jwt_mode(self, tmp_path, monkeypatch):
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks()))
+        settings = Settings(auth_mode="jwt", jwt_keys_file=str(path))
+        monkeypatch.setattr(auth, "_verifier", create_verifier(settings))
+
+    @pytest.fixture
+    def admin(self):
+        token = make_token({"sub": "ops", "admin": True, "exp": time.time() + 60})
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_admin_claim_required(self, admin):
+        """管理者クレームのないトークンでは403、無効なトークンでは401になることを確認"""
+        token = make_token({"sub": "u1", "exp": time.time() + 60})
+        user = {"Authorization": f"Bearer {token}"}
+        assert client.post("/admin/profiler/start", headers=user).status_code == 403
+        response = client.get("/admin/profiler", headers={"Authorization": "Bearer bad"})
+        assert response.status_code == 401
+        assert client.get("/admin/profiler").status_code == 403
+
+    def test_string_admin_claim_rejected(self):
+        """管理者クレームがtrue以外の値の場合は拒否されることを確認"""
+        token = make_token({"sub": "u1", "admin": "yes", "exp": time.time() + 60})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/admin/profiler", headers=headers).status_code == 403
+
+    def test_profile_round_trip(self, admin, profiler):
+        """プロファイラを開始・停止し、折りたたみ形式で取得できることを確認"""
+        response = client.post(
+            "/admin/profiler/start", params={"interval_ms": 1}, headers=admin
+        )
+        assert response.status_code == 200
+        assert response.json()["running"] is True
+        assert client.post("/admin/profiler/start", headers=admin).status_code == 409
+        time.sleep(0.1)
+        response = client.post("/admin/profiler/stop", headers=admin)
+        assert response.json()["running"] is False
+        assert response.json()["samples"] > 0
+
+        response = client.get("/admin/profiler", headers=admin)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "profile.folded" in response.headers["content-disposition"]
+        lines = response.text.splitlines()
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) >= profiler.samples
+
+    def test_stop_joins_sampler_off_the_event_loop(self, admin, profiler, monkeypatch):
+        """停止時のスレッドのjoinがイベントループ外で行われることを確認"""
+        stop = profiler.stop
+        calls = []
+
+        def spy():
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+            calls.append(True)
+            stop()
+
+        monkeypatch.setattr(profiler, "stop", spy)
+        client.post("/admin/profiler/start", headers=admin)
+        response = client.post("/admin/profiler/stop", headers=admin)
+        assert response.status_code == 200
+        assert response.json()["running"] is False
+        assert calls == [True]
+
+    def test_slow_requests_disabled(self, admin):
+        """SLOW_REQUEST_SECONDSが未設定の場合は404になることを確認"""
+        assert client.get("/admin/slow-requests", headers=admin).status_code == 404
+
+    def test_slow_requests(self, admin, monkeypatch):
+        """閾値を超えたリクエストがフェーズ別の内訳とともに記録されることを確認"""
+        monkeypatch.setattr(
+            metrics, "get_settings", lambda: Settings(slow_request_seconds=1e-9)
+        )
+        assert client.get("/items/1?q=secret", headers=admin).status_code == 404
+        response = client.get("/admin/slow-requests", headers=admin)
+        assert response.status_code == 200
+        [entry] = response.json()["requests"]
+        assert entry["method"] == "GET"
+        assert entry["path"] == "/items/1"
+        assert entry["route"] == "/items/{item_id}"
+        assert entry["status"] == 404
+        assert set(entry["phases_ms"]) >= {"auth", "validation", "handler"}
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from src import auth, ratelimit
+from src.config import Settings
+from src.ratelimit import RateLimiter
+
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateLimiter:
+    """RateLimiterクラスのテストクラス"""
+
+    def test_allows_burst_then_rejects(self):
+        """バースト分まで許可し、その後は待ち時間を返すことを確認"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=3, clock=clock)
+        assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.acquire("a") == pytest.approx(0.5)
+        assert limiter.stats() == {"allowed": 3, "rejected": 1}
+
+    def test_refills_over_time(self):
+        """時間の経過でトークンが補充されることを確認"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=1, clock=clock)
+        assert limiter.acquire("a") == 0.0
+        assert limiter.acquire("a") > 0
+        clock.now += 0.5
+        assert limiter.acquire("a") == 0.0
+
+    def test_clients_are_independent(self):
+        """クライアントごとに別のバケットが使われることを確認"""
+        limiter = RateLimiter(rate=1, burst=1, clock=FakeClock())
+        assert limiter.acquire("a") == 0.0
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("b") == 0.0
+
+    def test_memory_is_fixed(self):
+        """クライアント数によらずテーブルの大きさが一定であることを確認"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=1, burst=1, slots=16, clock=clock)
+        size = len(limiter._table)
+        for i in range(1000):
+            clock.now += 0.001
+            limiter.acquire(f"client{i}")
+        assert len(limiter._table) == size == 16 * 24
+
+    def test_idle_slots_are_reused(self):
+        """満杯まで補充されたバケットの枠が他のクライアントに再利用されることを確認"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=1, burst=1, slots=16, clock=clock)
+        for i in range(16):
+            limiter.acquire(f"old{i}")
+        clock.now += 1
+        limiter.acquire("new")
+        limiter.acquire("new")
+        assert limiter.stats()["rejected"] == 1
+
+    def test_shared_file(self, tmp_path):
+        """同じファイルを使うリミッター同士で制限が共有されることを確認"""
+        path = str(tmp_path / "buckets")
+        clock = FakeClock()
+        first = RateLimiter(rate=1, burst=2, path=path, clock=clock)
+        second = RateLimiter(rate=1, burst=2, path=path, clock=clock)
+        try:
+            assert first.acquire("a") == 0.0
+            assert second.acquire("a") == 0.0
+            assert first.acquire("a") > 0
+        finally:
+            first.close()
+            second.close()
+
+    def test_rejects_invalid_parameters(self):
+        """不正なレートやバーストを指定するとエラーになることを確認"""
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0, burst=1)
+        with pytest.raises(ValueError):
+            RateLimiter(rate=1, burst=0.5)
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(
+        ratelimit,
+        "get_settings",
+        lambda: Settings(rate_limit_per_second=0.01, rate_limit_burst=2),
+    )
+
+
+class TestRateLimitDependency:
+    """rate_limit依存関数のテストクラス"""
+
+    def test_disabled_by_default(self):
+        """既定では制限されないことを確認"""
+        client = TestClient(app)
+        for _ in range(50):
+            assert client.get("/items/stats", headers=headers).status_code == 200
+
+    def test_returns_429_with_retry_after(self, limited):
+        """制限を超えると429とRetry-Afterヘッダーが返ることを確認"""
+        client = TestClient(app)
+        assert client.get("/items/stats", headers=headers).status_code == 200
+        assert client.get("/items/stats", headers=headers).status_code == 200
+        response = client.get("/items/stats", headers=headers)
+        assert response.status_code == 429
+        assert response.json() == {"detail": "Too many requests"}
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_unauthenticated_requests_limited_by_address(self, limited):
+        """トークンのないリクエストはクライアントのアドレスで制限されることを確認"""
+        client = TestClient(app)
+        assert client.get("/").status_code == 200
+        assert client.get("/").status_code == 200
+        assert client.get("/").status_code == 429
+        # 検証済みトークンのクライアントは別のバケットを使う
+        assert client.get("/items/stats", headers=headers).status_code == 200
+
+    def test_invalid_tokens_fall_back_to_address(self, limited):
+        """不正なトークンを変えても制限を回避できないことを確認"""
+        client = TestClient(app)
+        statuses = [
+            client.get("/", headers={"Authorization": f"Bearer fake{i}"}).status_code
+            for i in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+
+    def test_tokens_verified_once_off_the_event_loop(self, limited, monkeypatch):
+        """トークンはリクエストごとに1回だけ、イベントループの外で検証されることを確認"""
+        calls = []
+        verifier = auth.get_verifier()
+        verify = verifier.verify
+
+        def spy(token):
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+            calls.append(token)
+            return verify(token)
+
+        monkeypatch.setattr(verifier, "verify", spy)
+        client = TestClient(app)
+        assert client.get("/items/stats", headers=headers).status_code == 200
+        bad = {"Authorization": "Bearer fake"}
+        assert client.get("/items/stats", headers=bad).status_code == 401
+        assert calls == ["mocked-jwt-token", "fake"]
+
+    def test_metrics_report_rejections(self, limited):
+        """メトリクスに許可数と拒否数が出力されることを確認"""
+        client = TestClient(app)
+        for _ in range(3):
+            client.get("/items/stats", headers=headers)
+        # /metrics自体もアドレスのバケットで許可されて数えられる
+        lines = client.get("/metrics").text.splitlines()
+        assert "rate_limit_allowed 3" in lines
+        assert "rate_limit_rejected 1" in lines
@@ -0,0 +1,70 @@
+from src.response_cache import CachedResponse, ResponseCache, etag_matches
+
+
+class TestResponseCache:
+    """ResponseCacheクラスのテストクラス"""
+
+    def test_put_and_get_variants(self):
+        """同じアイテムの複数バリアントを保持できることを確認"""
+        cache = ResponseCache(1024)
+        cache.put(1, None, b'{"a":1}')
+        cache.put(1, "q", b'{"a":2}')
+        assert cache.get(1, None).body == b'{"a":1}'
+        assert cache.get(1, "q").body == b'{"a":2}'
+        assert cache.get(2, None) is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+        assert stats["bytes_saved"] == 14
+
+    def test_invalidate_removes_all_variants(self):
+        """invalidateでアイテムの全バリアントが削除されることを確認"""
+        cache = ResponseCache(1024)
+        cache.put(1, None, b"x")
+        cache.put(1, "q", b"y")
+        cache.invalidate(1)
+        assert cache.get(1, None) is None
+        assert cache.get(1, "q") is None
+
+    def test_size_bound(self):
+        """合計サイズが上限を超えると古いエントリが削除されることを確認"""
+        cache = ResponseCache(10)
+        cache.put(1, None, b"123456")
+        cache.put(2, None, b"123456")
+        assert cache.get(1, None) is None
+        assert cache.stats()["bytes_cached"] == 6
+
+    def test_listener_receives_events(self):
+        """リスナーにヒット/ミス/304のイベントが通知されることを確認"""
+        cache = ResponseCache(1024)
+        events = []
+        cache.add_listener(lambda event, size: events.append((event, size)))
+        cache.get(1, None)
+        cache.put(1, None, b"abc")
+        cache.get(1, None)
+        cache.not_modified(3)
+        assert events == [("miss", 0), ("hit", 3), ("not_modified", 3)]
+
+    def test_disabled_when_zero_bytes(self):
+        """上限0の場合は何もキャッシュされないことを確認"""
+        cache = ResponseCache(0)
+        cache.put(1, None, b"abc")
+        assert cache.get(1, None) is None
+
+
+class TestEtag:
+    """ETag関連のテストクラス"""
+
+    def test_strong_etag_is_stable(self):
+        """同じ本文から同じ強いETagが生成されることを確認"""
+        etag = CachedResponse.from_body(b"abc").etag
+        assert etag == CachedResponse.from_body(b"abc").etag
+        assert etag != CachedResponse.from_body(b"abd").etag
+        assert etag.startswith('"') and etag.endswith('"')
+
+    def test_etag_matches(self):
+        """If-None-Matchの各形式が正しく比較されることを確認"""
+        assert etag_matches('"a"', '"a"')
+        assert etag_matches('"b", W/"a"', '"a"')
+        assert etag_matches("*", '"a"')
+        assert not etag_matches('"b"', '"a"')
+        assert not etag_matches(None, '"a"')
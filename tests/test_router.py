@@ -1,9 +1,24 @@
+import csv
+import io
+import json
+
+import pytest
 from fastapi.testclient import TestClient
 from main import app
+from src.config import Settings, get_settings
+from src.export import ARROW_AVAILABLE
 
 client = TestClient(app)
 
 
+@pytest.fixture
+def seeded_items():
+    """item1〜item5（価格100.0）を登録しておく"""
+    headers = {"Authorization": "Bearer mocked-jwt-token"}
+    for i in range(1, 6):
+        client.post("/items", json={"name": f"item{i}", "price": 100.0}, headers=headers)
+
+
 class TestRootEndpoint:
     """ルートエンドポイント（/）のテスト"""
 
@@ -20,6 +35,7 @@ class TestRootEndpoint:
         assert response.status_code == 200
 
 
+@pytest.mark.usefixtures("seeded_items")
 class TestGetItemEndpoint:
     """GET /items/{item_id} エンドポイントのテスト"""
 
@@ -74,6 +90,38 @@ class TestGetItemEndpoint:
         response = client.get("/items/abc", headers=headers)
         assert response.status_code == 422
 
+    def test_get_item_not_found(self):
+        """存在しないitem_idの場合に404エラーが返ることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/999", headers=headers)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Item not found"
+
+    def test_get_item_returns_etag(self):
+        """ETagヘッダーが返され、If-None-Matchが一致すると304が返ることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/1?q=x", headers=headers)
+        etag = response.headers["ETag"]
+
+        cached = client.get(
+            "/items/1?q=x", headers={**headers, "If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+        other = client.get("/items/1", headers={**headers, "If-None-Match": etag})
+        assert other.status_code == 200
+        assert other.headers["ETag"] != etag
+
+    def test_get_item_served_from_cache(self, cache):
+        """2回目以降の取得がキャッシュから返されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        first = client.get("/items/2", headers=headers)
+        second = client.get("/items/2", headers=headers)
+        assert first.content == second.content
+        assert cache.hits == 1
+
     def test_get_item_without_token(self):
         """トークンなしでアクセスした場合、403エラーが返ることを確認"""
         response = client.get("/items/1")
@@ -115,6 +163,25 @@ class TestPostItemEndpoint:
         assert data["price"] == 50.0
         assert data["q"] is None
 
+    def test_create_item_can_be_read_back(self):
+        """作成したアイテムを取得できることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        payload = {"name": "stored item", "price": 12.5}
+        created = client.post("/items", json=payload, headers=headers).json()
+        response = client.get(f"/items/{created['item_id']}", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {**created, "q": None}
+
+    def test_create_item_ids_are_monotonic(self):
+        """アイテムIDが単調増加で割り当てられることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        payload = {"name": "test item", "price": 50.0}
+        ids = [
+            client.post("/items", json=payload, headers=headers).json()["item_id"]
+            for _ in range(3)
+        ]
+        assert ids == [1, 2, 3]
+
     def test_create_item_with_minimum_valid_data(self):
         """最小限の有効なデータでアイテム作成が正常に動作することを確認"""
         headers = {"Authorization": "Bearer mocked-jwt-token"}
@@ -191,6 +258,7 @@ class TestPostItemEndpoint:
         assert response.status_code == 401
 
 
+@pytest.mark.usefixtures("seeded_items")
 class TestAuthIntegration:
     """認証に関する統合テスト"""
 
@@ -248,3 +316,336 @@ class TestErrorHandling:
         }
         response = client.post("/items", content="invalid data", headers=headers)
         assert response.status_code == 422
+
+
+class TestBulkCreateEndpoint:
+    """POST /items/bulk エンドポイントのテスト"""
+
+    def test_bulk_create_ndjson(self):
+        """NDJSON形式で複数アイテムを一括作成できることを確認"""
+        headers = {
+            "Authorization": "Bearer mocked-jwt-token",
+            "Content-Type": "application/x-ndjson",
+        }
+        body = '{"name": "a", "price": 1}\n{"name": "", "price": 1}\n{"name": "c", "price": 3}\n'
+        response = client.post("/items/bulk", content=body, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["item_ids"] == [1, 2]
+        assert data["errors"][0]["line"] == 2
+        assert data["errors"][0]["errors"][0]["loc"] == ["name"]
+
+        item = client.get("/items/2", headers=headers).json()
+        assert item["name"] == "c"
+
+    def test_bulk_create_json_array(self):
+        """JSON配列形式で複数アイテムを一括作成できることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        payload = [{"name": f"n{i}", "price": i + 1} for i in range(2500)]
+        response = client.post("/items/bulk", json=payload, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2500
+        assert data["item_ids"] == list(range(1, 2501))
+        assert data["errors"] == []
+
+    @pytest.mark.parametrize(
+        "content_type, body",
+        [
+            (
+                "application/x-ndjson",
+                b'{"name": "a", "price": 1}\n{"name": "\xff", "price": 1}\n',
+            ),
+            ("application/json", b'[{"name": "a", "price": 1}, {"name": "\xff", "price": 1}]'),
+            ("application/json", b'[{"name": "a", "price": 1}, {"name": "\\ud800"}]'),
+        ],
+    )
+    def test_bulk_create_invalid_utf8(self, content_type, body):
+        """不正なUTF-8やサロゲートを含むボディでも500にならずエラーとして報告されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token", "Content-Type": content_type}
+        response = client.post("/items/bulk", content=body, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == len(data["item_ids"])
+        assert [e["errors"][0]["type"] for e in data["errors"]] == ["json_invalid"]
+
+    def test_bulk_create_unsupported_media_type(self):
+        """未対応のContent-Typeの場合に415エラーが返ることを確認"""
+        headers = {
+            "Authorization": "Bearer mocked-jwt-token",
+            "Content-Type": "text/plain",
+        }
+        response = client.post("/items/bulk", content="x", headers=headers)
+        assert response.status_code == 415
+
+    def test_bulk_create_without_token(self):
+        """トークンなしでアクセスした場合、403エラーが返ることを確認"""
+        response = client.post("/items/bulk", json=[])
+        assert response.status_code == 403
+
+
+@pytest.mark.usefixtures("seeded_items")
+class TestBatchGetEndpoint:
+    """POST /items:batchGet エンドポイントのテスト"""
+
+    def test_batch_get_items(self):
+        """複数アイテムをリクエスト順に取得し、存在しないIDを報告することを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        payload = {"ids": [3, 99, 1, 3]}
+        response = client.post("/items:batchGet", json=payload, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["items"] == [
+            {"item_id": 3, "name": "item3", "price": 100.0, "q": None},
+            {"item_id": 1, "name": "item1", "price": 100.0, "q": None},
+        ]
+        assert data["missing"] == [99]
+
+    def test_batch_get_too_many_ids(self):
+        """上限を超えるIDを指定した場合に422エラーが返ることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        payload = {"ids": list(range(1, 1002))}
+        response = client.post("/items:batchGet", json=payload, headers=headers)
+        assert response.status_code == 422
+
+    def test_batch_get_invalid_ids(self):
+        """空のリストや0以下のIDでバリデーションエラーが発生することを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        for payload in ({"ids": []}, {"ids": [0]}, {}):
+            response = client.post("/items:batchGet", json=payload, headers=headers)
+            assert response.status_code == 422
+
+    def test_batch_get_without_token(self):
+        """トークンなしでアクセスした場合、403エラーが返ることを確認"""
+        response = client.post("/items:batchGet", json={"ids": [1]})
+        assert response.status_code == 403
+
+
+class TestListItemsEndpoint:
+    """GET /items エンドポイントのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def catalog(self):
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        names = ["apple", "banana", "apricot", "cherry", "avocado"]
+        for i, name in enumerate(names, start=1):
+            client.post("/items", json={"name": name, "price": i * 10}, headers=headers)
+
+    def test_list_items_paginates_with_cursor(self):
+        """カーソルを使ってページを順に取得できることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        first = client.get("/items?limit=2", headers=headers).json()
+        assert [i["item_id"] for i in first["items"]] == [1, 2]
+        assert first["next_cursor"] == 2
+
+        second = client.get("/items?limit=2&cursor=2", headers=headers).json()
+        assert [i["item_id"] for i in second["items"]] == [3, 4]
+
+        last = client.get("/items?limit=2&cursor=4", headers=headers).json()
+        assert [i["item_id"] for i in last["items"]] == [5]
+        assert last["next_cursor"] is None
+
+    def test_list_items_filter_by_name_prefix(self):
+        """qパラメータで名前の前方一致検索ができることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        data = client.get("/items?q=a", headers=headers).json()
+        assert [i["name"] for i in data["items"]] == ["apple", "apricot", "avocado"]
+
+    def test_list_items_filter_by_price_range(self):
+        """価格範囲で絞り込みができることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        data = client.get("/items?min_price=20&max_price=40", headers=headers).json()
+        assert [i["item_id"] for i in data["items"]] == [2, 3, 4]
+
+    def test_list_items_combined_filters_and_cursor(self):
+        """複数条件とカーソルを組み合わせられることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        url = "/items?q=a&min_price=20&limit=1&cursor=1"
+        data = client.get(url, headers=headers).json()
+        assert [i["name"] for i in data["items"]] == ["apricot"]
+        assert data["next_cursor"] == 3
+
+    def test_list_items_invalid_parameters(self):
+        """不正なパラメータでバリデーションエラーが発生することを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        for url in ("/items?limit=0", "/items?limit=1001", f"/items?q={'a' * 51}"):
+            assert client.get(url, headers=headers).status_code == 422
+
+    def test_list_items_without_token(self):
+        """トークンなしでアクセスした場合、403エラーが返ることを確認"""
+        assert client.get("/items").status_code == 403
+
+
+class TestItemStatsEndpoint:
+    """GET /items/stats エンドポイントのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def catalog(self):
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        names = ["apple", "banana", "apricot", "cherry", "avocado"]
+        for i, name in enumerate(names, start=1):
+            client.post("/items", json={"name": name, "price": i * 10}, headers=headers)
+
+    def test_item_stats(self):
+        """カタログ全体の価格統計が返ることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/stats?buckets=2", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 5
+        assert data["sum"] == 150.0
+        assert data["mean"] == 30.0
+        assert (data["min"], data["max"]) == (10.0, 50.0)
+        assert data["percentiles"]["p50"] == 30.0
+        assert data["histogram"] == [
+            {"low": 10.0, "high": 30.0, "count": 2},
+            {"low": 30.0, "high": 50.0, "count": 3},
+        ]
+
+    def test_item_stats_updates_on_create(self):
+        """アイテム作成後に統計が更新されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        client.post("/items", json={"name": "date", "price": 100}, headers=headers)
+        data = client.get("/items/stats", headers=headers).json()
+        assert (data["count"], data["max"]) == (6, 100.0)
+
+    def test_item_stats_filter_by_name_prefix(self):
+        """qパラメータで名前の前方一致で絞り込めることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        data = client.get("/items/stats?q=a", headers=headers).json()
+        assert (data["count"], data["sum"]) == (3, 90.0)
+        empty = client.get("/items/stats?q=z", headers=headers).json()
+        assert empty["count"] == 0
+        assert empty["mean"] is None
+        assert empty["histogram"] == []
+
+    def test_item_stats_invalid_parameters(self):
+        """不正なパラメータでバリデーションエラーが発生することを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        for url in ("/items/stats?buckets=0", "/items/stats?buckets=101"):
+            assert client.get(url, headers=headers).status_code == 422
+
+    def test_item_stats_without_token(self):
+        """トークンなしでアクセスした場合、403エラーが返ることを確認"""
+        assert client.get("/items/stats").status_code == 403
+
+
+@pytest.mark.usefixtures("seeded_items")
+class TestExportEndpoint:
+    """GET /items/export エンドポイントのテスト"""
+
+    def test_export_ndjson(self):
+        """既定でNDJSON形式で全アイテムが出力されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/export", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert 'filename="items.ndjson"' in response.headers["content-disposition"]
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [
+            {"item_id": i, "name": f"item{i}", "price": 100.0} for i in range(1, 6)
+        ]
+
+    def test_export_csv(self):
+        """CSV形式でヘッダー付きで出力されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/export?format=csv", headers=headers)
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0] == ["item_id", "name", "price"]
+        assert rows[1:] == [[str(i), f"item{i}", "100.0"] for i in range(1, 6)]
+
+    def test_export_resumes_from_cursor(self):
+        """cursorで指定したIDの次から出力されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/export?cursor=3", headers=headers)
+        ids = [json.loads(line)["item_id"] for line in response.text.splitlines()]
+        assert ids == [4, 5]
+
+    def test_export_spans_batches(self, monkeypatch):
+        """バッチの区切りをまたいでも漏れや重複がないことを確認"""
+        monkeypatch.setitem(
+            app.dependency_overrides, get_settings, lambda: Settings(export_batch_size=2)
+        )
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/export", headers=headers)
+        ids = [json.loads(line)["item_id"] for line in response.text.splitlines()]
+        assert ids == [1, 2, 3, 4, 5]
+
+    def test_export_invalid_parameters(self):
+        """不正な形式やcursorでバリデーションエラーが発生することを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        for url in ("/items/export?format=xml", "/items/export?cursor=-1"):
+            assert client.get(url, headers=headers).status_code == 422
+
+    @pytest.mark.skipif(ARROW_AVAILABLE, reason="pyarrow is installed")
+    def test_export_arrow_requires_pyarrow(self):
+        """pyarrowがない場合はArrow形式が400エラーになることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/export?format=arrow", headers=headers)
+        assert response.status_code == 400
+
+    def test_export_without_token(self):
+        """トークンなしでアクセスした場合、403エラーが返ることを確認"""
+        assert client.get("/items/export").status_code == 403
+
+
+class TestSearchEndpoint:
+    """GET /items/search エンドポイントのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def catalog(self):
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        for name in ["Red apple", "Apple pie", "Blue applesauce", "Banana bread"]:
+            client.post("/items", json={"name": name, "price": 3.5}, headers=headers)
+
+    def test_search_ranks_matches(self):
+        """一致したアイテムがスコア順に名前と価格付きで返されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/search?q=apple", headers=headers)
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [item["item_id"] for item in items] == [1, 2, 3]
+        assert items[0]["name"] == "Red apple"
+        assert items[0]["price"] == 3.5
+        scores = [item["score"] for item in items]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_prefix_and_fuzzy_can_be_disabled(self):
+        """prefixとfuzzyを無効にすると完全一致のみになることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/search?q=app&prefix=false&fuzzy=false", headers=headers)
+        assert response.json()["items"] == []
+        response = client.get(
+            "/items/search?q=banan&prefix=false&fuzzy=false", headers=headers
+        )
+        assert response.json()["items"] == []
+        response = client.get("/items/search?q=banan&prefix=false", headers=headers)
+        assert [item["item_id"] for item in response.json()["items"]] == [4]
+
+    def test_created_items_are_searchable(self):
+        """作成直後のアイテムが同期を待たずに検索できることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        client.get("/items/search?q=apple", headers=headers)
+        client.post("/items", json={"name": "Cherry tart", "price": 1.0}, headers=headers)
+        client.post(
+            "/items/bulk",
+            content='{"name": "Cherry jam", "price": 2.0}\n',
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        response = client.get("/items/search?q=cherry", headers=headers)
+        assert sorted(item["item_id"] for item in response.json()["items"]) == [5, 6]
+
+    def test_limit(self):
+        """limitで返却件数が制限されることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        response = client.get("/items/search?q=apple&limit=1", headers=headers)
+        assert len(response.json()["items"]) == 1
+
+    def test_validation_and_auth(self):
+        """空のクエリは422、トークンなしは403になることを確認"""
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        assert client.get("/items/search?q=", headers=headers).status_code == 422
+        assert client.get("/items/search?q=a&limit=0", headers=headers).status_code == 422
+        assert client.get("/items/search?q=apple").status_code == 403
@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import fastapi.routing
+import pytest
+import starlette.requests
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from main import app
+from src import routing
+from src.config import Settings
+from src.models import ItemResponse
+from src.routing import AppRoute
+
+
+def make_client() -> TestClient:
+    test_app = FastAPI()
+    router = fastapi.APIRouter(route_class=AppRoute)
+
+    @router.get("/trusted", response_model=ItemResponse)
+    async def trusted():
+        return ItemResponse(item_id=1, name="a", price=1.5, q="x")
+
+    @router.get("/dict", response_model=ItemResponse)
+    async def as_dict():
+        return {"item_id": "2", "name": "b", "price": 2}
+
+    @router.post("/created", response_model=ItemResponse, status_code=201)
+    async def created():
+        return ItemResponse(item_id=3, name="c", price=3.0)
+
+    test_app.include_router(router)
+    return TestClient(test_app)
+
+
+@pytest.fixture
+def serialize_calls(monkeypatch):
+    calls = []
+    original = fastapi.routing.serialize_response
+
+    async def counting(**kwargs):
+        calls.append(kwargs)
+        return await original(**kwargs)
+
+    monkeypatch.setattr(fastapi.routing, "serialize_response", counting)
+    return calls
+
+
+class TestAppRoute:
+    """AppRouteクラスのテストクラス"""
+
+    def test_default_uses_response_model(self, serialize_calls):
+        """既定ではFastAPIのレスポンスモデル処理が使われることを確認"""
+        response = make_client().get("/trusted")
+        assert response.json() == {"item_id": 1, "name": "a", "price": 1.5, "q": "x"}
+        assert len(serialize_calls) == 1
+
+    def test_fast_serialization_skips_response_model(self, monkeypatch, serialize_calls):
+        """高速モードでは信頼済みモデルが再検証なしでJSON化されることを確認"""
+        monkeypatch.setattr(
+            routing, "get_settings", lambda: Settings(fast_serialization=True)
+        )
+        client = make_client()
+        response = client.get("/trusted")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"item_id": 1, "name": "a", "price": 1.5, "q": "x"}
+
+        created = client.post("/created")
+        assert created.status_code == 201
+        assert created.json()["item_id"] == 3
+        assert serialize_calls == []
+
+    def test_fast_serialization_validates_untrusted(self, monkeypatch, serialize_calls):
+        """モデル以外の戻り値は高速モードでも通常どおり検証されることを確認"""
+        monkeypatch.setattr(
+            routing, "get_settings", lambda: Settings(fast_serialization=True)
+        )
+        response = make_client().get("/dict")
+        assert response.json() == {"item_id": 2, "name": "b", "price": 2.0, "q": None}
+        assert len(serialize_calls) == 1
+
+    def test_endpoint_signature_preserved(self):
+        """ラップ後もエンドポイントのパラメータがOpenAPIに反映されることを確認"""
+        params = app.openapi()["paths"]["/items/{item_id}"]["get"]["parameters"]
+        assert {p["name"] for p in params} >= {"item_id", "q"}
+
+
+INVALID_BODIES = [
+    b"{}",
+    b'{"name": "", "price": 0}',
+    b'{"name": 1, "price": "x"}',
+    b'{"name": "a"}',
+    b"[]",
+    b"1",
+    b'{"name": "a", "price": ',
+    b"",
+]
+
+
+@pytest.fixture
+def raw_body_validation(monkeypatch):
+    monkeypatch.setattr(
+        routing, "get_settings", lambda: Settings(raw_body_validation=True)
+    )
+
+
+class TestRawBodyValidation:
+    """リクエストボディの直接検証モードのテストクラス"""
+
+    headers = {"Authorization": "Bearer mocked-jwt-token"}
+
+    def test_valid_body_skips_dict_decoding(self, raw_body_validation, monkeypatch):
+        """有効なボディがdictを経由せずに検証されることを確認"""
+        decoded = []
+        original = json.loads
+        monkeypatch.setattr(
+            starlette.requests.json, "loads", lambda b: decoded.append(b) or original(b)
+        )
+        client = TestClient(app)
+        response = client.post(
+            "/items", json={"name": "fast", "price": 2.5}, headers=self.headers
+        )
+        assert response.status_code == 200
+        assert decoded == []
+        assert response.json()["name"] == "fast"
+
+    def test_request_json_returns_cached_value(self):
+        """Request.json()が_jsonに設定した値をボディを読まずに返すことを確認
+
+        直接検証モードはStarletteの非公開属性_jsonに依存するため、その前提を固定する。
+        """
+
+        async def receive():
+            raise AssertionError("body must not be read")
+
+        request = starlette.requests.Request(
+            {"type": "http", "method": "POST", "headers": []}, receive
+        )
+        parsed = ItemResponse(item_id=1, name="a", price=1.0)
+        request._json = parsed
+        assert asyncio.run(request.json()) is parsed
+
+    @pytest.mark.parametrize("body", INVALID_BODIES)
+    def test_errors_match_default_mode(self, body, monkeypatch):
+        """不正なボディのエラー応答が通常モードと同一であることを確認"""
+        client = TestClient(app)
+        headers = {**self.headers, "Content-Type": "application/json"}
+        expected = client.post("/items", content=body, headers=headers)
+        monkeypatch.setattr(
+            routing, "get_settings", lambda: Settings(raw_body_validation=True)
+        )
+        actual = client.post("/items", content=body, headers=headers)
+        assert actual.status_code == expected.status_code == 422
+        assert actual.json() == expected.json()
+
+    def test_other_body_models(self, raw_body_validation):
+        """他の単一モデルのボディでも同様に検証されることを確認"""
+        client = TestClient(app)
+        response = client.post("/items:batchGet", json={"ids": [0]}, headers=self.headers)
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "ids", 0]
@@ -0,0 +1,257 @@
+import asyncio
+
+import pytest
+from src import search
+from src.config import Settings
+from src.models import Item
+from src.search import SearchIndex, tokenize, trigrams
+from src.store import SQLiteItemRepository, StoredItem
+
+NAMES = ["Red apple", "Apple pie", "Blue applesauce", "Banana bread", "Grape juice"]
+
+
+@pytest.fixture
+async def index(repository):
+    for name in NAMES:
+        await repository.add(Item(name=name, price=1.0))
+    fresh = SearchIndex()
+    await fresh.refresh(repository, 1.0)
+    return fresh
+
+
+def ids(hits):
+    return [item_id for item_id, _ in hits]
+
+
+class TestTokenize:
+    """tokenize・trigrams関数のテストクラス"""
+
+    def test_casefold_and_split(self):
+        """大文字小文字を区別せず、記号で区切られることを確認"""
+        assert tokenize("Straße-Apple, 2kg") == ["strasse", "apple", "2kg"]
+
+    def test_trigrams_include_word_boundaries(self):
+        """語頭と語末を含むトライグラムが生成されることを確認"""
+        assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+@pytest.mark.anyio
+class TestSearchIndex:
+    """SearchIndexクラスのテストクラス"""
+
+    async def test_exact_before_prefix(self, index):
+        """完全一致が前方一致より上位になることを確認"""
+        assert ids(index.search("apple")) == [1, 2, 3]
+        assert ids(index.search("apple", prefix=False)) == [1, 2]
+
+    async def test_all_tokens_rank_higher(self, index):
+        """複数の語に一致するアイテムが上位になることを確認"""
+        assert ids(index.search("red apple"))[0] == 1
+        assert ids(index.search("bread grape")) == [4, 5]
+
+    async def test_prefix_applies_to_last_token(self, index):
+        """前方一致は最後の語にのみ適用されることを確認"""
+        assert ids(index.search("appl", fuzzy=False)) == [1, 2, 3]
+        assert ids(index.search("appl red", fuzzy=False)) == [1]
+
+    async def test_fuzzy_fallback(self, index):
+        """一致する語がない場合にトライグラムで類似語が検索されることを確認"""
+        assert ids(index.search("banan bred", prefix=False)) == [4]
+        assert index.search("banan bred", prefix=False, fuzzy=False) == []
+        assert index.search("zzzz") == []
+
+    async def test_limit_and_empty_query(self, index):
+        """件数の制限と、語を含まないクエリの結果を確認"""
+        assert len(index.search("apple", limit=2)) == 2
+        assert index.search("!!!") == []
+        assert SearchIndex().search("apple") == []
+
+    async def test_search_async_yields_between_chunks(self, index, monkeypatch):
+        """非同期版が同じ結果を返し、チャンクごとにイベントループへ制御を返すことを確認"""
+        monkeypatch.setattr(search, "SCORE_CHUNK", 1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        before = ticks
+        hits = await index.search_async("apple")
+        task.cancel()
+        assert hits == index.search("apple")
+        assert ticks - before >= 2
+
+    async def test_first_refresh_yields_to_event_loop(self, repository, monkeypatch):
+        """初回の全件同期がSYNC_YIELD_ITEMS件ごとにイベントループへ制御を返すことを確認"""
+        monkeypatch.setattr(search, "SYNC_BATCH_SIZE", 50)
+        monkeypatch.setattr(search, "SYNC_YIELD_ITEMS", 10)
+        await repository.add_many([Item(name=f"item {i}", price=1.0) for i in range(200)])
+        fresh = SearchIndex()
+        longest = 0
+        added = []
+
+        async def ticker():
+            nonlocal longest
+            while True:
+                before = fresh.doc_count
+                await asyncio.sleep(0)
+                longest = max(longest, fresh.doc_count - before)
+                if not added and fresh.doc_count:
+                    # 同期中にAPI経由で追加されたアイテムも一度だけ索引される
+                    stored = await repository.add(Item(name="late", price=1.0))
+                    fresh.add(stored)
+                    added.append(stored)
+
+        task = asyncio.create_task(ticker())
+        await fresh.refresh(repository, 0.0)
+        task.cancel()
+        assert 0 < longest <= 10
+        assert fresh.doc_count == 201
+        assert ids(fresh.search("late")) == [201]
+
+    async def test_add_before_and_after_refresh(self, repository):
+        """同期前の追加は無視され、同期後の追加は重複せずに索引されることを確認"""
+        fresh = SearchIndex()
+        stored = await repository.add(Item(name="plum", price=1.0))
+        fresh.add(stored)
+        assert fresh.doc_count == 0
+        await fresh.refresh(repository, 0.0)
+        stored = await repository.add(Item(name="plum jam", price=1.0))
+        fresh.add(stored)
+        assert ids(fresh.search("jam")) == [2]
+        await fresh.refresh(repository, 0.0)
+        assert fresh.doc_count == 2
+        assert ids(fresh.search("plum")) == [1, 2]
+
+    async def test_refresh_is_throttled(self, index, repository):
+        """同期間隔内は新しいアイテムを読み込まないことを確認"""
+        await repository.add(Item(name="kiwi", price=1.0))
+        await index.refresh(repository, 60.0)
+        assert index.search("kiwi") == []
+        await index.refresh(repository, 0.0)
+        assert ids(index.search("kiwi")) == [6]
+
+
+@pytest.mark.anyio
+class TestOutOfOrderCommits:
+    """他のワーカーが予約したIDが後からコミットされる場合のテストクラス"""
+
+    @pytest.fixture
+    def sqlite(self, tmp_path):
+        repository = SQLiteItemRepository(str(tmp_path / "items.db"), pool_size=1)
+        yield repository
+        repository.close()
+
+    async def test_lower_id_committed_later_is_indexed(self, sqlite):
+        """同期済みの位置より小さいIDが後からコミットされても索引されることを確認"""
+        fresh = SearchIndex()
+        first = await sqlite.reserve_ids(3)
+        await sqlite.insert([StoredItem(first + 2, "kiwi", 1.0)])
+        await fresh.refresh(sqlite, 0.0)
+        assert fresh.scanned_upto == first + 2
+
+        await sqlite.insert([StoredItem(first, "plum", 1.0)])
+        await fresh.refresh(sqlite, 0.0)
+        assert ids(fresh.search("plum")) == [first]
+
+        await sqlite.insert([StoredItem(first + 1, "plum jam", 1.0)])
+        await fresh.refresh(sqlite, 0.0)
+        await fresh.refresh(sqlite, 0.0)
+        assert ids(fresh.search("plum")) == [first, first + 1]
+        assert fresh.doc_count == 3
+
+    async def test_add_in_gap_indexed_once(self, sqlite):
+        """隙間のIDをAPI経由で追加すると即座に索引され、同期で重複しないことを確認"""
+        fresh = SearchIndex()
+        first = await sqlite.reserve_ids(2)
+        await sqlite.insert([StoredItem(first + 1, "kiwi", 1.0)])
+        await fresh.refresh(sqlite, 0.0)
+
+        stored = StoredItem(first, "plum", 1.0)
+        await sqlite.insert([stored])
+        fresh.add(stored)
+        assert ids(fresh.search("plum")) == [first]
+        await fresh.refresh(sqlite, 0.0)
+        assert fresh.doc_count == 2
+
+    async def test_gaps_spanning_batches(self, sqlite, monkeypatch):
+        """複数のバッチにまたがる隙間も埋められることを確認"""
+        monkeypatch.setattr(search, "SYNC_BATCH_SIZE", 2)
+        fresh = SearchIndex()
+        first = await sqlite.reserve_ids(8)
+        late = [first + 1, first + 3, first + 4, first + 6]
+        await sqlite.insert(
+            [StoredItem(i, f"early{i}", 1.0) for i in range(first, first + 8) if i not in late]
+        )
+        await fresh.refresh(sqlite, 0.0)
+        assert fresh.doc_count == 4
+
+        await sqlite.insert([StoredItem(i, f"late{i}", 1.0) for i in late])
+        await fresh.refresh(sqlite, 0.0)
+        assert fresh.doc_count == 8
+        assert sorted(ids(fresh.search(f"late{first + 4}"))) == [first + 4]
+
+    async def test_gap_given_up_after_retry_period(self, sqlite, monkeypatch):
+        """GAP_RETRY_SECONDSを過ぎた隙間は探さなくなることを確認"""
+        monkeypatch.setattr(search, "GAP_RETRY_SECONDS", 0.0)
+        fresh = SearchIndex()
+        first = await sqlite.reserve_ids(2)
+        await sqlite.insert([StoredItem(first + 1, "kiwi", 1.0)])
+        await fresh.refresh(sqlite, 0.0)
+        await sqlite.insert([StoredItem(first, "plum", 1.0)])
+        await fresh.refresh(sqlite, 0.0)
+        assert fresh.search("plum") == []
+
+
+@pytest.mark.anyio
+class TestSnapshot:
+    """検索インデックスのスナップショットのテストクラス"""
+
+    async def test_round_trip(self, index, tmp_path):
+        """保存して読み込んだインデックスが同じ結果を返すことを確認"""
+        path = str(tmp_path / "search.idx")
+        index.save(path)
+        loaded = SearchIndex.load(path)
+        assert loaded.doc_count == len(NAMES)
+        assert loaded.scanned_upto == len(NAMES)
+        for query in ["apple", "appl", "banan bred", "red apple", "juice"]:
+            assert loaded.search(query) == index.search(query)
+
+    async def test_loaded_index_catches_up(self, index, repository, tmp_path):
+        """読み込み後に追加されたアイテムも検索・再保存できることを確認"""
+        path = str(tmp_path / "search.idx")
+        index.save(path)
+        await repository.add(Item(name="Apple tart", price=1.0))
+        loaded = SearchIndex.load(path)
+        await loaded.refresh(repository, 0.0)
+        loaded.add(StoredItem(7, "apple cider", 1.0))
+        assert ids(loaded.search("apple", prefix=False)) == [1, 2, 6, 7]
+
+        path2 = str(tmp_path / "search2.idx")
+        loaded.save(path2)
+        merged = SearchIndex.load(path2)
+        assert merged.doc_count == 7
+        assert merged.search("apple") == loaded.search("apple")
+        assert merged.search("cidr") == loaded.search("cidr")
+
+    async def test_get_search_index_loads_snapshot(self, index, tmp_path, monkeypatch):
+        """SEARCH_SNAPSHOTのスナップショットが読み込まれることを確認"""
+        path = str(tmp_path / "search.idx")
+        index.save(path)
+        monkeypatch.setattr(search, "_index", None)
+        monkeypatch.setattr(search, "get_settings", lambda: Settings(search_snapshot=path))
+        assert search.get_search_index().doc_count == len(NAMES)
+
+    async def test_unreadable_snapshot_is_ignored(self, tmp_path, monkeypatch):
+        """壊れたスナップショットの場合は空のインデックスになることを確認"""
+        path = tmp_path / "search.idx"
+        path.write_bytes(b"not an index at all")
+        monkeypatch.setattr(search, "_index", None)
+        monkeypatch.setattr(
+            search, "get_settings", lambda: Settings(search_snapshot=str(path))
+        )
+        assert search.get_search_index().doc_count == 0
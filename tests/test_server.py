@@ -0,0 +1,121 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from src.config import get_settings
+from src.server import bind_socket, prepare_environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+@pytest.fixture
+def environment(monkeypatch, tmp_path):
+    """起動設定を一時ディレクトリに向け、テスト後に設定キャッシュを戻す"""
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "items.db"))
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path / "metrics"))
+    monkeypatch.delenv("STORE_BACKEND", raising=False)
+    yield tmp_path
+    get_settings.cache_clear()
+
+
+class TestPrepareEnvironment:
+    """prepare_environment関数のテストクラス"""
+
+    def test_defaults_to_sqlite_for_multiple_workers(self, environment):
+        """複数ワーカーではSQLiteバックエンドが既定になることを確認"""
+        settings = prepare_environment(2)
+        assert settings.store_backend == "sqlite"
+        assert (environment / "items.db").exists()
+        assert (environment / "metrics").is_dir()
+
+    def test_rejects_memory_store_for_multiple_workers(self, environment, monkeypatch):
+        """複数ワーカーでメモリストアを指定するとエラーになることを確認"""
+        monkeypatch.setenv("STORE_BACKEND", "memory")
+        with pytest.raises(ValueError):
+            prepare_environment(2)
+
+    def test_clears_previous_metrics(self, environment):
+        """前回の実行のメトリクスが削除されることを確認"""
+        (environment / "metrics").mkdir()
+        (environment / "metrics" / "metrics-1.json").write_text("{}")
+        (environment / "metrics" / "metrics-2.json.tmp").write_text("{")
+        prepare_environment(2)
+        assert list((environment / "metrics").iterdir()) == []
+
+    def test_keeps_other_files_in_metrics_dir(self, environment):
+        """メトリクスのディレクトリにある他のファイルは削除されないことを確認"""
+        (environment / "metrics").mkdir()
+        (environment / "metrics" / "notes.txt").write_text("keep")
+        (environment / "metrics" / "cache").mkdir()
+        prepare_environment(2)
+        names = sorted(path.name for path in (environment / "metrics").iterdir())
+        assert names == ["cache", "notes.txt"]
+
+    def test_shares_rate_limit_table(self, environment, monkeypatch):
+        """レート制限が有効な場合はワーカー間で共有するファイルが設定されることを確認"""
+        monkeypatch.setenv("RATE_LIMIT_PER_SECOND", "10")
+        monkeypatch.setenv("RATE_LIMIT_FILE", "")
+        settings = prepare_environment(2)
+        assert settings.rate_limit_file
+        assert os.environ["RATE_LIMIT_FILE"] == settings.rate_limit_file
+
+
+class TestBindSocket:
+    """bind_socket関数のテストクラス"""
+
+    @pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="no SO_REUSEPORT")
+    def test_reuse_port(self):
+        """SO_REUSEPORTで同じポートを複数回bindできることを確認"""
+        first = bind_socket("127.0.0.1", 0, reuse_port=True)
+        port = first.getsockname()[1]
+        second = bind_socket("127.0.0.1", port, reuse_port=True)
+        assert second.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT)
+        first.close()
+        second.close()
+
+
+class TestMultiWorkerServer:
+    """複数ワーカー起動の結合テスト"""
+
+    def test_item_ids_unique_across_workers(self, environment):
+        """複数ワーカーに分散した作成でもアイテムIDが重複しないことを確認"""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        env = dict(os.environ, STORE_BACKEND="sqlite")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.server", "--workers", "2", "--port", str(port)],
+            cwd=ROOT,
+            env=env,
+        )
+        url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    httpx.get(url + "/")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.1)
+
+            def create(i: int) -> int:
+                with httpx.Client(base_url=url) as client:
+                    payload = {"name": f"item{i}", "price": 1.0}
+                    return client.post("/items", json=payload, headers=headers).json()[
+                        "item_id"
+                    ]
+
+            with ThreadPoolExecutor(8) as executor:
+                ids = list(executor.map(create, range(50)))
+            assert sorted(ids) == list(range(1, 51))
+        finally:
+            process.terminate()
+            process.wait()
@@ -0,0 +1,161 @@
+import asyncio
+
+import httpx
+import pytest
+from main import app
+from src import singleflight
+from src.config import Settings
+from src.singleflight import SingleFlight, coalesce, get_group
+
+headers = {"Authorization": "Bearer mocked-jwt-token"}
+
+
+@pytest.mark.anyio
+class TestSingleFlight:
+    """SingleFlightクラスのテストクラス"""
+
+    async def test_concurrent_calls_share_one_load(self):
+        """同じキーの同時呼び出しで読み込みが1回だけ実行されることを確認"""
+        group = SingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(group.do("k", load) for _ in range(10)))
+        assert results == ["value"] * 10
+        assert len(calls) == 1
+        assert group.stats() == {"calls": 1, "coalesced": 9, "timeouts": 0, "in_flight": 0}
+
+    async def test_different_keys_load_separately(self):
+        """異なるキーはそれぞれ読み込まれることを確認"""
+        group = SingleFlight()
+
+        async def load(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            group.do("a", lambda: load(1)), group.do("b", lambda: load(2))
+        )
+        assert results == [1, 2]
+        assert group.calls == 2
+
+    async def test_errors_reach_all_waiters_and_are_not_cached(self):
+        """例外が全ての待機者に伝わり、次の呼び出しで再実行されることを確認"""
+        group = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(group.do("k", failing) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        with pytest.raises(ValueError):
+            await group.do("k", failing)
+        assert len(attempts) == 2
+
+    async def test_timeout(self):
+        """タイムアウトで全ての待機者にTimeoutErrorが返ることを確認"""
+        group = SingleFlight(timeout=0.01)
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        results = await asyncio.gather(
+            *(group.do("k", slow) for _ in range(2)), return_exceptions=True
+        )
+        assert all(isinstance(r, TimeoutError) for r in results)
+        assert group.timeouts == 1
+        assert group.in_flight() == 0
+
+    async def test_cancelled_waiter_does_not_cancel_load(self):
+        """待機者がキャンセルされても他の待機者の読み込みは継続することを確認"""
+        group = SingleFlight()
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(group.do("k", load))
+        second = asyncio.ensure_future(group.do("k", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == "done"
+
+    async def test_coalesce_decorator(self):
+        """デコレータで同じ引数の同時呼び出しがまとめられることを確認"""
+        calls = []
+
+        @coalesce("test", key=lambda item_id: item_id)
+        async def fetch(item_id):
+            calls.append(item_id)
+            await asyncio.sleep(0.01)
+            return item_id * 2
+
+        assert await asyncio.gather(fetch(1), fetch(1), fetch(2)) == [2, 2, 4]
+        assert calls == [1, 2]
+        assert get_group("test").coalesced == 1
+
+
+@pytest.mark.anyio
+class TestReadItemCoalescing:
+    """GET /items/{item_id} のリクエスト集約のテストクラス"""
+
+    async def test_concurrent_reads_share_lookup(self, repository, monkeypatch):
+        """同じアイテムへの同時リクエストでストアの参照が1回になることを確認"""
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/items", json={"name": "hot", "price": 1.0}, headers=headers)
+            lookups = []
+            original = repository.get
+
+            async def slow_get(item_id):
+                lookups.append(item_id)
+                await asyncio.sleep(0.01)
+                return await original(item_id)
+
+            monkeypatch.setattr(repository, "get", slow_get)
+            responses = await asyncio.gather(
+                *(client.get("/items/1", headers=headers) for _ in range(10))
+            )
+            assert [r.json()["name"] for r in responses] == ["hot"] * 10
+            assert lookups == [1]
+            missing = await asyncio.gather(
+                *(client.get("/items/2", headers=headers) for _ in range(3))
+            )
+            assert [r.status_code for r in missing] == [404] * 3
+
+            metrics = (await client.get("/metrics")).text
+            assert 'singleflight_coalesced{group="read_item"} 11' in metrics
+
+    async def test_timed_out_load_returns_504(self, repository, monkeypatch):
+        """共有した読み込みがタイムアウトすると全リクエストが504になることを確認"""
+        monkeypatch.setattr(
+            singleflight,
+            "get_settings",
+            lambda: Settings(single_flight_timeout_seconds=0.05),
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/items", json={"name": "slow", "price": 1.0}, headers=headers)
+            original = repository.get
+
+            async def slow_get(item_id):
+                await asyncio.sleep(1)
+                return await original(item_id)
+
+            monkeypatch.setattr(repository, "get", slow_get)
+            responses = await asyncio.gather(
+                *(client.get("/items/1", headers=headers) for _ in range(3))
+            )
+            assert [r.status_code for r in responses] == [504] * 3
+            assert responses[0].json() == {"detail": "Timed out loading the item"}
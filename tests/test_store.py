@@ -0,0 +1,293 @@
+import random
+
+import pytest
+from src.config import Settings
+from src.models import Item
+from src.store import (
+    ItemFilter,
+    ItemTable,
+    SortedIndex,
+    InMemoryItemRepository,
+    SQLiteItemRepository,
+    StoredItem,
+    create_repository,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        repository = InMemoryItemRepository()
+    else:
+        repository = SQLiteItemRepository(str(tmp_path / "items.db"), pool_size=2)
+    yield repository
+    repository.close()
+
+
+@pytest.mark.anyio
+class TestItemRepository:
+    """ItemRepository実装共通のテストクラス"""
+
+    async def test_add_and_get(self, repo):
+        """追加したアイテムをIDで取得できることを確認"""
+        stored = await repo.add(Item(name="apple", price=1.5))
+        assert stored == StoredItem(1, "apple", 1.5)
+        assert await repo.get(1) == stored
+
+    async def test_get_missing(self, repo):
+        """存在しないIDの場合にNoneが返ることを確認"""
+        assert await repo.get(42) is None
+
+    async def test_get_many(self, repo):
+        """複数IDを一度に取得し、存在しないIDは結果に含まれないことを確認"""
+        await repo.add_many([Item(name=f"n{i}", price=1.0) for i in range(3)])
+        found = await repo.get_many([3, 1, 7])
+        assert found == {1: StoredItem(1, "n0", 1.0), 3: StoredItem(3, "n2", 1.0)}
+        assert await repo.get_many([]) == {}
+
+    async def test_list_items(self, repo):
+        """カーソルと各種フィルタで一覧を取得できることを確認"""
+        names = ["apple", "banana", "apricot", "cherry", "avocado", "apex"]
+        await repo.add_many(
+            [Item(name=n, price=(i + 1) * 10.0) for i, n in enumerate(names)]
+        )
+        page = await repo.list_items(2, 2)
+        assert [s.item_id for s in page] == [3, 4]
+
+        by_name = await repo.list_items(0, 10, ItemFilter(name_prefix="ap"))
+        assert [s.name for s in by_name] == ["apple", "apricot", "apex"]
+
+        by_price = await repo.list_items(
+            2, 10, ItemFilter(min_price=20.0, max_price=50.0)
+        )
+        assert [s.item_id for s in by_price] == [3, 4, 5]
+
+        combined = await repo.list_items(
+            1, 1, ItemFilter(min_price=30.0, name_prefix="a")
+        )
+        assert [s.name for s in combined] == ["apricot"]
+        assert await repo.list_items(0, 10, ItemFilter(name_prefix="z")) == []
+
+    async def test_list_items_non_ascii_prefix(self, repo):
+        """非ASCIIの名前でも前方一致で絞り込めることを確認"""
+        names = ["日本", "日本語", "日付", "にほん"]
+        await repo.add_many([Item(name=n, price=1.0) for n in names])
+        found = await repo.list_items(0, 10, ItemFilter(name_prefix="日本"))
+        assert [s.name for s in found] == ["日本", "日本語"]
+
+    async def test_list_items_matches_brute_force(self, repo):
+        """ランダムなデータとフィルタで全件走査と同じ結果になることを確認"""
+        rng = random.Random(0)
+        items = [
+            Item(name=rng.choice("abc") + rng.choice("abc"), price=rng.randint(1, 50))
+            for _ in range(300)
+        ]
+        await repo.add_many(items)
+        stored = [StoredItem(i, item.name, item.price) for i, item in enumerate(items, 1)]
+        for _ in range(50):
+            filters = ItemFilter(
+                min_price=rng.choice([None, rng.randint(1, 50)]),
+                max_price=rng.choice([None, rng.randint(1, 50)]),
+                name_prefix=rng.choice([None, "a", "bc", "c"]),
+            )
+            after, limit = rng.randint(0, 300), rng.randint(1, 20)
+            expected = [
+                s for s in stored if s.item_id > after and filters.matches(s)
+            ][:limit]
+            assert await repo.list_items(after, limit, filters) == expected
+
+    async def test_ids_are_monotonic(self, repo):
+        """IDが1から単調増加で割り当てられることを確認"""
+        ids = [(await repo.add(Item(name=f"n{i}", price=1.0))).item_id for i in range(5)]
+        assert ids == [1, 2, 3, 4, 5]
+        assert await repo.count() == 5
+
+    async def test_add_many(self, repo):
+        """一括追加で連番のIDが割り当てられることを確認"""
+        await repo.add(Item(name="first", price=1.0))
+        items = [Item(name=f"n{i}", price=i + 1.0) for i in range(3)]
+        stored = await repo.add_many(items)
+        assert [s.item_id for s in stored] == [2, 3, 4]
+        assert await repo.get(4) == StoredItem(4, "n2", 3.0)
+        assert await repo.add_many([]) == []
+
+    async def test_price_stats(self, repo):
+        """価格の集計値・パーセンタイル・ヒストグラムを確認"""
+        assert await repo.price_stats() == (0, 0.0, None, None, {}, [])
+        await repo.add_many([Item(name=f"n{i}", price=float(i)) for i in range(1, 101)])
+        await repo.add(Item(name="other", price=1000.0))
+        stats = await repo.price_stats(buckets=4)
+        assert stats.count == 101
+        assert stats.total == 5050.0 + 1000.0
+        assert (stats.minimum, stats.maximum) == (1.0, 1000.0)
+        assert stats.percentiles == {50: 51.0, 90: 91.0, 95: 96.0, 99: 100.0}
+        assert [b[2] for b in stats.histogram] == [100, 0, 0, 1]
+        assert stats.histogram[0][:2] == (1.0, 250.75)
+        assert stats.histogram[-1][1] == 1000.0
+
+    async def test_price_stats_interpolates_and_filters(self, repo):
+        """パーセンタイルの線形補間と名前の前方一致での絞り込みを確認"""
+        await repo.add_many(
+            [Item(name=n, price=p) for n, p in [("ab", 10), ("ac", 20), ("b", 99)]]
+        )
+        stats = await repo.price_stats("a", buckets=2)
+        assert (stats.count, stats.total) == (2, 30.0)
+        assert stats.percentiles[50] == 15.0
+        assert stats.percentiles[90] == pytest.approx(19.0)
+        assert stats.histogram == [(10.0, 15.0, 1), (15.0, 20.0, 1)]
+        assert (await repo.price_stats("z")).count == 0
+        single = await repo.price_stats("b")
+        assert single.histogram == [(99.0, 99.0, 1)]
+
+
+class TestSQLiteItemRepository:
+    """SQLiteItemRepository固有のテストクラス"""
+
+    @pytest.mark.anyio
+    async def test_data_persists_across_instances(self, tmp_path):
+        """同じファイルを開き直してもデータが残ることを確認"""
+        path = str(tmp_path / "items.db")
+        first = SQLiteItemRepository(path)
+        await first.add(Item(name="kept", price=2.0))
+        first.close()
+
+        second = SQLiteItemRepository(path)
+        assert await second.get(1) == StoredItem(1, "kept", 2.0)
+        assert (await second.add(Item(name="next", price=3.0))).item_id == 2
+        second.close()
+
+    @pytest.mark.anyio
+    async def test_stats_seeded_from_existing_items(self, tmp_path):
+        """集計テーブルがない既存DBでも集計値が初期化されることを確認"""
+        path = str(tmp_path / "items.db")
+        first = SQLiteItemRepository(path)
+        await first.add_many([Item(name="a", price=2.0), Item(name="b", price=4.0)])
+        with first._connection() as conn:
+            conn.execute("DROP TRIGGER items_update_stats")
+            conn.execute("DROP TABLE item_stats")
+        first.close()
+
+        second = SQLiteItemRepository(path)
+        await second.add(Item(name="c", price=6.0))
+        stats = await second.price_stats()
+        assert (stats.count, stats.total, stats.minimum, stats.maximum) == (3, 12.0, 2.0, 6.0)
+        second.close()
+
+    @pytest.mark.anyio
+    async def test_catalog_price_stats_cached_until_items_added(self, tmp_path):
+        """件数が変わるまで全体の価格統計を再計算しないことを確認"""
+        repository = SQLiteItemRepository(str(tmp_path / "items.db"), stats_refresh=0)
+        await repository.add_many([Item(name="a", price=2.0), Item(name="b", price=4.0)])
+        computed = []
+        compute = repository._compute_price_stats
+
+        def spy(conn, buckets):
+            computed.append(buckets)
+            return compute(conn, buckets)
+
+        repository._compute_price_stats = spy
+        first = await repository.price_stats()
+        assert await repository.price_stats() == first
+        assert computed == [10]
+
+        await repository.add(Item(name="c", price=6.0))
+        stats = await repository.price_stats()
+        assert computed == [10, 10]
+        assert (stats.count, stats.maximum) == (3, 6.0)
+        repository.close()
+
+    @pytest.mark.anyio
+    async def test_catalog_price_stats_refresh_interval(self, tmp_path):
+        """追加があっても更新間隔内はキャッシュした統計を返すことを確認"""
+        repository = SQLiteItemRepository(str(tmp_path / "items.db"), stats_refresh=60)
+        await repository.add(Item(name="a", price=2.0))
+        assert (await repository.price_stats()).count == 1
+        await repository.add(Item(name="b", price=4.0))
+        assert (await repository.price_stats()).count == 1
+        assert (await repository.price_stats(buckets=5)).count == 2
+        repository.close()
+
+    def test_wal_mode_enabled(self, tmp_path):
+        """WALモードが有効になっていることを確認"""
+        repository = SQLiteItemRepository(str(tmp_path / "items.db"), pool_size=1)
+        with repository._connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        repository.close()
+
+
+class TestCreateRepository:
+    """create_repository関数のテストクラス"""
+
+    def test_memory_backend(self):
+        """memory指定でインメモリ実装が作成されることを確認"""
+        repository = create_repository(Settings(store_backend="memory"))
+        assert isinstance(repository, InMemoryItemRepository)
+
+    def test_sqlite_backend(self, tmp_path):
+        """sqlite指定でSQLite実装が作成されることを確認"""
+        settings = Settings(store_backend="sqlite", sqlite_path=str(tmp_path / "x.db"))
+        repository = create_repository(settings)
+        assert isinstance(repository, SQLiteItemRepository)
+        repository.close()
+
+    def test_unknown_backend(self):
+        """未知のバックエンド指定でValueErrorが発生することを確認"""
+        with pytest.raises(ValueError):
+            create_repository(Settings(store_backend="redis"))
+
+
+class TestSortedIndex:
+    """SortedIndexクラスのテストクラス"""
+
+    def test_matches_sorted_list(self):
+        """チャンク分割後も範囲の件数と列挙がソート済みリストと一致することを確認"""
+        values = [random.randint(0, 500) for _ in range(3000)]
+        index = SortedIndex(load=16)
+        for value in values:
+            index.add(value)
+        ordered = sorted(values)
+        for low, high in [(0, 501), (100, 200), (250, 251), (300, 100), (600, 700)]:
+            expected = [v for v in ordered if low <= v < high]
+            assert list(index.iter_range(low, high)) == expected
+            assert index.count_range(low, high) == len(expected)
+        assert [index.nth(k) for k in range(len(ordered))] == ordered
+        with pytest.raises(IndexError):
+            index.nth(len(ordered))
+
+    def test_key_and_typecode(self):
+        """キー関数と配列チャンクでも同じ結果になることを確認"""
+        keys = [random.randint(0, 500) for _ in range(3000)]
+        index = SortedIndex(load=16, key=keys.__getitem__, typecode="q")
+        for row in range(len(keys)):
+            index.add(row)
+        ordered = sorted(range(len(keys)), key=keys.__getitem__)
+        for low, high in [(0, 501), (100, 200), (250, 251), (300, 100)]:
+            expected = [r for r in ordered if low <= keys[r] < high]
+            assert list(index.iter_range(low, high)) == expected
+            assert index.count_range(low, high) == len(expected)
+
+
+class TestItemTable:
+    """ItemTableクラスのテストクラス"""
+
+    def test_append_and_read(self):
+        """追加した行を取得でき、非ASCIIの名前も保持されることを確認"""
+        table = ItemTable()
+        for item_id, name in [(1, "apple"), (2, "日本語"), (3, ""), (4, "bé")]:
+            table.append(item_id, name, float(item_id))
+        assert len(table) == 4
+        assert table.row(1) == StoredItem(2, "日本語", 2.0)
+        assert table.rows(0, 4) == [table.row(r) for r in range(4)]
+        assert table.rows(2, 2) == []
+        assert table.name_bytes(3) == "bé".encode()
+
+    def test_find(self):
+        """連続しないIDでも行を検索できることを確認"""
+        table = ItemTable()
+        assert table.find(1) is None
+        for item_id in (1, 2, 5, 9):
+            table.append(item_id, "x", 1.0)
+        assert [table.find(i) for i in (1, 2, 5, 9)] == [0, 1, 2, 3]
+        assert table.find(3) is None
+        assert table.find(10) is None
+        assert table.find(0) is None
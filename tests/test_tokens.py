@@ -0,0 +1,104 @@
+import json
+import os
+import time
+
+import pytest
+from src.tokens import InvalidTokenError, KeySet, decode_jwt
+from tests.jwt_helpers import jwks, make_token
+
+
+@pytest.fixture
+def keys(tmp_path):
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps(jwks()))
+    return KeySet(str(path))
+
+
+class TestDecodeJwt:
+    """decode_jwt関数のテストクラス"""
+
+    @pytest.mark.parametrize("alg", ["HS256", "RS256"])
+    def test_valid_token(self, keys, alg):
+        """HS256/RS256で署名された有効なトークンのクレームが返ることを確認"""
+        claims = {"sub": "user-1", "exp": time.time() + 60}
+        assert decode_jwt(make_token(claims, alg), keys) == claims
+
+    def test_kid_selects_key(self, keys):
+        """kidで指定した鍵で検証されることを確認"""
+        token = make_token({"sub": "u"}, "RS256", kid="rsa-1")
+        assert decode_jwt(token, keys)["sub"] == "u"
+        with pytest.raises(InvalidTokenError):
+            decode_jwt(make_token({"sub": "u"}, "RS256", kid="unknown"), keys)
+
+    @pytest.mark.parametrize("alg", ["HS256", "RS256"])
+    def test_tampered_payload(self, keys, alg):
+        """ペイロードを改ざんしたトークンが拒否されることを確認"""
+        header, _, signature = make_token({"sub": "user"}, alg).split(".")
+        forged = make_token({"sub": "admin"}, alg).split(".")[1]
+        with pytest.raises(InvalidTokenError, match="signature"):
+            decode_jwt(f"{header}.{forged}.{signature}", keys)
+
+    def test_expired(self, keys):
+        """有効期限切れのトークンが拒否され、leewayで許容されることを確認"""
+        token = make_token({"exp": 1000})
+        with pytest.raises(InvalidTokenError, match="expired"):
+            decode_jwt(token, keys, now=1000)
+        assert decode_jwt(token, keys, leeway=5, now=1004)["exp"] == 1000
+
+    def test_not_before(self, keys):
+        """nbf以前のトークンが拒否されることを確認"""
+        token = make_token({"nbf": 2000})
+        with pytest.raises(InvalidTokenError, match="not yet valid"):
+            decode_jwt(token, keys, now=1999)
+        assert decode_jwt(token, keys, now=2000)["nbf"] == 2000
+
+    def test_audience(self, keys):
+        """audが一致しない場合に拒否されることを確認"""
+        assert decode_jwt(make_token({"aud": ["api", "x"]}), keys, audience="api")
+        with pytest.raises(InvalidTokenError, match="audience"):
+            decode_jwt(make_token({"aud": "other"}), keys, audience="api")
+        with pytest.raises(InvalidTokenError, match="audience"):
+            decode_jwt(make_token({}), keys, audience="api")
+
+    @pytest.mark.parametrize(
+        "token",
+        ["mocked-jwt-token", "a.b", "a.b.c", "", make_token({"sub": "x"})[:-4] + "!!!!"],
+    )
+    def test_malformed(self, keys, token):
+        """不正な形式のトークンが拒否されることを確認"""
+        with pytest.raises(InvalidTokenError):
+            decode_jwt(token, keys)
+
+    def test_unsupported_algorithm(self, keys):
+        """alg=noneなど未対応のアルゴリズムが拒否されることを確認"""
+        payload = make_token({"sub": "x"}).split(".")[1]
+        with pytest.raises(InvalidTokenError, match="algorithm"):
+            decode_jwt(f"eyJhbGciOiJub25lIn0.{payload}.", keys)
+
+
+class TestKeySet:
+    """KeySetクラスのテストクラス"""
+
+    def test_rotation_reload(self, tmp_path):
+        """鍵ファイルの更新がrefreshで反映されることを確認"""
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks(hs_kid="old")))
+        keys = KeySet(str(path), refresh_interval=0)
+        assert keys.candidates("HS256", "old")
+
+        path.write_text(json.dumps(jwks(hs_kid="new")))
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        assert keys.refresh()
+        assert keys.version == 2
+        assert keys.candidates("HS256", "new")
+        assert not keys.candidates("HS256", "old")
+
+    def test_unknown_kid_triggers_reload(self, tmp_path):
+        """未知のkidで鍵ファイルが再読み込みされることを確認"""
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps(jwks(hs_kid="old")))
+        keys = KeySet(str(path), refresh_interval=3600)
+        path.write_text(json.dumps(jwks(hs_kid="new")))
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        assert keys.candidates("HS256", "new")
+        assert not keys.candidates("HS256", "missing")
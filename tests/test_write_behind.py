@@ -0,0 +1,200 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from src import store
+from src.config import Settings
+from src.models import Item
+from src.store import InMemoryItemRepository, SQLiteItemRepository, StoredItem, create_repository
+from src.write_behind import WriteBehindRepository, WriteQueueFull
+
+
+class RecordingRepository(InMemoryItemRepository):
+    """insertの呼び出しを記録し、必要に応じて待機・失敗させるインメモリストア"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[list[int]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+        self.fail = False
+
+    async def insert(self, items):
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("disk full")
+        self.batches.append([s.item_id for s in items])
+        await super().insert(items)
+
+
+@pytest.mark.anyio
+class TestWriteBehindRepository:
+    """WriteBehindRepositoryクラスのテストクラス"""
+
+    async def test_commit_mode_waits_for_commit(self):
+        """commitモードではコミット後に応答することを確認"""
+        inner = RecordingRepository()
+        repo = WriteBehindRepository(inner, flush_interval=0.01)
+        stored = await repo.add(Item(name="a", price=1.0))
+        assert stored == StoredItem(1, "a", 1.0)
+        assert await inner.get(1) == stored
+        await repo.stop()
+
+    async def test_enqueue_mode_reads_pending_items(self):
+        """enqueueモードでは未コミットのアイテムも取得でき、停止時に書き出されることを確認"""
+        inner = RecordingRepository()
+        inner.release.clear()
+        repo = WriteBehindRepository(inner, durability="enqueue")
+        stored = await repo.add(Item(name="a", price=1.0))
+        assert await inner.get(stored.item_id) is None
+        assert await repo.get(stored.item_id) == stored
+        assert await repo.get_many([stored.item_id, 99]) == {stored.item_id: stored}
+        inner.release.set()
+        await repo.stop()
+        assert await inner.get(stored.item_id) == stored
+
+    async def test_batches_concurrent_writes(self):
+        """同時の書き込みがまとめてコミットされることを確認"""
+        inner = RecordingRepository()
+        repo = WriteBehindRepository(inner, batch_size=10, flush_interval=1.0)
+        results = await asyncio.gather(
+            *(repo.add(Item(name=f"n{i}", price=1.0)) for i in range(30))
+        )
+        assert sorted(s.item_id for s in results) == list(range(1, 31))
+        assert [len(b) for b in inner.batches] == [10, 10, 10]
+        await repo.stop()
+
+    async def test_queue_full(self):
+        """キューが満杯の場合にWriteQueueFullが発生することを確認"""
+        inner = RecordingRepository()
+        inner.release.clear()
+        repo = WriteBehindRepository(inner, queue_size=2, durability="enqueue")
+        for i in range(3):
+            await repo.add(Item(name=f"n{i}", price=1.0))
+            await asyncio.sleep(0)
+        with pytest.raises(WriteQueueFull):
+            await repo.add(Item(name="overflow", price=1.0))
+        inner.release.set()
+        await repo.stop()
+
+    async def test_failed_commit_raises(self):
+        """commitモードで書き込みに失敗した場合に例外が伝わることを確認"""
+        inner = RecordingRepository()
+        inner.fail = True
+        repo = WriteBehindRepository(inner, flush_interval=0.01)
+        with pytest.raises(RuntimeError):
+            await repo.add(Item(name="a", price=1.0))
+        await repo.stop()
+
+    async def test_add_many_after_pending_writes(self):
+        """一括追加が保留中の書き込みの後にIDの順で保存されることを確認"""
+        inner = RecordingRepository()
+        repo = WriteBehindRepository(inner, batch_size=4, durability="enqueue")
+        first = await repo.add(Item(name="a", price=1.0))
+        many = await repo.add_many([Item(name=f"n{i}", price=1.0) for i in range(6)])
+        last = await repo.add(Item(name="z", price=1.0))
+        await repo.stop()
+        ids = [first.item_id, *(s.item_id for s in many), last.item_id]
+        assert ids == sorted(ids)
+        assert [s.item_id for s in await inner.list_items(0, 100)] == ids
+
+    async def test_sqlite_reserved_ids_are_unique(self, tmp_path):
+        """同じDBを使う複数のインスタンスでIDが重複しないことを確認"""
+        path = str(tmp_path / "items.db")
+        first = WriteBehindRepository(SQLiteItemRepository(path), batch_size=5)
+        second = WriteBehindRepository(SQLiteItemRepository(path), batch_size=5)
+        results = await asyncio.gather(
+            *(
+                repo.add(Item(name=f"n{i}", price=1.0))
+                for i in range(20)
+                for repo in (first, second)
+            )
+        )
+        direct = await first.add_many([Item(name="bulk", price=1.0)])
+        ids = [s.item_id for s in results] + [direct[0].item_id]
+        assert len(set(ids)) == 41
+        assert await first.count() == 41
+        for repo in (first, second):
+            await repo.stop()
+            repo.close()
+
+    async def test_invalid_durability(self):
+        """未知の永続化モードでValueErrorが発生することを確認"""
+        with pytest.raises(ValueError):
+            WriteBehindRepository(InMemoryItemRepository(), durability="never")
+
+
+class TestWriteBehindSetup:
+    """write-behindの設定とライフサイクルのテストクラス"""
+
+    def test_wraps_repository(self):
+        """write_behindが有効な場合にラップされることを確認"""
+        repository = create_repository(Settings(write_behind=True))
+        assert isinstance(repository, WriteBehindRepository)
+
+    def test_lifespan_drains_queue(self, monkeypatch):
+        """アプリ終了時にキューの内容が書き出されることを確認"""
+        inner = RecordingRepository()
+        repo = WriteBehindRepository(inner, flush_interval=60, durability="enqueue")
+        monkeypatch.setattr(store, "_repository", repo)
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        with TestClient(app) as client:
+            client.post("/items", json={"name": "a", "price": 1.0}, headers=headers)
+            assert inner.batches == []
+        assert inner.batches == [[1]]
+        assert store._repository is None
+
+
+    def test_close_cancels_pending_writer(self):
+        """stopを呼ばずにcloseした場合もバックグラウンドタスクが取り消されることを確認"""
+
+        async def scenario():
+            repo = WriteBehindRepository(
+                RecordingRepository(), flush_interval=60, durability="enqueue"
+            )
+            await repo.add(Item(name="a", price=1.0))
+            task = repo._task
+            repo.close()
+            await asyncio.wait([task], timeout=1)
+            return task.cancelled()
+
+        assert asyncio.run(scenario())
+
+    def test_add_from_another_event_loop_raises(self):
+        """別のイベントループからの追加は待ち続けずにエラーになることを確認"""
+        repo = WriteBehindRepository(
+            RecordingRepository(), flush_interval=60, durability="enqueue"
+        )
+        asyncio.run(repo.add(Item(name="a", price=1.0)))
+        with pytest.raises(RuntimeError):
+            asyncio.run(repo.add(Item(name="b", price=1.0)))
+
+
+@pytest.mark.anyio
+class TestWriteBehindEndpoint:
+    """write-behindモードでのPOST /itemsのテストクラス"""
+
+    async def test_queue_full_returns_503(self, monkeypatch):
+        """キューが満杯の場合に503とRetry-Afterが返ることを確認"""
+        inner = RecordingRepository()
+        inner.release.clear()
+        repo = WriteBehindRepository(inner, queue_size=1, durability="enqueue")
+        monkeypatch.setattr(store, "_repository", repo)
+        headers = {"Authorization": "Bearer mocked-jwt-token"}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses = []
+            for i in range(3):
+                response = await client.post(
+                    "/items", json={"name": f"n{i}", "price": 1.0}, headers=headers
+                )
+                statuses.append(response.status_code)
+            assert statuses[-1] == 503
+            assert response.headers["retry-after"] == "1"
+            assert response.json() == {"detail": "Write queue is full"}
+            readback = await client.get("/items/1", headers=headers)
+            assert readback.json()["name"] == "n0"
+        inner.release.set()
+        await repo.stop()